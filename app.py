@@ -2,11 +2,18 @@
 # FINAL SAFE VERSION — COOKIE AUTH + POSTGRES + CORS (PRODUCTION READY)
 
 import os
+import click
 from flask import Flask, request
 from flask_cors import CORS
 
+import migrations
 from db import db
 from urls import register_routes
+from services.barcode_index import barcode_index
+from services.notification_listener import notification_listener
+from services.sales_rollup_service import REBUILD_CHUNK_DAYS, SalesRollupService
+from services.sales_totals_service import TOTALS_CHUNK_SIZE, SalesTotalsService
+from services.session_service import SESSION_SWEEP_BATCH, SessionService
 
 app = Flask(__name__)
 
@@ -63,6 +70,87 @@ db.init_app(app)
 # --------------------------------------------------
 register_routes(app)
 
+# --------------------------------------------------
+# ⚡ BARCODE INDEX (warm; re-warmed whenever the listener reconnects)
+# --------------------------------------------------
+barcode_index.init_app(app)
+
+# --------------------------------------------------
+# 📡 LISTEN/NOTIFY (cross-worker cache invalidation for every service)
+# --------------------------------------------------
+notification_listener.init_app(app)
+
+# --------------------------------------------------
+# 🔑 LOGIN SESSIONS (background sweep of expired refresh tokens)
+#   flask --app app sweep-sessions
+# --------------------------------------------------
+SessionService.init_app(app)
+
+
+@app.cli.command("sweep-sessions")
+@click.option("--batch", type=int, default=SESSION_SWEEP_BATCH)
+def sweep_sessions(batch):
+    deleted = SessionService.sweep(batch=batch, log=click.echo)
+    click.echo(f"✅ {deleted} expired sessions deleted")
+
+# --------------------------------------------------
+# 🧱 SCHEMA MIGRATIONS (see migrations/__init__.py)
+#   flask --app app db-upgrade
+#   flask --app app db-status
+# --------------------------------------------------
+@app.cli.command("db-upgrade")
+def db_upgrade():
+    applied = migrations.upgrade(log=click.echo)
+    click.echo(f"✅ {len(applied)} migration(s) applied")
+
+
+@app.cli.command("db-status")
+def db_status():
+    for version, name, description, applied in migrations.status():
+        click.echo(f"{'✅' if applied else '⏳'} {version:04d} {name} — {description}")
+
+# --------------------------------------------------
+# 📊 SALES ROLLUP BACKFILL / REBUILD
+#   flask --app app rebuild-sales-rollup [--from 2025-01-01] [--to 2025-02-01]
+# --------------------------------------------------
+@app.cli.command("rebuild-sales-rollup")
+@click.option("--from", "start", type=click.DateTime(["%Y-%m-%d"]), default=None)
+@click.option("--to", "end", type=click.DateTime(["%Y-%m-%d"]), default=None,
+              help="exclusive")
+@click.option("--chunk-days", type=int, default=REBUILD_CHUNK_DAYS)
+def rebuild_sales_rollup(start, end, chunk_days):
+    rows = SalesRollupService.rebuild(
+        start.date() if start else None,
+        end.date() if end else None,
+        chunk_days=chunk_days,
+        log=click.echo,
+    )
+    click.echo(f"✅ {rows} rollup rows written")
+
+# --------------------------------------------------
+# 🧾 SALES TOTALS BACKFILL / CONSISTENCY CHECK
+#   flask --app app backfill-sales-totals
+#   flask --app app check-sales-totals [--fix]
+# --------------------------------------------------
+@app.cli.command("backfill-sales-totals")
+@click.option("--chunk-size", type=int, default=TOTALS_CHUNK_SIZE)
+def backfill_sales_totals(chunk_size):
+    rows = SalesTotalsService.backfill(chunk_size=chunk_size, log=click.echo)
+    click.echo(f"✅ {rows} transactions updated")
+
+
+@app.cli.command("check-sales-totals")
+@click.option("--chunk-size", type=int, default=TOTALS_CHUNK_SIZE)
+@click.option("--fix", is_flag=True, help="recompute mismatching rows")
+def check_sales_totals(chunk_size, fix):
+    count, sample = SalesTotalsService.check(chunk_size=chunk_size, fix=fix, log=click.echo)
+    if not count:
+        click.echo("✅ all transaction totals match their lines")
+        return
+    click.echo(f"{'🔧 fixed' if fix else '❌ found'} {count} mismatching transactions, e.g. {sample}")
+    if not fix:
+        raise SystemExit(1)
+
 # --------------------------------------------------
 # 🧪 ROOT CHECK
 # --------------------------------------------------
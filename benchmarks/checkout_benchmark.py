@@ -0,0 +1,154 @@
+# checkout_benchmark.py
+# 50 CONCURRENT CHECKOUTS THROUGH CheckoutService — throughput + oversell check
+#
+#   PYTHONPATH=. DATABASE_URL=postgresql://... python benchmarks/checkout_benchmark.py
+#
+# Seeds a small "hot" set of bench items so carts collide on the same rows,
+# fires TOTAL_CHECKOUTS checkouts from CONCURRENCY threads, then verifies
+# that stock never went negative and that units sold == stock consumed.
+# Throughput is also capped by the SQLAlchemy pool (see app.py).
+
+import random
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import func
+
+from app import app
+from db import db
+from models.item import Item
+from models.sales_daily_rollup import SalesDailyRollup
+from models.user import User
+from models.sales_transaction import SalesTransaction
+from models.sales_transaction_item import SalesTransactionItem
+from services.checkout_service import CheckoutService, CheckoutError
+
+CONCURRENCY = 50
+TOTAL_CHECKOUTS = 2000
+HOT_ITEMS = 20
+INITIAL_STOCK = 2500
+MAX_LINES = 5
+MAX_QTY = 3
+
+BARCODE_PREFIX = "bench-checkout-"
+
+
+def seed():
+    # a previous (possibly aborted) run: its sales still reference the items
+    cleanup([
+        item_id for (item_id,) in
+        db.session.query(Item.id).filter(Item.barcode.like(f"{BARCODE_PREFIX}%"))
+    ])
+
+    user = User.query.filter_by(username="bench-checkout").first()
+    if not user:
+        user = User(username="bench-checkout", password="bench", role="customer")
+        db.session.add(user)
+
+    items = [
+        Item(
+            name=f"Bench item {i}",
+            category="Snacks",
+            price=10 + i,
+            quantity=INITIAL_STOCK,
+            barcode=f"{BARCODE_PREFIX}{i}",
+        )
+        for i in range(HOT_ITEMS)
+    ]
+    db.session.add_all(items)
+    db.session.commit()
+    return user.id, [i.id for i in items]
+
+
+def one_checkout(user_id, item_ids):
+    cart = [
+        {"item_id": item_id, "quantity": random.randint(1, MAX_QTY)}
+        for item_id in random.sample(item_ids, random.randint(1, MAX_LINES))
+    ]
+
+    started = time.perf_counter()
+    with app.app_context():
+        try:
+            CheckoutService.checkout(user_id, cart)
+            db.session.commit()
+            ok = True
+        except CheckoutError:
+            db.session.rollback()
+            ok = False
+    return ok, time.perf_counter() - started
+
+
+def verify(item_ids):
+    stock = dict(
+        db.session.query(Item.id, Item.quantity).filter(Item.id.in_(item_ids)).all()
+    )
+    sold = dict(
+        db.session.query(SalesTransactionItem.item_id, func.sum(SalesTransactionItem.quantity))
+        .filter(SalesTransactionItem.item_id.in_(item_ids))
+        .group_by(SalesTransactionItem.item_id)
+        .all()
+    )
+
+    problems = []
+    for item_id in item_ids:
+        if stock[item_id] < 0:
+            problems.append(f"item {item_id} oversold: stock {stock[item_id]}")
+        if INITIAL_STOCK - stock[item_id] != (sold.get(item_id) or 0):
+            problems.append(
+                f"item {item_id}: stock consumed {INITIAL_STOCK - stock[item_id]} "
+                f"!= units sold {sold.get(item_id) or 0}"
+            )
+    return problems
+
+
+def cleanup(item_ids):
+    tx_ids = [
+        t for (t,) in db.session.query(SalesTransactionItem.transaction_id)
+        .filter(SalesTransactionItem.item_id.in_(item_ids))
+        .distinct()
+    ]
+    SalesTransactionItem.query.filter(
+        SalesTransactionItem.transaction_id.in_(tx_ids)
+    ).delete(synchronize_session=False)
+    SalesTransaction.query.filter(SalesTransaction.id.in_(tx_ids)).delete(synchronize_session=False)
+    SalesDailyRollup.query.filter(SalesDailyRollup.item_id.in_(item_ids)).delete(synchronize_session=False)
+    Item.query.filter(Item.id.in_(item_ids)).delete(synchronize_session=False)
+    db.session.commit()
+
+
+def run():
+    with app.app_context():
+        user_id, item_ids = seed()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=CONCURRENCY) as pool:
+        results = list(pool.map(
+            lambda _: one_checkout(user_id, item_ids),
+            range(TOTAL_CHECKOUTS)
+        ))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(lat for _, lat in results)
+    succeeded = sum(1 for ok, _ in results if ok)
+
+    print(f"checkouts:   {TOTAL_CHECKOUTS} ({CONCURRENCY} concurrent)")
+    print(f"succeeded:   {succeeded}  rejected (stock): {TOTAL_CHECKOUTS - succeeded}")
+    print(f"throughput:  {TOTAL_CHECKOUTS / elapsed:.1f} checkouts/s")
+    print(f"latency p50: {statistics.median(latencies) * 1000:.1f} ms")
+    print(f"latency p99: {latencies[int(len(latencies) * 0.99) - 1] * 1000:.1f} ms")
+
+    with app.app_context():
+        problems = verify(item_ids)
+        cleanup(item_ids)
+
+    if problems:
+        print("❌ consistency check failed:")
+        for p in problems:
+            print("  ", p)
+    else:
+        print("✅ no oversell, stock consumed == units sold")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,137 @@
+# login_benchmark.py
+# LOGIN BURST THROUGH /users/login — throughput, shedding, scan latency
+#
+#   PYTHONPATH=. DATABASE_URL=postgresql://... python benchmarks/login_benchmark.py
+#
+# Seeds BENCH_USERS users (a share of them with legacy pbkdf2 hashes so the
+# on-login upgrade is exercised), fires TOTAL_LOGINS logins from CONCURRENCY
+# threads and, at the same time, barcode scans from SCAN_THREADS threads.
+# Reports login throughput / latency, how many were shed with 503, how many
+# hashes were upgraded, and scan latency idle vs during the burst.
+# Tune with PASSWORD_POOL_SIZE / PASSWORD_QUEUE_LIMIT (see password_service).
+
+import random
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import generate_password_hash
+
+from app import app
+from db import db
+from models.item import Item
+from models.user import User
+from services.password_service import PasswordService, PASSWORD_HASH_METHOD
+
+CONCURRENCY = 32
+TOTAL_LOGINS = 400
+BENCH_USERS = 50
+LEGACY_SHARE = 0.5
+LEGACY_METHOD = "pbkdf2:sha256:600000"
+SCAN_THREADS = 4
+SCANS_IDLE = 200
+
+PASSWORD = "bench-password"
+PREFIX = "bench-login-"
+BARCODE = "bench-login-scan"
+
+
+def seed():
+    cleanup()
+    current = PasswordService.hash(PASSWORD)
+    legacy = generate_password_hash(PASSWORD, method=LEGACY_METHOD)
+
+    users = [
+        User(
+            username=f"{PREFIX}{i}",
+            password=legacy if i < BENCH_USERS * LEGACY_SHARE else current,
+            role="customer",
+        )
+        for i in range(BENCH_USERS)
+    ]
+    db.session.add_all(users)
+    db.session.add(Item(name="Bench scan item", category="Snacks", price=1, quantity=1, barcode=BARCODE))
+    db.session.commit()
+
+
+def cleanup():
+    User.query.filter(User.username.like(f"{PREFIX}%")).delete(synchronize_session=False)
+    Item.query.filter(Item.barcode == BARCODE).delete(synchronize_session=False)
+    db.session.commit()
+
+
+def one_login(client):
+    started = time.perf_counter()
+    resp = client.post("/users/login", json={
+        "username": f"{PREFIX}{random.randrange(BENCH_USERS)}",
+        "password": PASSWORD,
+    })
+    return resp.status_code, time.perf_counter() - started
+
+
+def one_scan(client):
+    started = time.perf_counter()
+    client.get(f"/items/barcode/{BARCODE}")
+    return time.perf_counter() - started
+
+
+def scan_latencies(count=None, until=None):
+    client = app.test_client()
+    latencies = []
+    while (count is None or len(latencies) < count) and (until is None or not until.is_set()):
+        latencies.append(one_scan(client))
+    return latencies
+
+
+def pct(values, p):
+    values = sorted(values)
+    return values[max(0, int(len(values) * p) - 1)] * 1000
+
+
+def run():
+    with app.app_context():
+        seed()
+
+    idle = scan_latencies(count=SCANS_IDLE)
+
+    done = threading.Event()
+    scanners = ThreadPoolExecutor(max_workers=SCAN_THREADS)
+    scan_futures = [scanners.submit(scan_latencies, until=done) for _ in range(SCAN_THREADS)]
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=CONCURRENCY) as pool:
+        results = list(pool.map(lambda _: one_login(app.test_client()), range(TOTAL_LOGINS)))
+    elapsed = time.perf_counter() - started
+
+    done.set()
+    busy = [lat for f in scan_futures for lat in f.result()]
+    scanners.shutdown()
+
+    ok = [lat for status, lat in results if status == 200]
+    shed = [lat for status, lat in results if status == 503]
+    other = len(results) - len(ok) - len(shed)
+
+    with app.app_context():
+        upgraded = User.query.filter(
+            User.username.like(f"{PREFIX}%"),
+            User.password.like(f"{PASSWORD_HASH_METHOD}$%"),
+        ).count()
+        cleanup()
+
+    print(f"logins:        {TOTAL_LOGINS} ({CONCURRENCY} concurrent)")
+    print(f"succeeded:     {len(ok)}  shed (503): {len(shed)}  other: {other}")
+    print(f"throughput:    {len(ok) / elapsed:.1f} logins/s")
+    if ok:
+        print(f"login p50/p99: {statistics.median(ok) * 1000:.1f} / {pct(ok, 0.99):.1f} ms")
+    if shed:
+        print(f"shed p50:      {statistics.median(shed) * 1000:.1f} ms")
+    print(f"hashes current:{upgraded:>4} / {BENCH_USERS} users (legacy ones upgrade on login)")
+    print(f"scan idle p50/p99:  {statistics.median(idle) * 1000:.1f} / {pct(idle, 0.99):.1f} ms")
+    if busy:
+        print(f"scan burst p50/p99: {statistics.median(busy) * 1000:.1f} / {pct(busy, 0.99):.1f} ms"
+              f" ({len(busy)} scans)")
+
+
+if __name__ == "__main__":
+    run()
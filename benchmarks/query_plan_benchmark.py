@@ -0,0 +1,248 @@
+# query_plan_benchmark.py
+# EXPLAIN ANALYZE OF THE HOT QUERIES — before / after migrations/m0006 + m0010
+#
+#   PYTHONPATH=. DATABASE_URL=postgresql://... python benchmarks/query_plan_benchmark.py [--seed 500000]
+#
+# "before" drops the m0006 / m0010 indexes (and restores the old user_id-only
+# recommendation index) inside a transaction that is rolled back, so the
+# schema is untouched afterwards. DROP INDEX takes an exclusive lock:
+# run this against a benchmark database, not production.
+#
+# --seed N inserts N bench sales (plus lines, cash requests and
+# recommendations) with generate_series first. Run db-upgrade beforehand.
+
+import argparse
+import json
+import re
+import statistics
+from datetime import timedelta
+
+from sqlalchemy import text
+
+from app import app
+from db import db
+from migrations import m0006_hot_path_indexes, m0010_catalog_changes_keyset
+
+RUNS = 5
+
+PACK_INDEXES = [
+    m.group(1)
+    for m in map(
+        re.compile(r"CREATE INDEX CONCURRENTLY IF NOT EXISTS (\w+)").search,
+        m0006_hot_path_indexes.STATEMENTS + m0010_catalog_changes_keyset.STATEMENTS
+    )
+    if m
+]
+
+# (name, where it runs, SQL) — mirrors the ORM queries in routes/ and ml/
+HOT_QUERIES = [
+    ("sales_page", "routes/sales.py GET /sales", """
+        SELECT id, date, user_id FROM sales_transactions
+        WHERE date >= :start AND date < :end
+        ORDER BY date DESC, id DESC LIMIT 101
+    """),
+    ("sales_page_lines", "services/sale_detail_service.py lines_by_transaction", """
+        SELECT sti.transaction_id, sti.item_id, i.name, i.category, sti.quantity, sti.price_at_sale
+        FROM sales_transaction_items sti JOIN items i ON i.id = sti.item_id
+        WHERE sti.transaction_id IN (
+            SELECT id FROM sales_transactions ORDER BY date DESC, id DESC LIMIT 100
+        )
+        ORDER BY sti.id
+    """),
+    ("sales_for_user", "routes/sales.py GET /sales/mine", """
+        SELECT id, date, total_amount, line_count FROM sales_transactions
+        WHERE user_id = :user_id
+        ORDER BY date DESC, id DESC LIMIT 51
+    """),
+    ("sale_lines", "services/checkout_service.py revise / void", """
+        SELECT id, item_id, quantity, price_at_sale FROM sales_transaction_items
+        WHERE transaction_id = :transaction_id
+    """),
+    ("item_sales", "item history (lines by item)", """
+        SELECT sum(quantity) FROM sales_transaction_items WHERE item_id = :item_id
+    """),
+    ("export_day", "services/sales_export_service.py", """
+        SELECT st.id, st.date, st.user_id, sti.item_id, i.name, i.category, sti.quantity, sti.price_at_sale
+        FROM sales_transactions st
+        JOIN sales_transaction_items sti ON sti.transaction_id = st.id
+        LEFT JOIN items i ON i.id = sti.item_id
+        WHERE st.date >= :day_start AND st.date < :end
+        ORDER BY st.date, st.id, sti.id
+    """),
+    ("rollup_rebuild_chunk", "services/sales_rollup_service.py rebuild", """
+        SELECT date(st.date), sti.item_id, sum(sti.quantity), sum(sti.quantity * sti.price_at_sale)
+        FROM sales_transactions st
+        JOIN sales_transaction_items sti ON sti.transaction_id = st.id
+        WHERE st.date >= :start AND st.date < :end
+        GROUP BY date(st.date), sti.item_id
+    """),
+    ("cash_pending_for_user", "services/cash_payment_service.py", """
+        SELECT id FROM pending_cash_payments
+        WHERE user_id = :user_id AND status = 'PENDING' LIMIT 1
+    """),
+    ("cash_admin_queue", "routes/admin_cash_payment.py GET /pending", """
+        SELECT p.id, p.user_id, u.username, p.code, p.created_at
+        FROM pending_cash_payments p JOIN users u ON u.id = p.user_id
+        WHERE p.status = 'PENDING'
+        ORDER BY p.created_at DESC
+    """),
+    ("recommendations_top_n", "ml/recommender/inference.py", """
+        SELECT item_id, score FROM ai_recommendations
+        WHERE user_id = :user_id ORDER BY score DESC LIMIT 5
+    """),
+    ("low_stock", "services/low_stock_service.py", """
+        SELECT id, name, quantity, reorder_point FROM items
+        WHERE quantity <= reorder_point
+    """),
+    ("catalog_changes", "routes/items.py GET /items/changes", """
+        SELECT id FROM items WHERE version > :version ORDER BY version, id LIMIT 501
+    """),
+]
+
+
+def seed(n):
+    """
+    n bench sales over the last 365 days, ~3 lines each, spread over the
+    existing items and 2000 bench customers.
+    """
+    statements = [
+        """
+        INSERT INTO users (username, password, role, created_at, updated_at)
+        SELECT 'bench-user-' || g, 'bench', 'customer', now(), now()
+        FROM generate_series(1, 2000) g
+        ON CONFLICT (username) DO NOTHING
+        """,
+        """
+        INSERT INTO sales_transactions (user_id, date)
+        SELECT u.ids[1 + (g % array_length(u.ids, 1))],
+               now() - (random() * interval '365 days')
+        FROM generate_series(1, :n) g,
+             (SELECT array_agg(id) AS ids FROM users WHERE username LIKE 'bench-user-%') u
+        """,
+        """
+        INSERT INTO sales_transaction_items (transaction_id, item_id, quantity, price_at_sale)
+        SELECT t.id, i.ids[1 + ((t.id * 7 + k) % array_length(i.ids, 1))],
+               1 + (t.id + k) % 5, 10
+        FROM (SELECT id FROM sales_transactions ORDER BY id DESC LIMIT :n) t,
+             generate_series(1, 3) k,
+             (SELECT array_agg(id) AS ids FROM items) i
+        """,
+        """
+        INSERT INTO pending_cash_payments (user_id, cart, status, created_at)
+        SELECT id, '[]', CASE WHEN id % 20 = 0 THEN 'PENDING' ELSE 'PAID' END::cash_status,
+               now() - (random() * interval '30 days')
+        FROM users WHERE username LIKE 'bench-user-%'
+        """,
+        """
+        INSERT INTO ai_recommendations (user_id, item_id, score, created_at)
+        SELECT u.id, i.id, random(), now()
+        FROM (SELECT id FROM users WHERE username LIKE 'bench-user-%') u
+        CROSS JOIN LATERAL (SELECT id FROM items ORDER BY random() LIMIT 20) i
+        """,
+    ]
+    with db.engine.begin() as conn:
+        for statement in statements:
+            conn.execute(text(statement), {"n": n})
+        for table in ("users", "sales_transactions", "sales_transaction_items",
+                      "pending_cash_payments", "ai_recommendations"):
+            conn.exec_driver_sql(f"ANALYZE {table}")
+
+
+def params(conn):
+    last = conn.execute(text("SELECT max(date) FROM sales_transactions")).scalar()
+    if last is None:
+        raise SystemExit("No sales — run with --seed N first")
+
+    busiest_user = conn.execute(text(
+        "SELECT user_id FROM sales_transactions GROUP BY user_id ORDER BY count(*) DESC LIMIT 1"
+    )).scalar()
+    return {
+        "start": last - timedelta(days=31),
+        "day_start": last - timedelta(days=1),
+        "end": last,
+        "user_id": busiest_user,
+        "transaction_id": conn.execute(text("SELECT max(id) FROM sales_transactions")).scalar(),
+        "item_id": conn.execute(text(
+            "SELECT item_id FROM sales_transaction_items GROUP BY item_id ORDER BY count(*) DESC LIMIT 1"
+        )).scalar(),
+        "version": conn.execute(text("SELECT coalesce(max(version), 0) - 50 FROM items")).scalar(),
+    }
+
+
+def explain(conn, sql, bind):
+    """
+    Median execution time (ms) over RUNS and the top plan node.
+    """
+    timings, plan = [], None
+    for _ in range(RUNS):
+        (result,) = conn.execute(
+            text("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + sql), bind
+        ).one()
+        result = result if isinstance(result, list) else json.loads(result)
+        timings.append(result[0]["Execution Time"])
+        plan = result[0]["Plan"]
+    return statistics.median(timings), _describe(plan)
+
+
+def _describe(plan):
+    # first scan node (depth-first): what the planner chose to read with
+    node = plan
+    while "Scan" not in node["Node Type"] and node.get("Plans"):
+        node = node["Plans"][0]
+    return f'{node["Node Type"]} {node.get("Index Name", node.get("Relation Name", ""))}'.strip()
+
+
+def measure(conn, bind):
+    return {
+        name: explain(conn, sql, {k: v for k, v in bind.items() if f":{k}" in sql})
+        for name, _, sql in HOT_QUERIES
+    }
+
+
+def run(seed_rows, output):
+    with app.app_context():
+        if seed_rows:
+            print(f"Seeding {seed_rows} sales…")
+            seed(seed_rows)
+
+        with db.engine.connect() as conn:
+            bind = params(conn)
+
+            # BEFORE — pack indexes dropped inside a rolled-back transaction
+            tx = conn.begin()
+            for name in PACK_INDEXES:
+                conn.exec_driver_sql(f"DROP INDEX IF EXISTS {name}")
+            conn.exec_driver_sql(
+                "CREATE INDEX IF NOT EXISTS ix_ai_recommendations_user_id ON ai_recommendations (user_id)"
+            )
+            before = measure(conn, bind)
+            tx.rollback()
+
+            # AFTER — the migrated schema
+            with conn.begin():
+                after = measure(conn, bind)
+
+    print(f"\n{'query':<24}{'before ms':>12}{'after ms':>12}{'speedup':>10}  plan (after)")
+    report = []
+    for name, source, _ in HOT_QUERIES:
+        (b, _), (a, plan) = before[name], after[name]
+        speedup = b / a if a else float("inf")
+        print(f"{name:<24}{b:>12.2f}{a:>12.2f}{speedup:>9.1f}x  {plan}")
+        report.append({
+            "query": name, "source": source,
+            "before_ms": round(b, 3), "after_ms": round(a, 3),
+            "before_plan": before[name][1], "after_plan": plan,
+        })
+
+    if output:
+        with open(output, "w") as f:
+            json.dump({"params": {k: str(v) for k, v in bind.items()}, "queries": report}, f, indent=2)
+        print(f"\n📄 written to {output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seed", type=int, default=0, help="bench sales to insert first")
+    parser.add_argument("--output", help="write the results as JSON here")
+    args = parser.parse_args()
+    run(args.seed, args.output)
@@ -0,0 +1,134 @@
+# migrations/__init__.py
+# VERSIONED SCHEMA MIGRATIONS (POSTGRES)
+#
+# db.create_all() only creates missing tables; it never adds columns or
+# indexes to tables that already exist. Each mNNNN_*.py module here is one
+# schema version, and `flask --app app db-upgrade` applies the ones not yet
+# recorded in schema_migrations, in order.
+#
+# A migration module defines:
+#   DESCRIPTION    one line, shown by db-status
+#   STATEMENTS     SQL run in order; every statement must be idempotent
+#                  (IF NOT EXISTS / IF EXISTS) so a fresh create_all()
+#                  database can be upgraded safely
+#   TRANSACTIONAL  False for CREATE INDEX CONCURRENTLY: statements then run
+#                  one by one in autocommit, without blocking writes
+#
+# A change that adds columns / tables to the models adds its migration
+# module in the same change, so every release can be upgraded in place.
+
+import importlib
+import pkgutil
+import re
+
+from sqlalchemy import text
+
+from db import db
+
+# held while upgrading so two workers starting at once cannot both migrate
+MIGRATIONS_LOCK_KEY = 7421002
+
+_MODULE_NAME = re.compile(r"^m(\d{4})_(\w+)$")
+_CONCURRENT_INDEX = re.compile(r"CREATE INDEX CONCURRENTLY IF NOT EXISTS (\w+)", re.I)
+
+
+def discover():
+    """
+    [(version, name, module)] for every migration module, oldest first.
+    """
+    found = []
+    for info in pkgutil.iter_modules(__path__):
+        match = _MODULE_NAME.match(info.name)
+        if match:
+            module = importlib.import_module(f"{__name__}.{info.name}")
+            found.append((int(match.group(1)), match.group(2), module))
+    return sorted(found, key=lambda m: m[0])
+
+
+def _ensure_table(conn):
+    conn.exec_driver_sql(
+        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+        " version INTEGER PRIMARY KEY,"
+        " name VARCHAR(255) NOT NULL,"
+        " applied_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT now())"
+    )
+
+
+def _applied(conn):
+    return {v for (v,) in conn.exec_driver_sql("SELECT version FROM schema_migrations")}
+
+
+def _record(conn, version, name):
+    conn.execute(
+        text("INSERT INTO schema_migrations (version, name) VALUES (:v, :n)"),
+        {"v": version, "n": name}
+    )
+
+
+def _drop_invalid_indexes(conn, statements):
+    # an interrupted CONCURRENTLY build leaves an INVALID index behind, which
+    # IF NOT EXISTS would then silently keep
+    names = [m.group(1) for m in map(_CONCURRENT_INDEX.search, statements) if m]
+    if not names:
+        return
+    invalid = conn.execute(
+        text(
+            "SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+            "WHERE NOT i.indisvalid AND c.relname = ANY(:names)"
+        ),
+        {"names": names}
+    ).scalars().all()
+    for name in invalid:
+        conn.exec_driver_sql(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+
+
+def status():
+    """
+    [(version, name, description, applied)]
+    """
+    with db.engine.begin() as conn:
+        _ensure_table(conn)
+        done = _applied(conn)
+    return [
+        (version, name, module.DESCRIPTION, version in done)
+        for version, name, module in discover()
+    ]
+
+
+def upgrade(log=print):
+    """
+    Apply every pending migration. Returns the versions applied.
+    """
+    engine = db.engine
+    if engine.dialect.name != "postgresql":
+        log("Not Postgres: db.create_all() builds the full schema, nothing to migrate")
+        return []
+
+    applied = []
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as lock_conn:
+        lock_conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": MIGRATIONS_LOCK_KEY})
+        try:
+            _ensure_table(lock_conn)
+            done = _applied(lock_conn)
+
+            for version, name, module in discover():
+                if version in done:
+                    continue
+                log(f"→ {version:04d} {name}: {module.DESCRIPTION}")
+
+                if getattr(module, "TRANSACTIONAL", True):
+                    with engine.begin() as conn:
+                        for statement in module.STATEMENTS:
+                            conn.exec_driver_sql(statement)
+                        _record(conn, version, name)
+                else:
+                    _drop_invalid_indexes(lock_conn, module.STATEMENTS)
+                    for statement in module.STATEMENTS:
+                        lock_conn.exec_driver_sql(statement)
+                    _record(lock_conn, version, name)
+
+                applied.append(version)
+        finally:
+            lock_conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATIONS_LOCK_KEY})
+
+    return applied
@@ -0,0 +1,21 @@
+# migrations/m0001_catalog_sync.py
+# columns and tables behind catalog delta sync
+# (see models/item.py, models/item_tombstone.py)
+
+DESCRIPTION = "items.version, catalog_version_seq, item_tombstones"
+
+STATEMENTS = [
+    "CREATE SEQUENCE IF NOT EXISTS catalog_version_seq",
+
+    # constant default: no table rewrite on Postgres 11+
+    "ALTER TABLE items ADD COLUMN IF NOT EXISTS version BIGINT NOT NULL DEFAULT 0",
+
+    """
+    CREATE TABLE IF NOT EXISTS item_tombstones (
+        item_id INTEGER PRIMARY KEY,
+        version BIGINT NOT NULL,
+        deleted_at TIMESTAMP WITHOUT TIME ZONE
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_item_tombstones_version ON item_tombstones (version)",
+]
@@ -0,0 +1,8 @@
+# migrations/m0002_item_search.py
+# pg_trgm for /items/search (without it the in-process fallback is used)
+
+DESCRIPTION = "pg_trgm extension"
+
+STATEMENTS = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+]
@@ -0,0 +1,9 @@
+# migrations/m0003_reorder_point.py
+# per-item reorder point for the low-stock watchlist (see models/item.py)
+
+DESCRIPTION = "items.reorder_point"
+
+STATEMENTS = [
+    # constant default: no table rewrite on Postgres 11+
+    "ALTER TABLE items ADD COLUMN IF NOT EXISTS reorder_point INTEGER NOT NULL DEFAULT 0",
+]
@@ -0,0 +1,29 @@
+# migrations/m0004_idempotency.py
+# idempotent sale creation and PayMongo redelivery de-duplication
+# (see models/idempotency_key.py, models/processed_webhook_event.py)
+
+DESCRIPTION = "idempotency_keys, processed_webhook_events"
+
+STATEMENTS = [
+    """
+    CREATE TABLE IF NOT EXISTS idempotency_keys (
+        user_id INTEGER NOT NULL,
+        key VARCHAR(255) NOT NULL,
+        request_hash VARCHAR(64) NOT NULL,
+        status_code INTEGER NOT NULL,
+        response JSON NOT NULL,
+        created_at TIMESTAMP WITHOUT TIME ZONE,
+        PRIMARY KEY (user_id, key)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_idempotency_keys_created_at ON idempotency_keys (created_at)",
+
+    """
+    CREATE TABLE IF NOT EXISTS processed_webhook_events (
+        session_id VARCHAR(64) PRIMARY KEY,
+        event_id VARCHAR(64),
+        transaction_id INTEGER REFERENCES sales_transactions (id),
+        processed_at TIMESTAMP WITHOUT TIME ZONE
+    )
+    """,
+]
@@ -0,0 +1,19 @@
+# migrations/m0005_sales_daily_rollup.py
+# daily sales rollup (see models/sales_daily_rollup.py)
+# fill it afterwards: flask --app app rebuild-sales-rollup
+
+DESCRIPTION = "sales_daily_rollup"
+
+STATEMENTS = [
+    """
+    CREATE TABLE IF NOT EXISTS sales_daily_rollup (
+        day DATE NOT NULL,
+        item_id INTEGER NOT NULL,
+        user_id INTEGER NOT NULL,
+        quantity BIGINT NOT NULL,
+        revenue NUMERIC(14, 2) NOT NULL,
+        PRIMARY KEY (day, item_id, user_id)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_sales_daily_rollup_user_item ON sales_daily_rollup (user_id, item_id)",
+]
@@ -0,0 +1,38 @@
+# migrations/m0006_hot_path_indexes.py
+# indexes for the hot queries in routes/ and ml/ — built CONCURRENTLY so
+# checkouts keep running while they build
+# (benchmarks/query_plan_benchmark.py measures each query before / after)
+
+DESCRIPTION = "composite / partial indexes for sales, items, cash payments and recommendations"
+
+TRANSACTIONAL = False
+
+STATEMENTS = [
+    # items: delta sync, fuzzy search, low-stock watchlist
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_items_version ON items (version)",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_items_name_trgm ON items USING gin (name gin_trgm_ops)",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_items_barcode_trgm ON items USING gin (barcode gin_trgm_ops)",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_items_low_stock ON items (id) WHERE quantity <= reorder_point",
+
+    # sales: keyset listing / date ranges, per-customer history
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_sales_transactions_date_id ON sales_transactions (date, id)",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_sales_transactions_user_date ON sales_transactions (user_id, date, id)",
+
+    # sale lines: by transaction (detail, edits, page lines), by item (history)
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_sales_transaction_items_transaction_id ON sales_transaction_items (transaction_id)",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_sales_transaction_items_item_id ON sales_transaction_items (item_id)",
+
+    # cash payments: customer's open request, admin PENDING queue
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_pending_cash_payments_user_status ON pending_cash_payments (user_id, status)",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_pending_cash_payments_pending_created ON pending_cash_payments (created_at) WHERE status = 'PENDING'",
+
+    # recommendations: top-N by score per user (replaces the user_id-only index)
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_ai_recommendations_user_score ON ai_recommendations (user_id, score DESC)",
+    "DROP INDEX CONCURRENTLY IF EXISTS ix_ai_recommendations_user_id",
+
+    "ANALYZE items",
+    "ANALYZE sales_transactions",
+    "ANALYZE sales_transaction_items",
+    "ANALYZE pending_cash_payments",
+    "ANALYZE ai_recommendations",
+]
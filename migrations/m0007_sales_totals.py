@@ -0,0 +1,15 @@
+# migrations/m0007_sales_totals.py
+# denormalized order value on sales_transactions
+# (fill existing rows afterwards: flask --app app backfill-sales-totals)
+
+DESCRIPTION = "sales_transactions.total_amount / line_count + order value index"
+
+TRANSACTIONAL = False
+
+STATEMENTS = [
+    # constant defaults: no table rewrite on Postgres 11+
+    "ALTER TABLE sales_transactions ADD COLUMN IF NOT EXISTS total_amount NUMERIC(12, 2) NOT NULL DEFAULT 0",
+    "ALTER TABLE sales_transactions ADD COLUMN IF NOT EXISTS line_count INTEGER NOT NULL DEFAULT 0",
+
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_sales_transactions_total_id ON sales_transactions (total_amount, id)",
+]
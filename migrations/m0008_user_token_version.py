@@ -0,0 +1,9 @@
+# migrations/m0008_user_token_version.py
+# per-user access token version (revocation without a lookup per request)
+
+DESCRIPTION = "users.token_version"
+
+STATEMENTS = [
+    # constant default: no table rewrite on Postgres 11+
+    "ALTER TABLE users ADD COLUMN IF NOT EXISTS token_version INTEGER NOT NULL DEFAULT 0",
+]
@@ -0,0 +1,46 @@
+# migrations/m0009_user_sessions.py
+# refresh tokens move from users.refresh_token to one row per device
+# (see models/user_session.py); tokens already handed out keep working.
+# users.refresh_token is no longer read or written and can be dropped once
+# no worker of the previous release is running.
+
+DESCRIPTION = "user_sessions (+ existing refresh tokens carried over)"
+
+STATEMENTS = [
+    """
+    CREATE TABLE IF NOT EXISTS user_sessions (
+        id SERIAL PRIMARY KEY,
+        user_id INTEGER NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+        token_hash VARCHAR(64) NOT NULL UNIQUE,
+        device_name VARCHAR(100),
+        user_agent VARCHAR(255),
+        ip_address VARCHAR(45),
+        created_at TIMESTAMP WITHOUT TIME ZONE,
+        last_used_at TIMESTAMP WITHOUT TIME ZONE,
+        expires_at TIMESTAMP WITHOUT TIME ZONE NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_user_sessions_user_id ON user_sessions (user_id)",
+    "CREATE INDEX IF NOT EXISTS ix_user_sessions_expires_at ON user_sessions (expires_at)",
+
+    # a fresh create_all() database has no users.refresh_token column
+    """
+    DO $$
+    BEGIN
+        IF EXISTS (
+            SELECT 1 FROM information_schema.columns
+            WHERE table_name = 'users' AND column_name = 'refresh_token'
+        ) THEN
+            INSERT INTO user_sessions (user_id, token_hash, created_at, last_used_at, expires_at)
+            SELECT id,
+                   encode(sha256(convert_to(refresh_token, 'UTF8')), 'hex'),
+                   now() AT TIME ZONE 'utc',
+                   now() AT TIME ZONE 'utc',
+                   now() AT TIME ZONE 'utc' + interval '7 days'
+            FROM users
+            WHERE refresh_token IS NOT NULL
+            ON CONFLICT (token_hash) DO NOTHING;
+        END IF;
+    END $$
+    """,
+]
@@ -0,0 +1,17 @@
+# migrations/m0010_catalog_changes_keyset.py
+# GET /items/changes pages on (version, id), so one bulk import / update
+# sharing a single version is still split at the page limit; the
+# version-only indexes are replaced by (version, id) ones
+
+DESCRIPTION = "(version, id) keyset indexes for catalog delta sync"
+
+TRANSACTIONAL = False
+
+STATEMENTS = [
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_items_version_id ON items (version, id)",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_item_tombstones_version_item_id ON item_tombstones (version, item_id)",
+    "DROP INDEX CONCURRENTLY IF EXISTS ix_items_version",
+    "DROP INDEX CONCURRENTLY IF EXISTS ix_item_tombstones_version",
+    "ANALYZE items",
+    "ANALYZE item_tombstones",
+]
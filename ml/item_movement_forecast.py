@@ -5,8 +5,7 @@ from torch.utils.data import Dataset, DataLoader
 from datetime import date
 
 from db import db
-from models.sales_transaction import SalesTransaction
-from models.sales_transaction_item import SalesTransactionItem
+from models.sales_daily_rollup import ALL_USERS, SalesDailyRollup
 from models.item import Item
 from models.ai_item_movement import AIItemMovement
 
@@ -60,12 +59,12 @@ def run_item_movement_forecast():
             Item.id.label("item_id"),
             Item.name.label("item_name"),
             Item.category.label("category"),
-            SalesTransaction.date.label("date"),
-            SalesTransactionItem.quantity.label("quantity"),
+            SalesDailyRollup.day.label("date"),
+            SalesDailyRollup.quantity.label("quantity"),
         )
         .select_from(Item)
-        .join(SalesTransactionItem, Item.id == SalesTransactionItem.item_id)
-        .join(SalesTransaction, SalesTransaction.id == SalesTransactionItem.transaction_id)
+        .join(SalesDailyRollup, Item.id == SalesDailyRollup.item_id)
+        .filter(SalesDailyRollup.user_id == ALL_USERS)
         .all()
     )
 
@@ -1,12 +1,25 @@
 from collections import defaultdict
-from models.sales_transaction import SalesTransaction
+
+from sqlalchemy import func
+
+from db import db
+from models.sales_daily_rollup import ALL_USERS, SalesDailyRollup
 
 def build_interactions():
     user_item = defaultdict(lambda: defaultdict(int))
 
-    transactions = SalesTransaction.query.all()
-    for tx in transactions:
-        for ti in tx.items:
-            user_item[tx.user_id][ti.item_id] += ti.quantity
+    # per-customer rollup rows, summed over days in SQL
+    rows = (
+        db.session.query(
+            SalesDailyRollup.user_id,
+            SalesDailyRollup.item_id,
+            func.sum(SalesDailyRollup.quantity),
+        )
+        .filter(SalesDailyRollup.user_id != ALL_USERS)
+        .group_by(SalesDailyRollup.user_id, SalesDailyRollup.item_id)
+        .all()
+    )
+    for user_id, item_id, quantity in rows:
+        user_item[user_id][item_id] += int(quantity)
 
     return user_item
@@ -1,7 +1,10 @@
+from db import db
 from models.item import Item
 from models.ai_recommendation import AIRecommendation
 
-def recommend_for_user(user_id, top_n=5):
+def recommend_for_user(user_id, top_n=5, item_columns=()):
+    # item_columns: select only these (labelled) columns instead of whole
+    # Items, e.g. utils.projection.columns() for ?fields=; must include id
     rows = (
         AIRecommendation.query
         .filter_by(user_id=user_id)
@@ -16,7 +19,8 @@ def recommend_for_user(user_id, top_n=5):
     item_ids = [r.item_id for r in rows]
 
     # preserve ranking order
-    items = Item.query.filter(Item.id.in_(item_ids)).all()
+    query = db.session.query(*item_columns) if item_columns else Item.query
+    items = query.filter(Item.id.in_(item_ids)).all()
     item_map = {i.id: i for i in items}
 
     return [item_map[iid] for iid in item_ids if iid in item_map]
@@ -3,9 +3,10 @@ import torch
 import torch.nn as nn
 from torch.utils.data import Dataset, DataLoader
 
+from sqlalchemy import func
+
 from db import db
-from models.sales_transaction import SalesTransaction
-from models.sales_transaction_item import SalesTransactionItem
+from models.sales_daily_rollup import ALL_USERS, SalesDailyRollup
 from models.item import Item
 from models.ai_stockout_risk import AIStockoutRisk
 
@@ -60,11 +61,12 @@ def run_stockout_risk_forecast():
             Item.name.label("item_name"),
             Item.category.label("category"),
             Item.quantity.label("current_stock"),
-            SalesTransactionItem.quantity.label("sold_qty"),
+            func.sum(SalesDailyRollup.quantity).label("sold_qty"),
         )
         .select_from(Item)
-        .join(SalesTransactionItem, Item.id == SalesTransactionItem.item_id)
-        .join(SalesTransaction, SalesTransaction.id == SalesTransactionItem.transaction_id)
+        .join(SalesDailyRollup, Item.id == SalesDailyRollup.item_id)
+        .filter(SalesDailyRollup.user_id == ALL_USERS)
+        .group_by(Item.id, Item.name, Item.category, Item.quantity)
         .all()
     )
 
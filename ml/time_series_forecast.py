@@ -11,9 +11,10 @@ import random
 from sklearn.preprocessing import MinMaxScaler
 from torch.utils.data import Dataset, DataLoader
 
+from sqlalchemy import func
+
 from db import db
-from models.sales_transaction import SalesTransaction
-from models.sales_transaction_item import SalesTransactionItem
+from models.sales_daily_rollup import ALL_USERS, SalesDailyRollup
 from models.item import Item
 
 
@@ -28,27 +29,42 @@ torch.backends.cudnn.deterministic = True
 torch.backends.cudnn.benchmark = False
 
 
+def daily_category_series(rows):
+    """
+    (date, category, quantity) rows → one column of daily units per
+    category, one row per day.
+    """
+    df = pd.DataFrame(rows, columns=["date", "category", "quantity"])
+    df["date"] = pd.to_datetime(df["date"]).dt.date
+    # SUM(bigint) is numeric on Postgres: Decimal values would leave an
+    # object column that np.log1p rejects
+    df["quantity"] = df["quantity"].astype(float)
+
+    return (
+        df.groupby(["date", "category"])["quantity"]
+        .sum()
+        .unstack(fill_value=0)
+        .sort_index()
+    )
+
+
 def run_time_series_forecast():
     print("\n[ML] Stable demand prediction started")
 
     # ===============================
     # 1️⃣ LOAD DATA
     # ===============================
+    # pre-aggregated per (PH day, item) — a few rows per day instead of
+    # every sales line
     rows = (
         db.session.query(
-            SalesTransaction.date.label("date"),
+            SalesDailyRollup.day.label("date"),
             Item.category.label("category"),
-            SalesTransactionItem.quantity.label("quantity"),
-        )
-        .select_from(SalesTransaction)
-        .join(
-            SalesTransactionItem,
-            SalesTransaction.id == SalesTransactionItem.transaction_id
-        )
-        .join(
-            Item,
-            Item.id == SalesTransactionItem.item_id
+            func.sum(SalesDailyRollup.quantity).label("quantity"),
         )
+        .join(Item, Item.id == SalesDailyRollup.item_id)
+        .filter(SalesDailyRollup.user_id == ALL_USERS)
+        .group_by(SalesDailyRollup.day, Item.category)
         .all()
     )
 
@@ -56,18 +72,10 @@ def run_time_series_forecast():
         print("[ML] No sales data found")
         return None
 
-    df = pd.DataFrame(rows, columns=["date", "category", "quantity"])
-    df["date"] = pd.to_datetime(df["date"]).dt.date
-
     # ===============================
     # 2️⃣ DAILY CATEGORY SERIES
     # ===============================
-    daily = (
-        df.groupby(["date", "category"])["quantity"]
-        .sum()
-        .unstack(fill_value=0)
-        .sort_index()
-    )
+    daily = daily_category_series(rows)
 
     if len(daily) < 14:
         print("[ML] Not enough data")
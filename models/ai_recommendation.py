@@ -10,8 +10,7 @@ class AIRecommendation(db.Model):
     user_id = db.Column(
         db.Integer,
         db.ForeignKey("users.id"),
-        nullable=False,
-        index=True
+        nullable=False
     )
 
     item_id = db.Column(
@@ -23,3 +22,8 @@ class AIRecommendation(db.Model):
     score = db.Column(db.Float, nullable=False)
 
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        # top-N per user is a single index range scan, no sort
+        db.Index("ix_ai_recommendations_user_score", user_id, score.desc()),
+    )
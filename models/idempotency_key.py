@@ -0,0 +1,21 @@
+from db import db
+from datetime import datetime
+from sqlalchemy.dialects.postgresql import JSON
+
+class IdempotencyKey(db.Model):
+    __tablename__ = "idempotency_keys"
+
+    # one stored response per (user, Idempotency-Key header)
+    user_id = db.Column(db.Integer, primary_key=True)
+    key = db.Column(db.String(255), primary_key=True)
+
+    # sha256 of the request body — the same key with a different body is rejected
+    request_hash = db.Column(db.String(64), nullable=False)
+
+    status_code = db.Column(db.Integer, nullable=False)
+    response = db.Column(JSON, nullable=False)
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+    def __repr__(self):
+        return f"<IdempotencyKey User{self.user_id} {self.key}>"
@@ -1,4 +1,8 @@
 from db import db
+from sqlalchemy import DDL, event
+
+# bumped once per committed catalog change (see CatalogService.items_changed)
+catalog_version_seq = db.Sequence("catalog_version_seq", metadata=db.metadata)
 
 class Item(db.Model):
     __tablename__ = 'items'
@@ -35,6 +39,12 @@ class Item(db.Model):
     price = db.Column(db.Numeric(10, 2), nullable=False, default=0.00)
     barcode = db.Column(db.String(255), unique=True, nullable=False)
 
+    # at or below this quantity the item shows up on /items/low-stock
+    reorder_point = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+
+    # catalog version of the last change to this row (delta sync)
+    version = db.Column(db.BigInteger, nullable=False, default=0, server_default="0")
+
     # 🔄 Replaced: sales_history → transaction_items
     transaction_items = db.relationship(
         "SalesTransactionItem",
@@ -43,5 +53,34 @@ class Item(db.Model):
         cascade="all, delete-orphan"
     )
 
+    __table_args__ = (
+        # GET /items/changes keyset (see migrations/m0010)
+        db.Index("ix_items_version_id", "version", "id"),
+        # trigram indexes for /items/search (fuzzy + prefix ILIKE)
+        db.Index(
+            "ix_items_name_trgm", "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ),
+        db.Index(
+            "ix_items_barcode_trgm", "barcode",
+            postgresql_using="gin",
+            postgresql_ops={"barcode": "gin_trgm_ops"},
+        ),
+        # only low-stock rows are indexed, so /items/low-stock stays cheap
+        # however large the catalog gets
+        db.Index(
+            "ix_items_low_stock", "id",
+            postgresql_where=db.text("quantity <= reorder_point"),
+        ),
+    )
+
     def __repr__(self):
         return f"<Item {self.name}>"
+
+
+event.listen(
+    Item.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
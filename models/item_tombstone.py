@@ -0,0 +1,18 @@
+from db import db
+from datetime import datetime
+
+class ItemTombstone(db.Model):
+    __tablename__ = "item_tombstones"
+
+    # deleted items stay visible to delta sync clients
+    item_id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False)
+
+    deleted_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index("ix_item_tombstones_version_item_id", "version", "item_id"),
+    )
+
+    def __repr__(self):
+        return f"<ItemTombstone Item{self.item_id} v{self.version}>"
@@ -19,4 +19,14 @@ class PendingCashPayment(db.Model):
         nullable=False
     )
 
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
\ No newline at end of file
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        # "does this customer already have a PENDING request?"
+        db.Index("ix_pending_cash_payments_user_status", "user_id", "status"),
+        # admin queue: only PENDING rows, newest first
+        db.Index(
+            "ix_pending_cash_payments_pending_created", "created_at",
+            postgresql_where=db.text("status = 'PENDING'"),
+        ),
+    )
\ No newline at end of file
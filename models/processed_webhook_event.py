@@ -0,0 +1,21 @@
+from db import db
+from datetime import datetime
+
+class ProcessedWebhookEvent(db.Model):
+    __tablename__ = "processed_webhook_events"
+
+    # PayMongo checkout session id — one sale per paid session, however
+    # many times (or under however many event ids) it is delivered
+    session_id = db.Column(db.String(64), primary_key=True)
+    event_id = db.Column(db.String(64), nullable=True)
+
+    transaction_id = db.Column(
+        db.Integer,
+        db.ForeignKey("sales_transactions.id"),
+        nullable=True
+    )
+
+    processed_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<ProcessedWebhookEvent {self.session_id}>"
@@ -0,0 +1,25 @@
+from db import db
+
+# user_id of the per-item totals row (all customers combined)
+ALL_USERS = 0
+
+class SalesDailyRollup(db.Model):
+    __tablename__ = "sales_daily_rollup"
+
+    # 🇵🇭 sale day in Asia/Manila (sales dates are stored as PH time)
+    day = db.Column(db.Date, primary_key=True)
+    item_id = db.Column(db.Integer, primary_key=True)
+
+    # ALL_USERS (0) = every customer; otherwise one customer's purchases
+    user_id = db.Column(db.Integer, primary_key=True, default=ALL_USERS)
+
+    quantity = db.Column(db.BigInteger, nullable=False, default=0)
+    revenue = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+
+    __table_args__ = (
+        # per-customer reads (recommender) skip the ALL_USERS rows
+        db.Index("ix_sales_daily_rollup_user_item", "user_id", "item_id"),
+    )
+
+    def __repr__(self):
+        return f"<SalesDailyRollup {self.day} Item{self.item_id} User{self.user_id}>"
@@ -27,6 +27,11 @@ class SalesTransaction(db.Model):
         default=ph_now
     )
 
+    # denormalized from the lines, written with them (CheckoutService /
+    # BatchSyncService); SalesTotalsService backfills and checks them
+    total_amount = db.Column(db.Numeric(12, 2), nullable=False, default=0, server_default=db.text("0"))
+    line_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+
     # One transaction → many items
     items = db.relationship(
         "SalesTransactionItem",
@@ -40,5 +45,14 @@ class SalesTransaction(db.Model):
         backref="sales_transactions"
     )
 
+    __table_args__ = (
+        # GET /sales keyset (date, id), date-range filters, export, rollup rebuild
+        db.Index("ix_sales_transactions_date_id", "date", "id"),
+        # one customer's history, newest first (scanned backwards)
+        db.Index("ix_sales_transactions_user_date", "user_id", "date", "id"),
+        # sort / filter by order value
+        db.Index("ix_sales_transactions_total_id", "total_amount", "id"),
+    )
+
     def __repr__(self):
         return f"<SalesTransaction {self.id}>"
@@ -8,13 +8,15 @@ class SalesTransactionItem(db.Model):
     transaction_id = db.Column(
         db.Integer,
         db.ForeignKey("sales_transactions.id"),
-        nullable=False
+        nullable=False,
+        index=True
     )
 
     item_id = db.Column(
         db.Integer,
         db.ForeignKey("items.id"),
-        nullable=False
+        nullable=False,
+        index=True
     )
 
     quantity = db.Column(db.Integer, nullable=False)
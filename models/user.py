@@ -15,8 +15,8 @@ class User(db.Model):
         nullable=False
     )
 
-    # ✅ refresh token (cookie-based auth)
-    refresh_token = db.Column(db.String(500), nullable=True)
+    # ✅ bumped to revoke every access token minted before (logout, role change)
+    token_version = db.Column(db.Integer, nullable=False, default=0, server_default="0")
 
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
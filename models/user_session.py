@@ -0,0 +1,29 @@
+from db import db
+from datetime import datetime
+
+class UserSession(db.Model):
+    __tablename__ = "user_sessions"
+
+    # one row per logged-in device (refresh token)
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(
+        db.Integer,
+        db.ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True
+    )
+
+    # sha256 of the refresh token — the token itself is never stored
+    token_hash = db.Column(db.String(64), nullable=False, unique=True)
+
+    # device metadata (shown to the user, never trusted)
+    device_name = db.Column(db.String(100), nullable=True)
+    user_agent = db.Column(db.String(255), nullable=True)
+    ip_address = db.Column(db.String(45), nullable=True)
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    last_used_at = db.Column(db.DateTime, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<UserSession {self.id} User{self.user_id}>"
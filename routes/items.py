@@ -1,6 +1,32 @@
-from flask import Blueprint, request, jsonify
+import hashlib
+import json
+from decimal import Decimal
+
+from flask import Blueprint, request, jsonify, Response, stream_with_context
+from sqlalchemy import or_, tuple_
 from models.item import Item
+from models.item_tombstone import ItemTombstone
 from models.sales_transaction_item import SalesTransactionItem
+from services.barcode_index import barcode_index
+from services.catalog_service import CatalogService
+from services.item_bulk_service import ItemBulkService
+from services.item_import_service import ItemImportService
+from services.inventory_summary_service import InventorySummaryService
+from services.low_stock_service import low_stock_watchlist
+from services.item_search_service import ItemSearchService, DEFAULT_LIMIT, MAX_LIMIT
+from utils.item_validation import (
+    CATEGORIES,
+    CATEGORY_SET,
+    invalid_category_message,
+    validate_item_fields,
+)
+from utils.projection import columns, dump, parse_fields
+from utils.pagination import (
+    InvalidCursor,
+    decode_cursor,
+    encode_cursor,
+    parse_page_size,
+)
 
 # from utils.auth_restrict import require_auth
 
@@ -8,30 +34,348 @@ from db import db
 
 items_bp = Blueprint('items', __name__)
 
+# rows fetched per round trip from the server-side cursor when streaming
+STREAM_BATCH_SIZE = 1000
+
+# max changed rows per /items/changes response
+CHANGES_PAGE_SIZE = 1000
+
+# max cart lines per /items/resolve request
+MAX_RESOLVE_ENTRIES = 500
+
+ITEM_COLUMNS = (Item.id, Item.name, Item.quantity, Item.category, Item.price, Item.barcode)
+
+# ?fields= projection for the listing
+ITEM_FIELDS = {
+    'id': (Item.id, None),
+    'name': (Item.name, None),
+    'quantity': (Item.quantity, None),
+    'reorder_point': (Item.reorder_point, None),
+    'category': (Item.category, None),
+    'price': (Item.price, float),
+    'barcode': (Item.barcode, None),
+}
+
+
 def valid_categories():
-    return [choice for choice in Item.__table__.columns.category.type.enums]
+    return list(CATEGORIES)
+
+
+def item_to_dict(i):
+    # works for both Item instances and ITEM_COLUMNS rows
+    return {
+        'id': i.id,
+        'name': i.name,
+        'quantity': i.quantity,
+        'category': i.category,
+        'price': float(i.price),
+        'barcode': i.barcode
+    }
+
+
+def _stream_items(fields):
+    rows = (
+        db.session.query(*columns(ITEM_FIELDS, fields))
+        .order_by(Item.id)
+        .execution_options(yield_per=STREAM_BATCH_SIZE)
+    )
+
+    yield '['
+    first = True
+    for row in rows:
+        yield ('' if first else ',') + json.dumps(dump(row, ITEM_FIELDS, fields))
+        first = False
+    yield ']'
+
+
+def _catalog_etag(version):
+    # one tag per (catalog version, query) so every page revalidates separately
+    query = hashlib.sha1(request.query_string).hexdigest()[:12]
+    return f"{version}-{query}"
+
+
+def _not_modified(etag, version):
+    resp = Response(status=304)
+    resp.set_etag(etag)
+    resp.headers['X-Catalog-Version'] = str(version)
+    return resp
 
 
 # 🟢 GET all items
+# ?limit=&cursor= → one keyset page: {"items": [...], "next_cursor": ...}
+# no params       → full catalog, streamed as a JSON array
+# both carry a strong ETag + X-Catalog-Version (304 when unchanged)
+# ?fields=id,name,price selects only those columns
 @items_bp.route('/', methods=['GET'])
 # @require_auth(roles=("admin"),)
 def get_items():
     try:
-        items = Item.query.all()
-        return jsonify([
-            {
-                'id': i.id,
-                'name': i.name,
-                'quantity': i.quantity,
-                'category': i.category,
-                'price': float(i.price),
-                'barcode': i.barcode
-            } for i in items
-        ]), 200
+        fields = parse_fields(ITEM_FIELDS)
+        version = CatalogService.current_version()
+        etag = _catalog_etag(version)
+        if request.if_none_match.contains(etag):
+            return _not_modified(etag, version)
+
+        cursor = request.args.get('cursor')
+        if cursor is None and request.args.get('limit') is None:
+            resp = Response(
+                stream_with_context(_stream_items(fields)),
+                mimetype='application/json'
+            )
+        else:
+            limit = parse_page_size(request.args.get('limit'))
+
+            # id is always selected: it is the keyset
+            query = db.session.query(*columns(ITEM_FIELDS, fields, Item.id)).order_by(Item.id)
+            if cursor:
+                (last_id,) = decode_cursor(cursor, 1)
+                query = query.filter(Item.id > last_id)
+
+            # fetch one extra row to know whether another page exists
+            rows = query.limit(limit + 1).all()
+            has_more = len(rows) > limit
+            rows = rows[:limit]
+
+            resp = jsonify({
+                'items': [dump(r, ITEM_FIELDS, fields) for r in rows],
+                'next_cursor': encode_cursor(rows[-1].id) if has_more else None
+            })
+
+        resp.set_etag(etag)
+        resp.headers['X-Catalog-Version'] = str(version)
+        return resp, 200
+    except (InvalidCursor, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+# 🟢 GET catalog changes since a version (delta sync)
+# → {"version": v, "items": [...], "deleted": [ids], "has_more": bool,
+#    "next_cursor": ...}
+# pages are keyset on (version, id), so one huge commit (bulk import /
+# update) is split like anything else: while has_more, call again with
+# cursor=<next_cursor>; then poll with since=<version>
+@items_bp.route('/changes', methods=['GET'])
+# @require_auth()
+def get_item_changes():
+    try:
+        since = int(request.args.get('since', -1))
+        limit = parse_page_size(request.args.get('limit'), default=CHANGES_PAGE_SIZE)
+        cursor = request.args.get('cursor')
+        after = decode_cursor(cursor, 2) if cursor else None
+        if after is not None and not all(isinstance(v, int) for v in after):
+            raise InvalidCursor("invalid cursor")
+    except InvalidCursor as e:
+        return jsonify({'error': str(e)}), 400
+    except ValueError:
+        return jsonify({'error': 'since and limit must be integers'}), 400
+
+    try:
+        version = CatalogService.current_version()
+
+        def changed(query, version_column, id_column):
+            if after is None:
+                query = query.filter(version_column > since)
+            else:
+                query = query.filter(tuple_(version_column, id_column) > tuple_(*after))
+            return (
+                query.filter(version_column <= version)
+                .order_by(version_column, id_column)
+                .limit(limit + 1)
+                .all()
+            )
+
+        items = changed(
+            db.session.query(*ITEM_COLUMNS, Item.version), Item.version, Item.id
+        )
+        gone = changed(
+            db.session.query(ItemTombstone.item_id, ItemTombstone.version),
+            ItemTombstone.version, ItemTombstone.item_id
+        )
+
+        # both streams merged in (version, id) order, cut at the limit
+        rows = sorted(
+            [(r.version, r.id, r) for r in items]
+            + [(r.version, r.item_id, None) for r in gone],
+            key=lambda r: (r[0], r[1])
+        )
+        has_more = len(rows) > limit
+        next_cursor = None
+        if has_more:
+            last, following = rows[limit - 1], rows[limit]
+            rows = rows[:limit]
+            next_cursor = encode_cursor(last[0], last[1])
+            # every change up to here has been sent
+            version = last[0] if following[0] > last[0] else last[0] - 1
+
+        return jsonify({
+            'version': version,
+            'items': [item_to_dict(row) for _, _, row in rows if row is not None],
+            'deleted': [item_id for _, item_id, row in rows if row is None],
+            'has_more': has_more,
+            'next_cursor': next_cursor
+        }), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+# 🟢 SEARCH items by name / barcode (fuzzy + prefix, ranked)
+@items_bp.route('/search', methods=['GET'])
+# @require_auth()
+def search_items():
+    query = (request.args.get('q') or '').strip()
+    if not query:
+        return jsonify({'error': 'q is required'}), 400
+
+    category = request.args.get('category')
+    if category and category not in CATEGORY_SET:
+        return jsonify({'error': invalid_category_message()}), 400
+
+    try:
+        limit = parse_page_size(request.args.get('limit'), default=DEFAULT_LIMIT, maximum=MAX_LIMIT)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        results = ItemSearchService.search(query, category=category, limit=limit)
+        return jsonify({
+            'query': query,
+            'results': [
+                {**item_to_dict(row), 'score': score}
+                for row, score in results
+            ]
+        }), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
+# 🟢 RESOLVE a cart in one query
+# body: {"items": [{"item_id": 1, "quantity": 2}, {"barcode": "480...", "quantity": 1}]}
+# → lines in request order (found=false for unknown entries) + cart total
+@items_bp.route('/resolve', methods=['POST'])
+# @require_auth()
+def resolve_items():
+    data = request.get_json(silent=True) or {}
+    entries = data.get('items')
+
+    if not isinstance(entries, list) or not entries:
+        return jsonify({'error': 'items must be a non-empty list'}), 400
+    if len(entries) > MAX_RESOLVE_ENTRIES:
+        return jsonify({'error': f'at most {MAX_RESOLVE_ENTRIES} items per request'}), 400
+
+    ids, barcodes = set(), set()
+    for entry in entries:
+        if not isinstance(entry, dict):
+            return jsonify({'error': 'each entry must be an object'}), 400
+        qty = entry.get('quantity', 1)
+        if isinstance(qty, bool) or not isinstance(qty, int) or qty < 1:
+            return jsonify({'error': 'quantity must be a positive integer'}), 400
+        if entry.get('item_id') is not None:
+            try:
+                ids.add(int(entry['item_id']))
+            except (TypeError, ValueError):
+                return jsonify({'error': 'item_id must be an integer'}), 400
+        elif entry.get('barcode'):
+            barcodes.add(str(entry['barcode']))
+        else:
+            return jsonify({'error': 'each entry needs item_id or barcode'}), 400
+
+    try:
+        rows = db.session.query(*ITEM_COLUMNS).filter(
+            or_(Item.id.in_(ids), Item.barcode.in_(barcodes))
+        ).all()
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+    by_id = {r.id: r for r in rows}
+    by_barcode = {r.barcode: r for r in rows}
+
+    # stock is checked against the whole cart, not line by line
+    requested = {}
+    for entry in entries:
+        if entry.get('item_id') is not None:
+            row = by_id.get(int(entry['item_id']))
+        else:
+            row = by_barcode.get(str(entry['barcode']))
+        if row is not None:
+            requested[row.id] = requested.get(row.id, 0) + entry.get('quantity', 1)
+
+    lines = []
+    total = Decimal('0')
+    for entry in entries:
+        qty = entry.get('quantity', 1)
+        if entry.get('item_id') is not None:
+            key = {'item_id': int(entry['item_id'])}
+            row = by_id.get(key['item_id'])
+        else:
+            key = {'barcode': str(entry['barcode'])}
+            row = by_barcode.get(key['barcode'])
+
+        if row is None:
+            lines.append({**key, 'quantity': qty, 'found': False})
+            continue
+
+        line_total = row.price * qty
+        total += line_total
+        lines.append({
+            **key,
+            'quantity': qty,
+            'found': True,
+            'item': item_to_dict(row),
+            'line_total': float(line_total),
+            'in_stock': (row.quantity or 0) >= requested[row.id]
+        })
+
+    return jsonify({
+        'lines': lines,
+        'total': float(total),
+        'all_found': all(line['found'] for line in lines),
+        'all_in_stock': all(line.get('in_stock') for line in lines)
+    }), 200
+
+
+# 🟢 INVENTORY SUMMARY per category (count, units, stock value)
+@items_bp.route('/summary', methods=['GET'])
+# @require_auth(roles=("admin",))
+def get_inventory_summary():
+    try:
+        return jsonify(InventorySummaryService.by_category()), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+# 🟠 LOW-STOCK watchlist (quantity <= reorder_point), biggest shortfall first
+@items_bp.route('/low-stock', methods=['GET'])
+# @require_auth(roles=("admin",))
+def get_low_stock():
+    category = request.args.get('category')
+    if category and category not in CATEGORY_SET:
+        return jsonify({'error': invalid_category_message()}), 400
+
+    try:
+        rows = low_stock_watchlist.snapshot()
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+    if category:
+        rows = [r for r in rows if r.category == category]
+    rows.sort(key=lambda r: (r.quantity - r.reorder_point, r.id))
+
+    return jsonify([
+        {
+            'id': r.id,
+            'name': r.name,
+            'category': r.category,
+            'barcode': r.barcode,
+            'quantity': r.quantity,
+            'reorder_point': r.reorder_point,
+            'shortfall': r.reorder_point - r.quantity
+        }
+        for r in rows
+    ]), 200
+
+
 # 🟢 GET item by ID
 @items_bp.route('/<int:id>', methods=['GET'])
 # @require_auth()
@@ -41,14 +385,7 @@ def get_item_by_id(id):
         if not item:
             return jsonify({'error': 'Item not found'}), 404
 
-        return jsonify({
-            'id': item.id,
-            'name': item.name,
-            'quantity': item.quantity,
-            'category': item.category,
-            'price': float(item.price),
-            'barcode': item.barcode
-        }), 200
+        return jsonify(item_to_dict(item)), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -58,22 +395,22 @@ def get_item_by_id(id):
 # @require_auth()
 def get_item_by_barcode(barcode):
     try:
-        item = Item.query.filter_by(barcode=barcode).first()
+        item = barcode_index.lookup(barcode)
         if not item:
             return jsonify({'error': 'Item not found'}), 404
 
-        return jsonify({
-            'id': item.id,
-            'name': item.name,
-            'quantity': item.quantity,
-            'category': item.category,
-            'price': float(item.price),
-            'barcode': item.barcode
-        }), 200
+        return jsonify(item), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
+# 🟢 Barcode index health (hit rate, notify lag, entry age)
+@items_bp.route('/barcode-index/stats', methods=['GET'])
+# @require_auth(roles=("admin",))
+def get_barcode_index_stats():
+    return jsonify(barcode_index.stats()), 200
+
+
 # 🟢 CREATE item
 @items_bp.route('/', methods=['POST'])
 # @require_auth(roles=("admin",))
@@ -81,56 +418,77 @@ def create_item():
     try:
         data = request.get_json() or {}
 
-        name = data.get('name')
-        quantity = data.get('quantity', 0)
-        category = data.get('category')
-        price = data.get('price')
-        barcode = data.get('barcode')
-
-        # Validate required
-        if not name or not barcode or category is None or price is None:
-            return jsonify({'error': 'name, barcode, category, and price are required'}), 400
-
-        # Validate numeric fields
-        if quantity < 0:
-            return jsonify({'error': 'quantity must be 0 or greater'}), 400
-        if float(price) < 0:
-            return jsonify({'error': 'price must be 0 or greater'}), 400
-
-        # Validate category
-        if category not in valid_categories():
-            return jsonify({'error': f"Invalid category. Allowed: {', '.join(valid_categories())}"}), 400
+        fields, error = validate_item_fields(data)
+        if error:
+            return jsonify({'error': error}), 400
 
         # Unique barcode
-        existing = Item.query.filter_by(barcode=barcode).first()
+        existing = Item.query.filter_by(barcode=fields['barcode']).first()
         if existing:
             return jsonify({'error': 'barcode already exists'}), 400
 
-        new_item = Item(
-            name=name,
-            quantity=quantity,
-            category=category,
-            price=price,
-            barcode=barcode
-        )
+        new_item = Item(**fields)
 
         db.session.add(new_item)
+        db.session.flush()
+        CatalogService.items_changed([new_item.id])
         db.session.commit()
 
-        return jsonify({
-            'id': new_item.id,
-            'name': new_item.name,
-            'quantity': new_item.quantity,
-            'category': new_item.category,
-            'price': float(new_item.price),
-            'barcode': new_item.barcode
-        }), 201
+        return jsonify(item_to_dict(new_item)), 201
 
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 400
 
 
+# 🟢 BULK IMPORT items (CSV with header or NDJSON)
+# ?format=csv|ndjson (defaults from Content-Type), ?dry_run=1 validates only
+@items_bp.route('/import', methods=['POST'])
+# @require_auth(roles=("admin",))
+def import_items():
+    fmt = request.args.get('format')
+    if not fmt:
+        fmt = 'csv' if request.mimetype == 'text/csv' else 'ndjson'
+
+    dry_run = request.args.get('dry_run', '').lower() in ('1', 'true', 'yes')
+
+    try:
+        rows = ItemImportService.parse(request.get_data(as_text=True), fmt)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        report = ItemImportService.import_rows(rows, dry_run=dry_run)
+    except Exception as e:
+        # per-row problems are in the report; this is the DB itself failing
+        print("ERROR: item import failed:", e)
+        return jsonify({'error': 'Import failed, nothing was imported'}), 500
+
+    status = 200 if dry_run or not report['imported'] else 201
+    return jsonify(report), status
+
+
+# 🟡 BULK UPDATE items matching a filter (one UPDATE ... RETURNING)
+@items_bp.route('/bulk', methods=['POST'])
+# @require_auth(roles=("admin",))
+def bulk_update_items():
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Invalid or missing JSON body'}), 400
+
+    try:
+        rows = ItemBulkService.mutate(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+    return jsonify({
+        'updated': len(rows),
+        'items': [item_to_dict(r) for r in rows]
+    }), 200
+
+
 # 🟡 UPDATE item
 @items_bp.route('/<int:id>', methods=['PUT'])
 # @require_auth()
@@ -142,44 +500,24 @@ def update_item(id):
         if not item:
             return jsonify({'error': 'Item not found'}), 404
 
-        # Validate category if provided
-        category = data.get('category')
-        if category and category not in valid_categories():
-            return jsonify({'error': f"Invalid category. Allowed: {', '.join(valid_categories())}"}), 400
-
-        # Validate quantity & price
-        if 'quantity' in data and data['quantity'] < 0:
-            return jsonify({'error': 'quantity must be 0 or greater'}), 400
-        if 'price' in data and float(data['price']) < 0:
-            return jsonify({'error': 'price must be 0 or greater'}), 400
+        fields, error = validate_item_fields(data, partial=True)
+        if error:
+            return jsonify({'error': error}), 400
 
         # Barcode uniqueness
-        if 'barcode' in data and data['barcode'] != item.barcode:
-            existing = Item.query.filter_by(barcode=data['barcode']).first()
+        if 'barcode' in fields and fields['barcode'] != item.barcode:
+            existing = Item.query.filter_by(barcode=fields['barcode']).first()
             if existing:
                 return jsonify({'error': 'barcode already exists'}), 400
-            item.barcode = data['barcode']
 
         # Update fields
-        if 'name' in data:
-            item.name = data['name']
-        if category:
-            item.category = category
-        if 'price' in data:
-            item.price = data['price']
-        if 'quantity' in data:
-            item.quantity = data['quantity']
+        for field, value in fields.items():
+            setattr(item, field, value)
 
+        CatalogService.items_changed([item.id])
         db.session.commit()
 
-        return jsonify({
-            'id': item.id,
-            'name': item.name,
-            'quantity': item.quantity,
-            'category': item.category,
-            'price': float(item.price),
-            'barcode': item.barcode
-        }), 200
+        return jsonify(item_to_dict(item)), 200
 
     except Exception as e:
         db.session.rollback()
@@ -201,6 +539,7 @@ def delete_item(id):
             return jsonify({'error': 'Item was sold and cannot be deleted'}), 400
 
         db.session.delete(item)
+        CatalogService.items_changed([item.id])
         db.session.commit()
 
         return jsonify({'message': 'Item deleted'}), 200
@@ -14,11 +14,47 @@ from models.ai_forecast import AIForecast
 from models.ai_item_movement import AIItemMovement
 from models.ai_stockout_risk import AIStockoutRisk
 
+from utils.projection import columns, dump, parse_fields
+
 # from utils.auth_restrict import require_auth
 
 
 ml_bp = Blueprint("ml_bp", __name__)
 
+
+def _isoformat(d):
+    return d.isoformat()
+
+
+# ?fields= projections for the GET endpoints
+FORECAST_FIELDS = {
+    "id": (AIForecast.id, None),
+    "category": (AIForecast.category, None),
+    "predicted_quantity": (AIForecast.predicted_quantity, None),
+    "created_at": (AIForecast.created_at, _isoformat),
+}
+
+ITEM_MOVEMENT_FIELDS = {
+    "item_id": (AIItemMovement.item_id, None),
+    "item_name": (AIItemMovement.item_name, None),
+    "category": (AIItemMovement.category, None),
+    "avg_daily_sales": (AIItemMovement.avg_daily_sales, None),
+    "days_since_last_sale": (AIItemMovement.days_since_last_sale, None),
+    "movement_class": (AIItemMovement.movement_class, None),
+    "created_at": (AIItemMovement.created_at, _isoformat),
+}
+
+STOCKOUT_RISK_FIELDS = {
+    "item_id": (AIStockoutRisk.item_id, None),
+    "item_name": (AIStockoutRisk.item_name, None),
+    "category": (AIStockoutRisk.category, None),
+    "current_stock": (AIStockoutRisk.current_stock, None),
+    "avg_daily_sales": (AIStockoutRisk.avg_daily_sales, None),
+    "days_of_stock_left": (AIStockoutRisk.days_of_stock_left, None),
+    "risk_level": (AIStockoutRisk.risk_level, None),
+    "created_at": (AIStockoutRisk.created_at, _isoformat),
+}
+
 # =================================================
 # DEMAND FORECAST
 # =================================================
@@ -66,7 +102,16 @@ def create_forecast():
 @ml_bp.route("/forecast", methods=["GET"])
 # @require_auth()
 def get_forecasts_grouped():
-    forecasts = AIForecast.query.order_by(AIForecast.category).all()
+    try:
+        fields = parse_fields(FORECAST_FIELDS)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    forecasts = (
+        db.session.query(*columns(FORECAST_FIELDS, fields, AIForecast.horizon))
+        .order_by(AIForecast.category)
+        .all()
+    )
 
     grouped = {
         "tomorrow": [],
@@ -75,12 +120,7 @@ def get_forecasts_grouped():
     }
 
     for f in forecasts:
-        data = {
-            "id": f.id,
-            "category": f.category,
-            "predicted_quantity": f.predicted_quantity,
-            "created_at": f.created_at.isoformat()
-        }
+        data = dump(f, FORECAST_FIELDS, fields)
 
         if f.horizon == "tomorrow":
             grouped["tomorrow"].append(data)
@@ -141,19 +181,17 @@ def create_item_movement_forecast():
 @ml_bp.route("/item-movement-forecast", methods=["GET"])
 # @require_auth()
 def get_item_movement_forecast():
-    records = AIItemMovement.query.order_by(AIItemMovement.category).all()
-    return jsonify([
-        {
-            "item_id": r.item_id,
-            "item_name": r.item_name,
-            "category": r.category,
-            "avg_daily_sales": r.avg_daily_sales,
-            "days_since_last_sale": r.days_since_last_sale,
-            "movement_class": r.movement_class,
-            "created_at": r.created_at.isoformat()
-        }
-        for r in records
-    ]), 200
+    try:
+        fields = parse_fields(ITEM_MOVEMENT_FIELDS)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    records = (
+        db.session.query(*columns(ITEM_MOVEMENT_FIELDS, fields))
+        .order_by(AIItemMovement.category)
+        .all()
+    )
+    return jsonify([dump(r, ITEM_MOVEMENT_FIELDS, fields) for r in records]), 200
 
 
 # =================================================
@@ -178,6 +216,11 @@ def create_stockout_risk():
 @ml_bp.route("/stockout-risk", methods=["GET"])
 # @require_auth()
 def get_stockout_risk():
+    try:
+        fields = parse_fields(STOCKOUT_RISK_FIELDS)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
     priority_order = case(
         (AIStockoutRisk.risk_level == "High", 1),
         (AIStockoutRisk.risk_level == "Medium", 2),
@@ -186,21 +229,9 @@ def get_stockout_risk():
     )
 
     records = (
-        AIStockoutRisk.query
+        db.session.query(*columns(STOCKOUT_RISK_FIELDS, fields))
         .order_by(priority_order, AIStockoutRisk.category)
         .all()
     )
 
-    return jsonify([
-        {
-            "item_id": r.item_id,
-            "item_name": r.item_name,
-            "category": r.category,
-            "current_stock": r.current_stock,
-            "avg_daily_sales": r.avg_daily_sales,
-            "days_of_stock_left": r.days_of_stock_left,
-            "risk_level": r.risk_level,
-            "created_at": r.created_at.isoformat()
-        }
-        for r in records
-    ]), 200
+    return jsonify([dump(r, STOCKOUT_RISK_FIELDS, fields) for r in records]), 200
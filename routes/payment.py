@@ -1,13 +1,13 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, g
 import requests
 from requests.auth import HTTPBasicAuth
 import json
 from db import db
-from models.item import Item
 import os
 from dotenv import load_dotenv
-from models.sales_transaction import SalesTransaction
-from models.sales_transaction_item import SalesTransactionItem
+from services.checkout_service import CheckoutService
+from services.idempotency_service import IdempotencyService
+from utils.auth_restrict import require_auth
 
 load_dotenv()
 
@@ -18,6 +18,7 @@ auth = HTTPBasicAuth(PAYMONGO_SECRET_KEY, "")
 
 # Create Payment Intent (GCash)
 @payment_bp.route("/intent", methods=["POST"])
+@require_auth(roles=("customer",))
 def create_payment_intent():
     data = request.get_json()
     amount = data.get("amount", 2000)
@@ -40,7 +41,9 @@ def create_payment_intent():
                 "currency": currency,
                 "capture_type": "automatic",
                 "metadata": {
-                    "cart": json.dumps(cart_metadata)
+                    "cart": json.dumps(cart_metadata),
+                    # the webhook records the sale for this customer
+                    "user_id": str(g.current_user.id)
                 }
             }
         }
@@ -61,6 +64,7 @@ def create_payment_intent():
 
 # Create Checkout Session
 @payment_bp.route("/checkout", methods=["POST"])
+@require_auth(roles=("customer",))
 def create_checkout_session():
     data = request.get_json()
     payment_intent_id = data.get("payment_intent_id")
@@ -97,7 +101,10 @@ def create_checkout_session():
                 "show_line_items": True,
                 "payment_method_types": ["gcash"],
                 "line_items": line_items,
-                "metadata": {"cart": json.dumps(cart_metadata)}  # <-- important
+                "metadata": {  # <-- important
+                    "cart": json.dumps(cart_metadata),
+                    "user_id": str(g.current_user.id)
+                }
             }
         }
     }
@@ -129,58 +136,66 @@ def paymongo_webhook():
     event_type = payload.get("data", {}).get("attributes", {}).get("type", "")
 
     if event_type == "checkout_session.payment.paid":
-        session_id = payload["data"]["id"]
+        event_id = payload["data"]["id"]
+        session = payload["data"]["attributes"].get("data", {})
+        session_id = session.get("id") or event_id
         print(f"Payment successful for checkout session: {session_id}")
 
+        # Redelivered webhook → the sale was already recorded, replay it
+        processed = IdempotencyService.processed_event(session_id)
+        if processed:
+            return jsonify({
+                "status": "success",
+                "transaction_id": processed.transaction_id,
+                "duplicate": True
+            }), 200
+
         # Extract metadata cart
-        session_data = payload["data"]["attributes"].get("data", {}).get("attributes", {})
+        session_data = session.get("attributes", {})
         metadata = session_data.get("metadata", {})
         cart_json = metadata.get("cart", "[]")
         cart_items = json.loads(cart_json)
 
+        # sessions created before user_id was added to the metadata cannot
+        # be attributed to a customer
         try:
-            # Create sales transaction
-            transaction = SalesTransaction()
-            db.session.add(transaction)
-            db.session.flush()  # get transaction.id
-
-            # Process each cart item
-            for cart_item in cart_items:
-                barcode = cart_item["barcode"]
-                quantity = cart_item.get("quantity", 1)
-
-                item = Item.query.filter_by(barcode=barcode).first()
-                if not item:
-                    raise Exception(f"Item not found: {barcode}")
-
-                if item.quantity < quantity:
-                    raise Exception(f"Insufficient stock for {item.name}")
-
-                # Create transaction item
-                tx_item = SalesTransactionItem(
-                    transaction_id=transaction.id,
-                    item_id=item.id,
-                    quantity=quantity,
-                    price_at_sale=item.price
-                )
-                db.session.add(tx_item)
-
-                # Update inventory
-                item.quantity -= quantity
-
-                print(
-                    f"Sold {quantity}x {item.name} | Remaining stock: {item.quantity}"
-                )
-
-            # Commit everything once
-            db.session.commit()
-            print(f"Sales transaction {transaction.id} recorded successfully")
+            user_id = int(metadata.get("user_id"))
+        except (TypeError, ValueError):
+            print(f"Checkout session {session_id} has no user_id in its metadata")
+            return jsonify({"error": "Missing user_id in checkout metadata"}), 400
+
+        try:
+            # Deduct stock + record the sale + mark the session processed
+            # in one DB transaction
+            transaction = CheckoutService.checkout(
+                user_id,
+                [
+                    {"barcode": c["barcode"], "quantity": c.get("quantity", 1)}
+                    for c in cart_items
+                ],
+                key="barcode"
+            )
+            IdempotencyService.mark_processed(session_id, event_id, transaction.id)
 
         except Exception as e:
             db.session.rollback()
             print("Payment processing failed:", str(e))
             return jsonify({"error": str(e)}), 500
 
+        if not IdempotencyService.commit():
+            # a concurrent delivery of the same session won
+            processed = IdempotencyService.processed_event(session_id)
+            if not processed:
+                return jsonify({"error": "Failed to record payment"}), 500
+            return jsonify({
+                "status": "success",
+                "transaction_id": processed.transaction_id,
+                "duplicate": True
+            }), 200
+
+        print(f"Sales transaction {transaction.id} recorded successfully")
+        return jsonify({"status": "success", "transaction_id": transaction.id}), 200
+
     return jsonify({"status": "success"}), 200
 
 
@@ -1,7 +1,10 @@
 from flask import Blueprint, jsonify
 from ml.recommender.inference import recommend_for_user
 # from utils.auth_restrict import require_auth
+from db import db
+from models.item import Item
 from models.user import User
+from utils.projection import columns, dump, parse_fields
 from ml.recommender.trainer import retrain_model
 from flask import current_app
 
@@ -9,21 +12,30 @@ recommendations_bp = Blueprint("recommendations_bp", __name__)
 
 _training_in_progress = False
 
+# ?fields= projection for recommended items
+RECOMMENDED_ITEM_FIELDS = {
+    "id": (Item.id, None),
+    "name": (Item.name, None),
+    "category": (Item.category, None),
+    "price": (Item.price, float),
+}
+
+
 # GET recommendations for a SINGLE user
 @recommendations_bp.route("/recommendations/<int:user_id>", methods=["GET"])
 # @require_auth()
 def get_recommendations(user_id):
-    items = recommend_for_user(user_id)
+    try:
+        fields = parse_fields(RECOMMENDED_ITEM_FIELDS)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    items = recommend_for_user(user_id, item_columns=columns(RECOMMENDED_ITEM_FIELDS, fields, Item.id))
 
     return jsonify({
         "user_id": user_id,
         "recommendations": [
-            {
-                "id": i.id,
-                "name": i.name,
-                "category": i.category,
-                "price": float(i.price)
-            }
+            dump(i, RECOMMENDED_ITEM_FIELDS, fields)
             for i in items
         ]
     }), 200
@@ -32,24 +44,26 @@ def get_recommendations(user_id):
 @recommendations_bp.route("/recommendations", methods=["GET"])
 # @require_auth()
 def get_all_recommendations():
-    users = User.query.all()
+    try:
+        fields = parse_fields(RECOMMENDED_ITEM_FIELDS)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    users = db.session.query(User.id).all()
     if not users:
         return jsonify({"message": "No users found"}), 200
 
     all_recommendations = []
+    # id is always selected: it restores the ranking order
+    item_columns = columns(RECOMMENDED_ITEM_FIELDS, fields, Item.id)
 
     for user in users:
-        items = recommend_for_user(user.id)
+        items = recommend_for_user(user.id, item_columns=item_columns)
 
         all_recommendations.append({
             "user_id": user.id,
             "recommendations": [
-                {
-                    "id": i.id,
-                    "name": i.name,
-                    "category": i.category,
-                    "price": float(i.price)
-                }
+                dump(i, RECOMMENDED_ITEM_FIELDS, fields)
                 for i in items
             ]
         })
@@ -1,78 +1,312 @@
-from flask import Blueprint, jsonify, request, g
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from flask import Blueprint, Response, jsonify, request, g, stream_with_context
+from sqlalchemy import tuple_
 from db import db
 
 from models.sales_transaction import SalesTransaction
 from models.sales_transaction_item import SalesTransactionItem
 from models.item import Item
-
-# from utils.auth_restrict import require_auth
+from services.batch_sync_service import BatchSyncError, BatchSyncService
+from services.checkout_service import CheckoutService, CheckoutError
+from services.sale_detail_service import SaleDetailService, lines_by_transaction
+from services.sales_analytics_service import SalesAnalyticsService
+from services.sales_export_service import EXPORT_FORMATS, SalesExportService
+from services.idempotency_service import (
+    MAX_KEY_LENGTH, IdempotencyConflict, IdempotencyService
+)
+from utils.date_range import parse_date_range
+from utils.item_validation import CATEGORY_SET, invalid_category_message
+from utils.pagination import InvalidCursor, decode_cursor, encode_cursor, parse_page_size
+from utils.projection import columns, dump, parse_fields
+
+from utils.auth_restrict import require_auth
 
 sales_bp = Blueprint("sales", __name__)
 
+# customer purchase history pages are small (receipt list on a phone)
+MINE_PAGE_SIZE = 20
+MINE_MAX_PAGE_SIZE = 100
+
+# ?fields= projection for the listing ("items" = nested sale lines)
+SALE_FIELDS = {
+    "transaction_id": (SalesTransaction.id, None),
+    "date": (SalesTransaction.date, lambda d: d.isoformat()),
+    "user_id": (SalesTransaction.user_id, None),
+    "total_amount": (SalesTransaction.total_amount, float),
+    "line_count": (SalesTransaction.line_count, None),
+    "items": (None, None),
+}
+
+# ?sort= → keyset column (always paired with id, newest / largest first)
+SALE_SORTS = {
+    "date": SalesTransaction.date,
+    "total": SalesTransaction.total_amount,
+}
+
+
+def _parse_amount(raw, name):
+    try:
+        return Decimal(raw)
+    except (InvalidOperation, TypeError):
+        raise ValueError(f"{name} must be a number")
+
+
 # --------------------------------------------------
 # 🔵 GET all transactions (ADMIN ONLY)
+# keyset-paginated on (date, id) — or (total_amount, id) with ?sort=total —
+# newest / largest first
+# ?limit=&cursor=&sort=&from=&to=&user_id=&category=&min_total=&max_total=&fields=
+# → {"transactions": [...], "next_cursor": ...}   (always 2 queries)
 # --------------------------------------------------
 @sales_bp.route("/", methods=["GET"])
 # @require_auth(roles=("admin",))
 def get_all_transactions():
+    try:
+        fields = parse_fields(SALE_FIELDS)
+        limit = parse_page_size(request.args.get("limit"))
+        start, end = parse_date_range(request.args)
+        user_id = request.args.get("user_id", type=int)
+        category = request.args.get("category")
+        if category and category not in CATEGORY_SET:
+            raise ValueError(invalid_category_message())
+        sort = request.args.get("sort", "date")
+        if sort not in SALE_SORTS:
+            raise ValueError(f"sort must be one of: {', '.join(SALE_SORTS)}")
+        sort_column = SALE_SORTS[sort]
+
+        query = db.session.query(
+            *columns(SALE_FIELDS, fields, SalesTransaction.id, sort_column)
+        )
+
+        if start:
+            query = query.filter(SalesTransaction.date >= start)
+        if end:
+            query = query.filter(SalesTransaction.date < end)
+        if user_id is not None:
+            query = query.filter(SalesTransaction.user_id == user_id)
+        if request.args.get("min_total"):
+            query = query.filter(
+                SalesTransaction.total_amount >= _parse_amount(request.args["min_total"], "min_total")
+            )
+        if request.args.get("max_total"):
+            query = query.filter(
+                SalesTransaction.total_amount <= _parse_amount(request.args["max_total"], "max_total")
+            )
+        if category:
+            query = query.filter(
+                db.session.query(SalesTransactionItem.id)
+                .join(Item, Item.id == SalesTransactionItem.item_id)
+                .filter(
+                    SalesTransactionItem.transaction_id == SalesTransaction.id,
+                    Item.category == category
+                )
+                .exists()
+            )
+
+        cursor = request.args.get("cursor")
+        if cursor:
+            last_key, last_id = decode_cursor(cursor, 2)
+            last_key = (
+                datetime.fromisoformat(last_key) if sort == "date" else Decimal(last_key)
+            )
+            query = query.filter(
+                tuple_(sort_column, SalesTransaction.id) < tuple_(last_key, last_id)
+            )
+    except (InvalidCursor, InvalidOperation, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+
+    # one extra row tells us whether there is a next page
     transactions = (
-        SalesTransaction.query
-        .order_by(SalesTransaction.date.desc())
+        query
+        .order_by(sort_column.desc(), SalesTransaction.id.desc())
+        .limit(limit + 1)
         .all()
     )
+    has_more = len(transactions) > limit
+    transactions = transactions[:limit]
 
-    return jsonify([
-        {
+    lines = (
+        lines_by_transaction([t.id for t in transactions])
+        if "items" in fields and transactions else {}
+    )
+
+    result = []
+    for t in transactions:
+        data = dump(t, SALE_FIELDS, fields)
+        if "items" in fields:
+            data["items"] = lines.get(t.id, [])
+        result.append(data)
+
+    next_cursor = None
+    if has_more:
+        last = transactions[-1]
+        next_cursor = encode_cursor(
+            last.date.isoformat() if sort == "date" else str(last.total_amount),
+            last.id
+        )
+    return jsonify({
+        "transactions": result,
+        "next_cursor": next_cursor
+    }), 200
+
+
+# --------------------------------------------------
+# 🟢 GET my purchases (CUSTOMER)
+# keyset on (date, id) desc within ONE user — a backward scan of
+# ix_sales_transactions_user_date, never the global list; totals come from
+# the denormalized columns, lines only for the item list
+# ?limit=&cursor= → {"transactions": [...], "next_cursor": ...}
+# --------------------------------------------------
+@sales_bp.route("/mine", methods=["GET"])
+@require_auth(roles=("customer",))
+def my_transactions():
+    try:
+        limit = parse_page_size(
+            request.args.get("limit"), default=MINE_PAGE_SIZE, maximum=MINE_MAX_PAGE_SIZE
+        )
+        query = (
+            db.session.query(
+                SalesTransaction.id,
+                SalesTransaction.date,
+                SalesTransaction.total_amount,
+                SalesTransaction.line_count,
+            )
+            .filter(SalesTransaction.user_id == g.current_user.id)
+        )
+
+        cursor = request.args.get("cursor")
+        if cursor:
+            last_date, last_id = decode_cursor(cursor, 2)
+            query = query.filter(
+                tuple_(SalesTransaction.date, SalesTransaction.id)
+                < tuple_(datetime.fromisoformat(last_date), last_id)
+            )
+    except (InvalidCursor, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+
+    transactions = (
+        query
+        .order_by(SalesTransaction.date.desc(), SalesTransaction.id.desc())
+        .limit(limit + 1)
+        .all()
+    )
+    has_more = len(transactions) > limit
+    transactions = transactions[:limit]
+
+    lines = lines_by_transaction([t.id for t in transactions]) if transactions else {}
+
+    result = []
+    for t in transactions:
+        items = [
+            {
+                "item_id": line["item_id"],
+                "item_name": line["item_name"],
+                "quantity": line["quantity"],
+                "price_at_sale": line["price_at_sale"],
+            }
+            for line in lines.get(t.id, [])
+        ]
+        result.append({
             "transaction_id": t.id,
             "date": t.date.isoformat(),
-            "user_id": t.user.id,
-            "items": [
-                {
-                    "item_id": ti.item_id,
-                    "item_name": ti.item.name,
-                    "category": ti.item.category,
-                    "quantity": ti.quantity,
-                    "price_at_sale": float(ti.price_at_sale)
-                }
-                for ti in t.items
-            ]
-        }
-        for t in transactions
-    ]), 200
+            "units": sum(i["quantity"] for i in items),
+            "total": float(t.total_amount),
+            "line_count": t.line_count,
+            "items": items,
+        })
+
+    last = transactions[-1] if transactions else None
+    return jsonify({
+        "transactions": result,
+        "next_cursor": (
+            encode_cursor(last.date.isoformat(), last.id) if has_more else None
+        )
+    }), 200
+
+
+# --------------------------------------------------
+# 🔵 SALES ANALYTICS (ADMIN ONLY)
+# ?group_by=day|hour|weekday|category|item&from=&to=
+# units + revenue per bucket, grouped in SQL (PH time), memoized
+# --------------------------------------------------
+@sales_bp.route("/analytics", methods=["GET"])
+# @require_auth(roles=("admin",))
+def sales_analytics():
+    try:
+        start, end = parse_date_range(request.args)
+        report = SalesAnalyticsService.report(
+            request.args.get("group_by", "day"), start, end
+        )
+        return jsonify(report), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+# --------------------------------------------------
+# 🔵 EXPORT sale lines (ADMIN ONLY)
+# ?from=&to=&format=csv|ndjson, gzip with ?gzip=1 or Accept-Encoding: gzip
+# streamed — constant memory for any number of lines
+# --------------------------------------------------
+@sales_bp.route("/export", methods=["GET"])
+# @require_auth(roles=("admin",))
+def export_transactions():
+    try:
+        start, end = parse_date_range(request.args)
+        fmt = request.args.get("format", "csv")
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"format must be one of: {', '.join(EXPORT_FORMATS)}")
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    # ?gzip=1 → a .gz download; Accept-Encoding: gzip → transparent encoding
+    as_file = request.args.get("gzip", "").lower() in ("1", "true")
+    encoded = not as_file and "gzip" in request.accept_encodings
+
+    resp = Response(
+        stream_with_context(
+            SalesExportService.stream(start, end, fmt, compress=as_file or encoded)
+        ),
+        mimetype="application/gzip" if as_file else EXPORT_FORMATS[fmt]
+    )
+    if encoded:
+        resp.headers["Content-Encoding"] = "gzip"
+    resp.headers["Vary"] = "Accept-Encoding"
+    resp.headers["Content-Disposition"] = (
+        f'attachment; filename="sales.{fmt}{".gz" if as_file else ""}"'
+    )
+    return resp
 
 
 # --------------------------------------------------
 # 🔵 GET single transaction (ADMIN ONLY)
+# cached payload + ETag (If-None-Match → 304)
 # --------------------------------------------------
 @sales_bp.route("/<int:id>", methods=["GET"])
 # @require_auth(roles=("admin",))
 def get_transaction(id):
-    t = SalesTransaction.query.get(id)
-    if not t:
+    # receipts are served from an in-process cache (SaleDetailService)
+    found = SaleDetailService.get(id)
+    if not found:
         return jsonify({"error": "Transaction not found"}), 404
 
-    return jsonify({
-        "transaction_id": t.id,
-        "date": t.date.isoformat(),
-        "user_id": t.user.id,
-        "items": [
-            {
-                "item_id": ti.item_id,
-                "item_name": ti.item.name,
-                "category": ti.item.category,
-                "quantity": ti.quantity,
-                "price_at_sale": float(ti.price_at_sale)
-            }
-            for ti in t.items
-        ]
-    }), 200
+    payload, etag = found
+    if request.if_none_match.contains(etag):
+        resp = Response(status=304)
+    else:
+        resp = jsonify(payload)
+    resp.set_etag(etag)
+    return resp
 
 
 # --------------------------------------------------
 # 🟢 CREATE transaction (ANY AUTHENTICATED USER)
 # --------------------------------------------------
 @sales_bp.route("/", methods=["POST"])
-# @require_auth()   # ✅ FIXED
+@require_auth()
 def create_transaction():
     data = request.get_json() or {}
     cart_items = data.get("items", [])
@@ -80,38 +314,75 @@ def create_transaction():
     if not cart_items:
         return jsonify({"error": "No items provided"}), 400
 
-    transaction = SalesTransaction(user_id=g.current_user.id)
-    db.session.add(transaction)
+    # retried POSTs with the same Idempotency-Key replay the first response
+    key = request.headers.get("Idempotency-Key")
+    if key is not None:
+        key = key.strip()
+        if not key or len(key) > MAX_KEY_LENGTH:
+            return jsonify({
+                "error": f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters"
+            }), 400
+        try:
+            stored = IdempotencyService.replay(g.current_user.id, key, data)
+        except IdempotencyConflict as e:
+            return jsonify({"error": str(e)}), 422
+        if stored:
+            return _replayed(*stored)
+
+    try:
+        transaction = CheckoutService.checkout(g.current_user.id, cart_items)
+    except CheckoutError as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 400
+
+    body = {
+        "message": "Transaction recorded",
+        "transaction_id": transaction.id
+    }
+    if key is None:
+        db.session.commit()
+        return jsonify(body), 201
 
-    for entry in cart_items:
-        item_id = entry.get("item_id")
-        qty = entry.get("quantity")
+    IdempotencyService.remember(g.current_user.id, key, data, 201, body)
+    if not IdempotencyService.commit():
+        # a concurrent retry with the same key committed first
+        stored = IdempotencyService.replay(g.current_user.id, key, data)
+        if not stored:
+            return jsonify({"error": "Failed to record transaction"}), 500
+        return _replayed(*stored)
 
-        if not item_id or not qty:
-            return jsonify({"error": "item_id and quantity required"}), 400
+    return jsonify(body), 201
 
-        item = Item.query.get(item_id)
-        if not item:
-            return jsonify({"error": f"Item {item_id} not found"}), 400
 
-        if item.quantity < qty:
-            return jsonify({"error": f"Not enough stock for {item.name}"}), 400
+def _replayed(status_code, body):
+    response = jsonify(body)
+    response.status_code = status_code
+    response.headers["Idempotent-Replayed"] = "true"
+    return response
 
-        item.quantity -= qty
 
-        db.session.add(SalesTransactionItem(
-            transaction=transaction,
-            item=item,
-            quantity=qty,
-            price_at_sale=item.price
-        ))
+# --------------------------------------------------
+# 🟢 BATCH SYNC from offline POS terminals
+# {"transactions": [{"client_id", "date"?, "items": [...]}, ...]}
+# → per-sale outcome: created | duplicate | rejected (one commit)
+# --------------------------------------------------
+@sales_bp.route("/batch", methods=["POST"])
+@require_auth()
+def sync_transactions():
+    data = request.get_json(silent=True) or {}
 
-    db.session.commit()
+    try:
+        results = BatchSyncService.sync(g.current_user.id, data.get("transactions"))
+    except BatchSyncError as e:
+        return jsonify({"error": str(e)}), 400
+    except CheckoutError as e:
+        return jsonify({"error": str(e)}), 409
 
-    return jsonify({
-        "message": "Transaction recorded",
-        "transaction_id": transaction.id
-    }), 201
+    counts = {"created": 0, "duplicate": 0, "rejected": 0}
+    for result in results:
+        counts[result["status"]] += 1
+
+    return jsonify({"results": results, **counts}), 200
 
 
 # --------------------------------------------------
@@ -120,7 +391,7 @@ def create_transaction():
 @sales_bp.route("/<int:id>", methods=["PUT"])
 # @require_auth(roles=("admin",))
 def update_transaction(id):
-    t = SalesTransaction.query.get(id)
+    t = db.session.get(SalesTransaction, id, with_for_update=True)
     if not t:
         return jsonify({"error": "Transaction not found"}), 404
 
@@ -130,29 +401,13 @@ def update_transaction(id):
     if not new_items:
         return jsonify({"error": "No items provided"}), 400
 
-    for ti in t.items:
-        ti.item.quantity += ti.quantity
+    try:
+        CheckoutService.revise(t, new_items)
+        db.session.commit()
+    except CheckoutError as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 400
 
-    SalesTransactionItem.query.filter_by(transaction_id=t.id).delete()
-
-    for entry in new_items:
-        item_id = entry.get("item_id")
-        qty = entry.get("quantity")
-
-        item = Item.query.get(item_id)
-        if not item or item.quantity < qty:
-            return jsonify({"error": "Invalid item or insufficient stock"}), 400
-
-        item.quantity -= qty
-
-        db.session.add(SalesTransactionItem(
-            transaction=t,
-            item=item,
-            quantity=qty,
-            price_at_sale=item.price
-        ))
-
-    db.session.commit()
     return jsonify({"message": "Transaction updated"}), 200
 
 
@@ -162,14 +417,11 @@ def update_transaction(id):
 @sales_bp.route("/<int:id>", methods=["DELETE"])
 # @require_auth(roles=("admin",))
 def delete_transaction(id):
-    t = SalesTransaction.query.get(id)
+    t = db.session.get(SalesTransaction, id, with_for_update=True)
     if not t:
         return jsonify({"error": "Transaction not found"}), 404
 
-    for ti in t.items:
-        ti.item.quantity += ti.quantity
-
-    db.session.delete(t)
+    CheckoutService.void(t)
     db.session.commit()
 
     return jsonify({"message": "Transaction deleted"}), 200
@@ -1,15 +1,19 @@
 # routes/users.py
 # FULL FILE — COOKIE AUTH + ACCESS + REFRESH TOKENS (PRODUCTION READY)
+# refresh tokens are per-device sessions (see services/session_service.py)
 
 from flask import Blueprint, request, jsonify, make_response, g
-from werkzeug.security import generate_password_hash, check_password_hash
 from db import db
 from datetime import datetime, timedelta
 from models.user import User
+from services.password_service import PasswordService, PasswordPoolBusy
+from services.session_service import SessionService
+from services.user_cache_service import UserCacheService
 import jwt
 
 # ✅ IMPORT THE SHARED AUTH DECORATOR
 from utils.auth_restrict import require_auth
+from utils.projection import columns, dump, parse_fields
 
 user_routes = Blueprint("user_routes", __name__)
 
@@ -18,7 +22,6 @@ user_routes = Blueprint("user_routes", __name__)
 # --------------------------------------------------
 JWT_SECRET = "super-secret"
 ACCESS_EXPIRES = timedelta(minutes=15)
-REFRESH_EXPIRES = timedelta(days=7)
 
 # ✅ REQUIRED FOR VERCEL / SAFARI / IOS
 COOKIE_KWARGS = dict(
@@ -28,15 +31,27 @@ COOKIE_KWARGS = dict(
     path="/"           # 🔥 IMPORTANT
 )
 
+# seconds a client should wait when password hashing is saturated
+BUSY_RETRY_AFTER = 2
+
+
+def busy(e):
+    resp = jsonify({"error": str(e)})
+    resp.headers["Retry-After"] = str(BUSY_RETRY_AFTER)
+    return resp, 503
+
 # --------------------------------------------------
-# TOKEN CREATOR
+# ACCESS TOKEN CREATOR
 # --------------------------------------------------
-def create_token(user_id, token_type="access"):
+def create_token(user):
     payload = {
-        "user_id": user_id,
-        "type": token_type,
-        "exp": datetime.utcnow()
-        + (ACCESS_EXPIRES if token_type == "access" else REFRESH_EXPIRES),
+        "user_id": user.id,
+        "type": "access",
+        # ✅ lets require_auth authorize without loading the user;
+        # bumping users.token_version revokes the token
+        "role": user.role,
+        "tv": user.token_version,
+        "exp": datetime.utcnow() + ACCESS_EXPIRES,
     }
     return jwt.encode(payload, JWT_SECRET, algorithm="HS256")
 
@@ -69,20 +84,26 @@ def me_customer():
 # --------------------------------------------------
 # USERS CRUD
 # --------------------------------------------------
+# ?fields= projection for the listing
+USER_FIELDS = {
+    "id": (User.id, None),
+    "username": (User.username, None),
+    "role": (User.role, None),
+    "created_at": (User.created_at, None),
+    "updated_at": (User.updated_at, None),
+}
+
+
 @user_routes.route("", methods=["GET"])
 @user_routes.route("/", methods=["GET"])
 def get_users():
-    users = User.query.all()
-    return jsonify([
-        {
-            "id": u.id,
-            "username": u.username,
-            "role": u.role,
-            "created_at": u.created_at,
-            "updated_at": u.updated_at,
-        }
-        for u in users
-    ]), 200
+    try:
+        fields = parse_fields(USER_FIELDS)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    users = db.session.query(*columns(USER_FIELDS, fields)).all()
+    return jsonify([dump(u, USER_FIELDS, fields) for u in users]), 200
 
 
 @user_routes.route("/<int:id>", methods=["GET"])
@@ -111,9 +132,14 @@ def create_user():
     if User.query.filter_by(username=data["username"]).first():
         return jsonify({"error": "username exists"}), 400
 
+    try:
+        password = PasswordService.hash(data["password"])
+    except PasswordPoolBusy as e:
+        return busy(e)
+
     user = User(
         username=data["username"],
-        password=generate_password_hash(data["password"]),
+        password=password,
         role=data.get("role", "customer"),
     )
 
@@ -130,13 +156,29 @@ def login():
     data = request.json or {}
 
     user = User.query.filter_by(username=data.get("username")).first()
-    if not user or not check_password_hash(user.password, data.get("password")):
+    if not user:
         return jsonify({"error": "invalid credentials"}), 401
 
-    access_token = create_token(user.id, "access")
-    refresh_token = create_token(user.id, "refresh")
+    # ✅ hashed in the password pool, never on this thread
+    try:
+        ok, new_hash = PasswordService.verify(user.password, data.get("password"))
+    except PasswordPoolBusy as e:
+        return busy(e)
+    if not ok:
+        return jsonify({"error": "invalid credentials"}), 401
 
-    user.refresh_token = refresh_token
+    # ✅ stored with older cost parameters: upgrade (same commit as the login)
+    if new_hash:
+        user.password = new_hash
+
+    access_token = create_token(user)
+    # ✅ one session per device: other devices stay logged in
+    refresh_token = SessionService.create(
+        user.id,
+        device_name=data.get("device_name"),
+        user_agent=request.headers.get("User-Agent"),
+        ip_address=request.remote_addr,
+    )
     db.session.commit()
 
     resp = make_response(jsonify({
@@ -162,9 +204,14 @@ def register():
     if User.query.filter_by(username=data["username"]).first():
         return jsonify({"error": "Username already exists"}), 409
 
+    try:
+        password = PasswordService.hash(data["password"])
+    except PasswordPoolBusy as e:
+        return busy(e)
+
     user = User(
         username=data["username"],
-        password=generate_password_hash(data["password"]),
+        password=password,
         role="customer"
     )
 
@@ -182,24 +229,21 @@ def refresh():
     if not token:
         return jsonify({"error": "no refresh token"}), 401
 
-    try:
-        payload = jwt.decode(token, JWT_SECRET, algorithms=["HS256"])
-
-        if payload["type"] != "refresh":
-            return jsonify({"error": "invalid token type"}), 401
-
-        user = User.query.get(payload["user_id"])
-        if not user or user.refresh_token != token:
-            return jsonify({"error": "invalid refresh"}), 401
+    # ✅ one indexed lookup on the token hash
+    user_id = SessionService.refresh(token)
+    db.session.commit()
 
-        new_access = create_token(user.id, "access")
+    # ✅ fresh from the DB: a token minted from a stale cached role /
+    # token_version would be rejected by require_auth right away
+    user = UserCacheService.load(user_id) if user_id is not None else None
+    if not user:
+        return jsonify({"error": "invalid refresh"}), 401
 
-        resp = make_response(jsonify({"message": "token refreshed"}))
-        resp.set_cookie("access_token", new_access, **COOKIE_KWARGS)
-        return resp, 200
+    new_access = create_token(user)
 
-    except jwt.InvalidTokenError:
-        return jsonify({"error": "invalid refresh token"}), 401
+    resp = make_response(jsonify({"message": "token refreshed"}))
+    resp.set_cookie("access_token", new_access, **COOKIE_KWARGS)
+    return resp, 200
 
 # --------------------------------------------------
 # LOGOUT
@@ -209,14 +253,9 @@ def logout():
     refresh_token = request.cookies.get("refresh_token")
 
     if refresh_token:
-        try:
-            payload = jwt.decode(refresh_token, JWT_SECRET, algorithms=["HS256"])
-            user = User.query.get(payload.get("user_id"))
-            if user and user.refresh_token == refresh_token:
-                user.refresh_token = None
-                db.session.commit()
-        except jwt.InvalidTokenError:
-            pass
+        # ✅ ends this device's session only (one indexed delete)
+        if SessionService.revoke(refresh_token) is not None:
+            db.session.commit()
 
     resp = make_response(jsonify({"message": "logged out"}))
     resp.delete_cookie("access_token", **COOKIE_KWARGS)
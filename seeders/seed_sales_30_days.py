@@ -8,6 +8,8 @@ from app import app
 from db import db
 from models.sales_transaction import SalesTransaction
 from models.sales_transaction_item import SalesTransactionItem
+from services.sales_rollup_service import SalesRollupService
+from services.sales_totals_service import SalesTotalsService
 from models.item import Item
 from models.user import User
 
@@ -82,5 +84,9 @@ def seed_sales_30_days(clear_existing=False):
         print(f"✅ Sales seeded for {DAYS_BACK} days")
         print(f"📊 Transactions: {total_transactions}")
 
+        # seeded lines bypass checkout → recompute the daily rollup + totals
+        SalesRollupService.rebuild()
+        SalesTotalsService.backfill()
+
 if __name__ == "__main__":
     seed_sales_30_days(clear_existing=False)
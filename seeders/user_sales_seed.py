@@ -7,6 +7,8 @@ from models.user import User
 from models.item import Item
 from models.sales_transaction import SalesTransaction
 from models.sales_transaction_item import SalesTransactionItem
+from services.sales_rollup_service import SalesRollupService
+from services.sales_totals_service import SalesTotalsService
 
 DAYS_BACK = 30
 MIN_TRANSACTIONS = 10
@@ -50,5 +52,9 @@ def seed_user_sales(clear_existing=False):
         db.session.commit()
         print("User sales seeded")
 
+        # seeded lines bypass checkout → recompute the daily rollup + totals
+        SalesRollupService.rebuild()
+        SalesTotalsService.backfill()
+
 if __name__ == "__main__":
     seed_user_sales(clear_existing=False)
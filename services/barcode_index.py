@@ -0,0 +1,198 @@
+# services/barcode_index.py
+# PER-WORKER BARCODE → ITEM INDEX (hot path for POS scans)
+#
+# - warmed once per process, then read without touching the DB
+# - entries are invalidated through CatalogService.on_items_changed: by the
+#   local after-commit hook (this worker, immediately) and by item_changes
+#   NOTIFYs from other workers / nodes (services/notification_listener.py)
+# - re-warmed each time the notification listener (re)subscribes
+# - every entry also expires after MAX_AGE seconds (UNLISTENED_MAX_AGE when
+#   the listener is down), which bounds staleness if a notification is lost
+
+import os
+import sys
+import threading
+import time
+
+from db import db
+from models.item import Item
+from services.catalog_service import CatalogService
+from services.notification_listener import notification_listener
+
+# staleness bound while NOTIFYs are flowing / while they are not
+MAX_AGE = float(os.getenv("BARCODE_INDEX_MAX_AGE", 300))
+UNLISTENED_MAX_AGE = float(os.getenv("BARCODE_INDEX_UNLISTENED_MAX_AGE", 5))
+
+# entry layout (plain tuple keeps per-item overhead small)
+_ID, _NAME, _QTY, _CATEGORY, _PRICE, _BARCODE, _LOADED_AT = range(7)
+
+
+def _entry(row, now):
+    return (
+        row.id,
+        row.name,
+        row.quantity,
+        sys.intern(row.category),
+        float(row.price),
+        row.barcode,
+        now,
+    )
+
+
+class BarcodeIndex:
+
+    def __init__(self, max_age=MAX_AGE, unlistened_max_age=UNLISTENED_MAX_AGE):
+        self.max_age = max_age
+        self.unlistened_max_age = unlistened_max_age
+        self._by_barcode = {}
+        self._barcode_by_id = {}
+        self._lock = threading.Lock()
+        # bumped on every invalidation so a row read concurrently with a
+        # change is not stored after the fact
+        self._generation = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.invalidations = 0
+        self.warmed_at = None
+
+    # -----------------------
+    # SETUP
+    # -----------------------
+    def init_app(self, app):
+        CatalogService.on_items_changed(self.invalidate)
+        # on Postgres the listener warms right after it subscribes
+        notification_listener.on_connect(self.warm)
+
+        try:
+            with app.app_context():
+                if db.engine.dialect.name != "postgresql":
+                    self.warm()
+        except Exception as e:
+            # DB not reachable yet — the index fills lazily instead
+            print("WARNING: barcode index warm-up failed:", e)
+
+    def warm(self):
+        generation = self._generation
+        now = time.monotonic()
+        by_barcode = {}
+        barcode_by_id = {}
+
+        rows = (
+            db.session.query(
+                Item.id, Item.name, Item.quantity,
+                Item.category, Item.price, Item.barcode
+            )
+            .execution_options(yield_per=5000)
+        )
+        for row in rows:
+            by_barcode[row.barcode] = _entry(row, now)
+            barcode_by_id[row.id] = row.barcode
+
+        with self._lock:
+            if generation != self._generation:
+                # items changed while loading: some rows may be stale, so
+                # start empty and fill lazily instead
+                self._by_barcode = {}
+                self._barcode_by_id = {}
+                return
+            self._by_barcode = by_barcode
+            self._barcode_by_id = barcode_by_id
+            self.warmed_at = time.time()
+
+    # -----------------------
+    # READ PATH
+    # -----------------------
+    def lookup(self, barcode):
+        """
+        Return the item dict for a barcode, or None if no such item.
+        """
+        entry = self._by_barcode.get(barcode)
+        if entry is not None:
+            if time.monotonic() - entry[_LOADED_AT] <= self.current_max_age():
+                self.hits += 1
+                return self._to_dict(entry)
+            self.expired += 1
+
+        self.misses += 1
+        generation = self._generation
+        row = (
+            db.session.query(
+                Item.id, Item.name, Item.quantity,
+                Item.category, Item.price, Item.barcode
+            )
+            .filter(Item.barcode == barcode)
+            .first()
+        )
+        if not row:
+            return None
+
+        entry = _entry(row, time.monotonic())
+        with self._lock:
+            if generation != self._generation:
+                return self._to_dict(entry)
+            self._forget(row.id)
+            self._by_barcode[row.barcode] = entry
+            self._barcode_by_id[row.id] = row.barcode
+
+        return self._to_dict(entry)
+
+    def current_max_age(self):
+        return self.max_age if notification_listener.listening else self.unlistened_max_age
+
+    @staticmethod
+    def _to_dict(entry):
+        return {
+            "id": entry[_ID],
+            "name": entry[_NAME],
+            "quantity": entry[_QTY],
+            "category": entry[_CATEGORY],
+            "price": entry[_PRICE],
+            "barcode": entry[_BARCODE],
+        }
+
+    # -----------------------
+    # INVALIDATION
+    # -----------------------
+    def invalidate(self, item_ids):
+        with self._lock:
+            self._generation += 1
+            for item_id in item_ids:
+                self._forget(item_id)
+        self.invalidations += len(item_ids)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._by_barcode = {}
+            self._barcode_by_id = {}
+
+    def _forget(self, item_id):
+        # caller holds the lock
+        barcode = self._barcode_by_id.pop(item_id, None)
+        if barcode is not None:
+            self._by_barcode.pop(barcode, None)
+
+    # -----------------------
+    # OBSERVABILITY
+    # -----------------------
+    def stats(self):
+        now = time.monotonic()
+        entries = list(self._by_barcode.values())
+        oldest = max((now - e[_LOADED_AT] for e in entries), default=0.0)
+
+        return {
+            "entries": len(entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "invalidations": self.invalidations,
+            **notification_listener.stats(),
+            "oldest_entry_age_s": round(oldest, 3),
+            "max_age_s": self.current_max_age(),
+            "warmed_at": self.warmed_at,
+        }
+
+
+barcode_index = BarcodeIndex()
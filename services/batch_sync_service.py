@@ -0,0 +1,261 @@
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy import case, insert, update
+from sqlalchemy.exc import IntegrityError
+
+from db import db
+from models.idempotency_key import IdempotencyKey
+from models.item import Item
+from models.sales_transaction import PH_TZ, SalesTransaction, ph_now
+from models.sales_transaction_item import SalesTransactionItem
+from services.catalog_service import CatalogService
+from services.checkout_service import CheckoutError, CheckoutService
+from services.idempotency_service import MAX_KEY_LENGTH, request_fingerprint
+from services.sale_detail_service import SaleDetailService
+from services.sales_rollup_service import SalesRollupService
+
+MAX_BATCH_TRANSACTIONS = int(os.getenv("SALES_BATCH_MAX_TRANSACTIONS", 1000))
+
+# client ids share idempotency_keys with the Idempotency-Key header
+CLIENT_ID_PREFIX = "pos:"
+
+# terminal clocks drift; a sale "from the future" beyond this is rejected
+MAX_CLOCK_SKEW = timedelta(minutes=5)
+
+
+class BatchSyncError(Exception):
+    """
+    The batch as a whole is malformed (400).
+    """
+
+
+def _parse_sale_date(raw):
+    if raw is None:
+        return ph_now()
+    try:
+        parsed = datetime.fromisoformat(raw)
+    except (TypeError, ValueError):
+        raise CheckoutError("date must be an ISO datetime")
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(PH_TZ).replace(tzinfo=None)
+    if parsed > ph_now() + MAX_CLOCK_SKEW:
+        raise CheckoutError("date is in the future")
+    return parsed
+
+
+class BatchSyncService:
+    """
+    Offline POS upload: many sales with client-generated ids, one commit.
+
+    - every client id is looked up in ONE indexed query (idempotency_keys);
+      already-synced sales are reported as duplicates, not re-applied
+    - items are resolved and locked once, in id order; sales are accepted
+      in upload order while stock lasts, the rest are rejected individually
+    - ONE set-based UPDATE applies the net stock change per item, then the
+      transactions, their lines, the rollup and the client ids are
+      inserted in bulk
+    """
+
+    @staticmethod
+    def sync(user_id, transactions):
+        if not isinstance(transactions, list) or not transactions:
+            raise BatchSyncError("No transactions provided")
+        if len(transactions) > MAX_BATCH_TRANSACTIONS:
+            raise BatchSyncError(
+                f"At most {MAX_BATCH_TRANSACTIONS} transactions per batch"
+            )
+
+        try:
+            return BatchSyncService._apply(user_id, transactions)
+        except IntegrityError:
+            # a concurrent upload of the same client ids committed first:
+            # run again, its sales now show up as duplicates
+            db.session.rollback()
+            return BatchSyncService._apply(user_id, transactions)
+
+    @staticmethod
+    def _apply(user_id, transactions):
+        results = [None] * len(transactions)
+        parsed = []  # (index, client_id, fingerprint, sale_date, {item_id: qty})
+        seen = {}
+        repeats = []  # (index, index of the first copy)
+
+        for index, entry in enumerate(transactions):
+            client_id = entry.get("client_id") if isinstance(entry, dict) else None
+            if not isinstance(client_id, str) or not client_id.strip():
+                results[index] = _rejected(client_id, "client_id required")
+                continue
+            if len(CLIENT_ID_PREFIX + client_id) > MAX_KEY_LENGTH:
+                results[index] = _rejected(client_id, "client_id too long")
+                continue
+
+            fingerprint = request_fingerprint(entry)
+            if client_id in seen:
+                # the same sale queued twice on the terminal
+                first_index, first_fingerprint = seen[client_id]
+                if first_fingerprint == fingerprint:
+                    repeats.append((index, first_index))
+                else:
+                    results[index] = _rejected(client_id, "client_id reused for a different sale")
+                continue
+            seen[client_id] = (index, fingerprint)
+
+            try:
+                wanted = CheckoutService.normalize_cart(entry.get("items"))
+                sale_date = _parse_sale_date(entry.get("date"))
+            except CheckoutError as e:
+                results[index] = _rejected(client_id, str(e))
+                continue
+            parsed.append((index, client_id, fingerprint, sale_date, wanted))
+
+        # ---- already synced (one indexed lookup) ----
+        keys = {CLIENT_ID_PREFIX + p[1]: p for p in parsed}
+        stored = {}
+        if keys:
+            stored = {
+                row.key: row
+                for row in IdempotencyKey.query.filter(
+                    IdempotencyKey.user_id == user_id,
+                    IdempotencyKey.key.in_(list(keys))
+                )
+            }
+
+        pending = []
+        for key, (index, client_id, fingerprint, sale_date, wanted) in keys.items():
+            row = stored.get(key)
+            if row is None:
+                pending.append((index, client_id, fingerprint, sale_date, wanted))
+            elif row.request_hash != fingerprint:
+                results[index] = _rejected(client_id, "client_id reused for a different sale")
+            else:
+                results[index] = {
+                    "client_id": client_id,
+                    "status": "duplicate",
+                    "transaction_id": row.response.get("transaction_id"),
+                }
+        pending.sort(key=lambda p: p[0])
+
+        # ---- resolve + lock every item once, in id order ----
+        item_ids = {item_id for p in pending for item_id in p[4]}
+        items = {
+            r.id: r for r in (
+                db.session.query(Item.id, Item.name, Item.price, Item.quantity)
+                .filter(Item.id.in_(item_ids))
+                .order_by(Item.id)
+                .with_for_update()
+                .all()
+            )
+        } if item_ids else {}
+
+        available = {item_id: (r.quantity or 0) for item_id, r in items.items()}
+        accepted = []
+        for index, client_id, fingerprint, sale_date, wanted in pending:
+            missing = [item_id for item_id in wanted if item_id not in items]
+            if missing:
+                results[index] = _rejected(client_id, f"Item {missing[0]} not found")
+                continue
+            short = [item_id for item_id, qty in wanted.items() if available[item_id] < qty]
+            if short:
+                results[index] = _rejected(client_id, f"Not enough stock for {items[short[0]].name}")
+                continue
+            for item_id, qty in wanted.items():
+                available[item_id] -= qty
+            accepted.append((index, client_id, fingerprint, sale_date, wanted))
+
+        if not accepted:
+            db.session.rollback()
+            return _with_repeats(results, repeats)
+
+        # ---- one set-based stock UPDATE for the net change ----
+        net = {}
+        for *_, wanted in accepted:
+            for item_id, qty in wanted.items():
+                net[item_id] = net.get(item_id, 0) + qty
+
+        requested = case(net, value=Item.id)
+        updated = db.session.execute(
+            update(Item)
+            .where(Item.id.in_(list(net)), Item.quantity >= requested)
+            .values(quantity=Item.quantity - requested)
+            .returning(Item.id),
+            execution_options={"synchronize_session": False}
+        ).all()
+        if len(updated) != len(net):
+            # rows are locked, so this only happens if the lock was bypassed
+            db.session.rollback()
+            raise CheckoutError("Stock changed during sync, retry")
+
+        # ---- bulk inserts ----
+        transaction_ids = db.session.scalars(
+            insert(SalesTransaction).returning(SalesTransaction.id, sort_by_parameter_order=True),
+            [
+                {
+                    "user_id": user_id,
+                    "date": sale_date,
+                    "total_amount": sum(items[i].price * qty for i, qty in wanted.items()),
+                    "line_count": len(wanted),
+                }
+                for _, _, _, sale_date, wanted in accepted
+            ]
+        ).all()
+
+        db.session.execute(
+            insert(SalesTransactionItem),
+            [
+                {
+                    "transaction_id": transaction_id,
+                    "item_id": item_id,
+                    "quantity": qty,
+                    "price_at_sale": items[item_id].price,
+                }
+                for transaction_id, (*_, wanted) in zip(transaction_ids, accepted)
+                for item_id, qty in wanted.items()
+            ]
+        )
+
+        db.session.execute(
+            insert(IdempotencyKey),
+            [
+                {
+                    "user_id": user_id,
+                    "key": CLIENT_ID_PREFIX + client_id,
+                    "request_hash": fingerprint,
+                    "status_code": 201,
+                    "response": {"transaction_id": transaction_id},
+                    "created_at": datetime.utcnow(),
+                }
+                for transaction_id, (_, client_id, fingerprint, _, _) in zip(transaction_ids, accepted)
+            ]
+        )
+
+        SalesRollupService.record_many([
+            (sale_date, user_id, [(item_id, qty, items[item_id].price) for item_id, qty in wanted.items()])
+            for _, _, _, sale_date, wanted in accepted
+        ])
+        CatalogService.items_changed(net)
+        SaleDetailService.sales_changed(transaction_ids, notify=False)
+
+        db.session.commit()
+
+        for transaction_id, (index, client_id, *_) in zip(transaction_ids, accepted):
+            results[index] = {
+                "client_id": client_id,
+                "status": "created",
+                "transaction_id": transaction_id,
+            }
+        return _with_repeats(results, repeats)
+
+
+def _with_repeats(results, repeats):
+    # a sale queued twice in one batch shares the outcome of its first copy
+    for index, first_index in repeats:
+        first = results[first_index]
+        results[index] = (
+            {**first, "status": "duplicate"} if first["status"] != "rejected" else dict(first)
+        )
+    return results
+
+
+def _rejected(client_id, error):
+    return {"client_id": client_id, "status": "rejected", "error": error}
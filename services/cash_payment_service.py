@@ -1,8 +1,6 @@
 from db import db
-from models.sales_transaction import SalesTransaction
-from models.sales_transaction_item import SalesTransactionItem
-from models.item import Item
 from models.pending_cash_payment import PendingCashPayment
+from services.checkout_service import CheckoutService
 
 class CashPaymentService:
 
@@ -35,10 +33,11 @@ class CashPaymentService:
         """
         Confirm cash payment using ADMIN-GENERATED code.
         """
+        # row lock: two confirmations of the same code cannot both sell
         pending = PendingCashPayment.query.filter_by(
             code=code,
             status="PENDING"
-        ).first()
+        ).with_for_update().first()
 
         if not pending:
             existing = PendingCashPayment.query.filter_by(code=code).first()
@@ -49,46 +48,23 @@ class CashPaymentService:
                     raise Exception("This cash payment was cancelled.")
             raise Exception("Invalid cash code.")
 
-        # Mark payment as PAID
-        pending.status = "PAID"
-        db.session.commit()
-
-        # -----------------------------
-        # Create Sales Transaction
-        # -----------------------------
-        cart_items = pending.cart or []
+        cart_items = [
+            entry for entry in (pending.cart or [])
+            if entry.get("barcode") and entry.get("quantity")
+        ]
         if not cart_items:
             raise Exception("Pending payment cart is empty")
 
-        transaction = SalesTransaction(user_id=pending.user_id)
-        db.session.add(transaction)
-        db.session.flush()  # get transaction.id
-
-        for entry in cart_items:
-            barcode = entry.get("barcode")
-            qty = entry.get("quantity")
-
-            if not barcode or not qty:
-                continue
-
-            item = Item.query.filter_by(barcode=barcode).first()
-            if not item:
-                raise Exception(f"Item not found: {barcode}")
-
-            if item.quantity < qty:
-                raise Exception(f"Not enough stock for {item.name}")
-
-            # Deduct stock
-            item.quantity -= qty
-
-            transaction_item = SalesTransactionItem(
-                transaction_id=transaction.id,
-                item_id=item.id,
-                quantity=qty,
-                price_at_sale=item.price
+        # Mark PAID and record the sale in ONE transaction:
+        # if stock deduction fails nothing is committed
+        try:
+            pending.status = "PAID"
+            transaction = CheckoutService.checkout(
+                pending.user_id, cart_items, key="barcode"
             )
-            db.session.add(transaction_item)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
 
-        db.session.commit()
         return transaction.id
-    
\ No newline at end of file
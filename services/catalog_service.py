@@ -0,0 +1,159 @@
+import json
+import time
+
+from sqlalchemy import event, func, select, text, update
+from sqlalchemy.orm import Session
+
+from db import db
+from models.item import Item, catalog_version_seq
+from models.item_tombstone import ItemTombstone
+from services.notification_listener import notification_listener
+
+# Postgres NOTIFY channel every worker LISTENs on for item changes
+ITEM_CHANGES_CHANNEL = "item_changes"
+
+# keep NOTIFY payloads well under the 8000 byte limit
+NOTIFY_CHUNK_SIZE = 500
+
+# ids per UPDATE ... WHERE id IN (...) when stamping versions
+VERSION_CHUNK_SIZE = 5000
+
+# advisory lock taken just before commit (stamp + COMMIT only), so versions
+# become visible in commit order and a delta client can never skip one
+CATALOG_LOCK_KEY = 7421001
+
+_PENDING_KEY = "changed_item_ids"
+_UNSTAMPED_KEY = "unversioned_item_ids"
+
+# callables taking a set of item ids, run in THIS worker after commit
+_local_listeners = []
+
+
+class CatalogService:
+
+    @staticmethod
+    def on_items_changed(fn):
+        """
+        Register a callback taking a set of changed item ids. It runs in
+        every worker: after local commits, and via LISTEN/NOTIFY for others.
+        """
+        _local_listeners.append(fn)
+        return fn
+
+    @staticmethod
+    def items_changed(item_ids):
+        """
+        Record that items were created/updated/deleted in the current
+        transaction. Must be called BEFORE commit (after the changes).
+
+        The rows get their new catalog version (tombstones for deleted ids)
+        right before the commit, so the global version lock is held only
+        for that stamp and the COMMIT itself, not for the rest of the
+        transaction (e.g. a checkout). On Postgres a NOTIFY is queued in
+        the same transaction, so other workers only hear about it if (and
+        when) the commit succeeds.
+        """
+        ids = sorted({int(i) for i in item_ids if i is not None})
+        if not ids:
+            return
+
+        db.session.info.setdefault(_PENDING_KEY, set()).update(ids)
+        db.session.info.setdefault(_UNSTAMPED_KEY, set()).update(ids)
+
+        if db.session.get_bind().dialect.name != "postgresql":
+            return
+
+        for start in range(0, len(ids), NOTIFY_CHUNK_SIZE):
+            payload = json.dumps({
+                "ids": ids[start:start + NOTIFY_CHUNK_SIZE],
+                "ts": time.time(),
+            })
+            db.session.execute(
+                text("SELECT pg_notify(:channel, :payload)"),
+                {"channel": ITEM_CHANGES_CHANNEL, "payload": payload}
+            )
+
+    @staticmethod
+    def dispatch_local(item_ids):
+        """
+        Run the in-process callbacks for changed items. Called after our own
+        commits and by the LISTEN thread for changes made by other workers.
+        """
+        for fn in _local_listeners:
+            try:
+                fn(item_ids)
+            except Exception as e:
+                print("WARNING: item change listener failed:", e)
+
+    @staticmethod
+    def current_version():
+        """
+        Highest committed catalog version (0 for an untouched catalog).
+        """
+        return max(
+            db.session.scalar(select(func.max(Item.version))) or 0,
+            db.session.scalar(select(func.max(ItemTombstone.version))) or 0,
+        )
+
+    @staticmethod
+    def _stamp(session, ids):
+        """
+        Give the changed rows one new version. Runs as the last step of the
+        transaction (before_commit), under the version lock on Postgres.
+        """
+        ids = sorted(ids)
+        session.flush()
+        if session.get_bind().dialect.name == "postgresql":
+            session.execute(
+                text("SELECT pg_advisory_xact_lock(:key)"),
+                {"key": CATALOG_LOCK_KEY}
+            )
+            version = session.scalar(select(catalog_version_seq.next_value()))
+        else:
+            version = CatalogService.current_version() + 1
+
+        updated = set()
+        for start in range(0, len(ids), VERSION_CHUNK_SIZE):
+            chunk = ids[start:start + VERSION_CHUNK_SIZE]
+            updated.update(
+                item_id for (item_id,) in session.execute(
+                    update(Item)
+                    .where(Item.id.in_(chunk))
+                    .values(version=version)
+                    .returning(Item.id),
+                    execution_options={"synchronize_session": False}
+                )
+            )
+
+        for item_id in ids:
+            if item_id not in updated:
+                session.merge(ItemTombstone(item_id=item_id, version=version))
+        session.flush()
+
+
+# other workers' changes (every in-process cache, the barcode index included)
+@notification_listener.subscribe(ITEM_CHANGES_CHANNEL)
+def _on_item_changes(payload):
+    CatalogService.dispatch_local(set(payload.get("ids", [])))
+
+
+@event.listens_for(Session, "before_commit")
+def _stamp_versions(session):
+    if session.in_nested_transaction():
+        return  # a savepoint: stamp once, for the real commit
+    ids = session.info.pop(_UNSTAMPED_KEY, None)
+    if ids:
+        CatalogService._stamp(session, ids)
+
+
+@event.listens_for(Session, "after_commit")
+def _run_local_listeners(session):
+    ids = session.info.pop(_PENDING_KEY, None)
+    if ids:
+        CatalogService.dispatch_local(ids)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session):
+    session.info.pop(_PENDING_KEY, None)
+    session.info.pop(_UNSTAMPED_KEY, None)
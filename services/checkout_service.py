@@ -0,0 +1,341 @@
+from sqlalchemy import case, delete, insert, update
+
+from db import db
+from models.item import Item
+from models.processed_webhook_event import ProcessedWebhookEvent
+from models.sales_transaction import SalesTransaction
+from models.sales_transaction_item import SalesTransactionItem
+from services.catalog_service import CatalogService
+from services.sale_detail_service import SaleDetailService
+from services.sales_rollup_service import SalesRollupService
+
+
+class CheckoutError(Exception):
+    """
+    The cart cannot be sold (unknown item, bad line, not enough stock).
+    The caller should roll back and report it as a client error.
+    """
+
+
+class CheckoutService:
+    """
+    The one place stock moves because of a sale: checkout (POS /sales, cash
+    confirmation, PayMongo webhook), sale edits (revise) and deletes (void).
+
+    - the whole cart is resolved with ONE query that also locks the item
+      rows, always in id order, so concurrent checkouts cannot deadlock
+    - stock is decremented with ONE conditional UPDATE ... RETURNING
+      (quantity >= requested), so it can never oversell
+    - the transaction and all its lines are inserted in bulk, and the
+      daily rollup is updated in the same transaction
+    - nothing is committed here: the caller commits once, so the sale and
+      whatever led to it (e.g. a cash payment marked PAID) are atomic
+    """
+
+    @staticmethod
+    def checkout(user_id, cart, key="item_id"):
+        """
+        cart: [{"item_id": 1, "quantity": 2}, ...] (key="item_id")
+           or [{"barcode": "480...", "quantity": 2}, ...] (key="barcode")
+
+        Returns the flushed SalesTransaction.
+        """
+        wanted = CheckoutService.normalize_cart(cart, key)
+
+        column = Item.id if key == "item_id" else Item.barcode
+        rows = (
+            db.session.query(Item.id, Item.name, Item.barcode, Item.price, Item.quantity)
+            .filter(column.in_(list(wanted)))
+            .order_by(Item.id)
+            .with_for_update()
+            .all()
+        )
+
+        found = {getattr(r, "id" if key == "item_id" else "barcode"): r for r in rows}
+        for ref in wanted:
+            if ref not in found:
+                if key == "item_id":
+                    raise CheckoutError(f"Item {ref} not found")
+                raise CheckoutError(f"Item not found: {ref}")
+
+        qty_by_id = {}
+        for ref, qty in wanted.items():
+            row = found[ref]
+            if (row.quantity or 0) < qty:
+                raise CheckoutError(f"Not enough stock for {row.name}")
+            qty_by_id[row.id] = qty
+
+        # one conditional UPDATE for the whole cart
+        requested = case(qty_by_id, value=Item.id)
+        updated = db.session.execute(
+            update(Item)
+            .where(Item.id.in_(list(qty_by_id)), Item.quantity >= requested)
+            .values(quantity=Item.quantity - requested)
+            .returning(Item.id),
+            execution_options={"synchronize_session": False}
+        ).all()
+        if len(updated) != len(qty_by_id):
+            short = set(qty_by_id) - {r.id for r in updated}
+            name = next(r.name for r in rows if r.id in short)
+            raise CheckoutError(f"Not enough stock for {name}")
+
+        price_by_id = {r.id: r.price for r in rows}
+        transaction = SalesTransaction(
+            user_id=user_id,
+            total_amount=sum(price_by_id[i] * qty for i, qty in qty_by_id.items()),
+            line_count=len(qty_by_id),
+        )
+        db.session.add(transaction)
+        db.session.flush()  # get transaction.id
+
+        db.session.execute(
+            insert(SalesTransactionItem),
+            [
+                {
+                    "transaction_id": transaction.id,
+                    "item_id": item_id,
+                    "quantity": qty,
+                    "price_at_sale": price_by_id[item_id],
+                }
+                for item_id, qty in qty_by_id.items()
+            ]
+        )
+
+        SalesRollupService.record(
+            transaction.date, user_id,
+            [(item_id, qty, price_by_id[item_id]) for item_id, qty in qty_by_id.items()]
+        )
+
+        CatalogService.items_changed(qty_by_id)
+        # a brand-new id cannot be cached in any other worker yet
+        SaleDetailService.sales_changed([transaction.id], notify=False)
+        return transaction
+
+    @staticmethod
+    def revise(transaction, cart):
+        """
+        Replace the lines of an existing sale with cart ([{"item_id", "quantity"}]).
+
+        Only the per-item difference is applied: one locked resolve, one
+        conditional stock UPDATE for every item whose quantity changed
+        (positive delta sells more, negative restocks), then the lines are
+        updated / inserted / deleted in bulk. Existing lines keep their
+        price_at_sale; items new to the sale are priced now.
+        """
+        wanted = CheckoutService.normalize_cart(cart, "item_id")
+
+        old_lines = (
+            db.session.query(
+                SalesTransactionItem.id,
+                SalesTransactionItem.item_id,
+                SalesTransactionItem.quantity,
+                SalesTransactionItem.price_at_sale,
+            )
+            .filter(SalesTransactionItem.transaction_id == transaction.id)
+            .order_by(SalesTransactionItem.id)
+            .all()
+        )
+        # older sales may list an item on several lines, possibly at
+        # different prices: every line keeps its own price_at_sale
+        lines_by_item, old_qty = {}, {}
+        for line in old_lines:
+            lines_by_item.setdefault(line.item_id, []).append(line)
+            old_qty[line.item_id] = old_qty.get(line.item_id, 0) + line.quantity
+
+        delta = {
+            item_id: wanted.get(item_id, 0) - old_qty.get(item_id, 0)
+            for item_id in set(wanted) | set(old_qty)
+        }
+        delta = {item_id: d for item_id, d in delta.items() if d}
+
+        rows = (
+            db.session.query(Item.id, Item.name, Item.price, Item.quantity)
+            .filter(Item.id.in_(set(delta) | (set(wanted) - set(lines_by_item))))
+            .order_by(Item.id)
+            .with_for_update()
+            .all()
+        )
+        found = {r.id: r for r in rows}
+        for item_id in wanted:
+            if item_id not in lines_by_item and item_id not in found:
+                raise CheckoutError(f"Item {item_id} not found")
+
+        for item_id, d in delta.items():
+            row = found.get(item_id)
+            if d <= 0:
+                continue
+            if row is None:
+                raise CheckoutError(f"Item {item_id} not found")
+            if (row.quantity or 0) < d:
+                raise CheckoutError(f"Not enough stock for {row.name}")
+
+        # items deleted from the catalog since the sale have nothing to restock
+        stock_delta = {item_id: d for item_id, d in delta.items() if item_id in found}
+        if stock_delta:
+            change = case(stock_delta, value=Item.id)
+            updated = db.session.execute(
+                update(Item)
+                .where(Item.id.in_(list(stock_delta)), Item.quantity >= change)
+                .values(quantity=Item.quantity - change)
+                .returning(Item.id),
+                execution_options={"synchronize_session": False}
+            ).all()
+            if len(updated) != len(stock_delta):
+                short = set(stock_delta) - {r.id for r in updated}
+                raise CheckoutError(f"Not enough stock for {found[min(short)].name}")
+
+        # only the difference is (re)priced: more of an item already on the
+        # sale is sold at its first line's price, fewer takes units back
+        # from its newest lines first, each at the price it was sold for
+        new_qty, removed, rollup = {}, [], []
+        for item_id, d in delta.items():
+            lines = lines_by_item.get(item_id)
+            if not lines:
+                continue
+            if d > 0:
+                new_qty[lines[0].id] = lines[0].quantity + d
+                rollup.append((item_id, d, lines[0].price_at_sale))
+                continue
+            give_back = -d
+            for line in reversed(lines):
+                if not give_back:
+                    break
+                taken = min(line.quantity, give_back)
+                give_back -= taken
+                if taken == line.quantity:
+                    removed.append(line.id)
+                else:
+                    new_qty[line.id] = line.quantity - taken
+                rollup.append((item_id, -taken, line.price_at_sale))
+
+        if new_qty:
+            db.session.execute(
+                update(SalesTransactionItem),
+                [{"id": line_id, "quantity": qty} for line_id, qty in new_qty.items()]
+            )
+
+        price_now = {r.id: r.price for r in rows}
+        added = [item_id for item_id in wanted if item_id not in lines_by_item]
+        if added:
+            db.session.execute(
+                insert(SalesTransactionItem),
+                [
+                    {
+                        "transaction_id": transaction.id,
+                        "item_id": item_id,
+                        "quantity": wanted[item_id],
+                        "price_at_sale": price_now[item_id],
+                    }
+                    for item_id in added
+                ]
+            )
+            rollup.extend((item_id, wanted[item_id], price_now[item_id]) for item_id in added)
+
+        if removed:
+            db.session.execute(
+                delete(SalesTransactionItem)
+                .where(SalesTransactionItem.id.in_(removed)),
+                execution_options={"synchronize_session": False}
+            )
+
+        if delta:
+            SalesRollupService.record(transaction.date, transaction.user_id, rollup)
+            CatalogService.items_changed(delta)
+
+        removed_ids = set(removed)
+        kept = [line for line in old_lines if line.id not in removed_ids]
+        transaction.total_amount = (
+            sum(new_qty.get(line.id, line.quantity) * line.price_at_sale for line in kept)
+            + sum(wanted[i] * price_now[i] for i in added)
+        )
+        transaction.line_count = len(kept) + len(added)
+        SaleDetailService.sales_changed([transaction.id])
+        db.session.expire(transaction, ["items"])
+        return delta
+
+    @staticmethod
+    def void(transaction):
+        """
+        Delete a sale and put its stock back: one aggregate restock UPDATE
+        (item rows locked in id order, like checkout) and bulk deletes.
+        """
+        lines = (
+            db.session.query(
+                SalesTransactionItem.item_id,
+                SalesTransactionItem.quantity,
+                SalesTransactionItem.price_at_sale,
+            )
+            .filter(SalesTransactionItem.transaction_id == transaction.id)
+            .all()
+        )
+
+        restock = {}
+        for line in lines:
+            restock[line.item_id] = restock.get(line.item_id, 0) + line.quantity
+
+        if restock:
+            db.session.query(Item.id).filter(
+                Item.id.in_(list(restock))
+            ).order_by(Item.id).with_for_update().all()
+
+            db.session.execute(
+                update(Item)
+                .where(Item.id.in_(list(restock)))
+                .values(quantity=Item.quantity + case(restock, value=Item.id)),
+                execution_options={"synchronize_session": False}
+            )
+            SalesRollupService.record(
+                transaction.date, transaction.user_id, lines, sign=-1
+            )
+            CatalogService.items_changed(restock)
+
+        # a redelivered PayMongo event must still not re-create the sale
+        db.session.execute(
+            update(ProcessedWebhookEvent)
+            .where(ProcessedWebhookEvent.transaction_id == transaction.id)
+            .values(transaction_id=None)
+        )
+        db.session.execute(
+            delete(SalesTransactionItem)
+            .where(SalesTransactionItem.transaction_id == transaction.id),
+            execution_options={"synchronize_session": False}
+        )
+        db.session.execute(
+            delete(SalesTransaction).where(SalesTransaction.id == transaction.id),
+            execution_options={"synchronize_session": False}
+        )
+        SaleDetailService.sales_changed([transaction.id])
+        db.session.expunge(transaction)
+
+    @staticmethod
+    def normalize_cart(cart, key="item_id"):
+        """
+        {ref: total quantity} for a cart, or CheckoutError if a line is bad.
+        """
+        if not isinstance(cart, list) or not cart:
+            raise CheckoutError("No items provided")
+
+        wanted = {}
+        for entry in cart:
+            if not isinstance(entry, dict):
+                raise CheckoutError(f"{key} and quantity required")
+
+            ref = entry.get(key)
+            qty = entry.get("quantity")
+            if not ref or not qty:
+                raise CheckoutError(f"{key} and quantity required")
+            if isinstance(qty, bool) or not isinstance(qty, int) or qty < 1:
+                raise CheckoutError("quantity must be a positive integer")
+
+            if key == "item_id":
+                try:
+                    ref = int(ref)
+                except (TypeError, ValueError):
+                    raise CheckoutError("item_id must be an integer")
+            else:
+                ref = str(ref)
+
+            # the same item on several lines is sold as one line
+            wanted[ref] = wanted.get(ref, 0) + qty
+
+        return wanted
@@ -0,0 +1,92 @@
+import hashlib
+import json
+
+from sqlalchemy.exc import IntegrityError
+
+from db import db
+from models.idempotency_key import IdempotencyKey
+from models.processed_webhook_event import ProcessedWebhookEvent
+
+MAX_KEY_LENGTH = 255
+
+
+class IdempotencyConflict(Exception):
+    """
+    The Idempotency-Key was already used for a different request body.
+    """
+
+
+def request_fingerprint(data):
+    return hashlib.sha256(
+        json.dumps(data, sort_keys=True, separators=(",", ":"), default=str).encode()
+    ).hexdigest()
+
+
+class IdempotencyService:
+    """
+    Replay-instead-of-redo for retried writes.
+
+    Both checks are a single primary-key lookup. The stored row is written
+    in the SAME transaction as the sale, so either both exist or neither
+    does; two concurrent requests with the same key collide on the primary
+    key and the loser replays the winner's response.
+    """
+
+    # --------------------------------------------------
+    # Idempotency-Key header (POST /sales)
+    # --------------------------------------------------
+    @staticmethod
+    def replay(user_id, key, data):
+        """
+        (status_code, response) stored for this key, or None if unseen.
+        Raises IdempotencyConflict if the key was used with another body.
+        """
+        stored = db.session.get(IdempotencyKey, (user_id, key))
+        if stored is None:
+            return None
+        if stored.request_hash != request_fingerprint(data):
+            raise IdempotencyConflict(
+                "Idempotency-Key was already used with a different request"
+            )
+        return stored.status_code, stored.response
+
+    @staticmethod
+    def remember(user_id, key, data, status_code, response):
+        """
+        Stage the response in the current transaction (caller commits).
+        """
+        db.session.add(IdempotencyKey(
+            user_id=user_id,
+            key=key,
+            request_hash=request_fingerprint(data),
+            status_code=status_code,
+            response=response,
+        ))
+
+    # --------------------------------------------------
+    # PayMongo webhook redeliveries
+    # --------------------------------------------------
+    @staticmethod
+    def processed_event(session_id):
+        return db.session.get(ProcessedWebhookEvent, session_id)
+
+    @staticmethod
+    def mark_processed(session_id, event_id, transaction_id):
+        db.session.add(ProcessedWebhookEvent(
+            session_id=session_id,
+            event_id=event_id,
+            transaction_id=transaction_id,
+        ))
+
+    @staticmethod
+    def commit():
+        """
+        Commit; False (after rollback) if a concurrent duplicate won the
+        primary key, so the caller should replay instead.
+        """
+        try:
+            db.session.commit()
+            return True
+        except IntegrityError:
+            db.session.rollback()
+            return False
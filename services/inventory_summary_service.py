@@ -0,0 +1,68 @@
+import os
+
+from sqlalchemy import func
+
+from db import db
+from models.item import Item
+from services.catalog_service import CatalogService
+from utils.cache import MISSING, TTLCache
+from utils.item_validation import CATEGORIES
+
+SUMMARY_TTL = float(os.getenv("INVENTORY_SUMMARY_TTL", 30))
+
+_cache = TTLCache(ttl=SUMMARY_TTL, maxsize=1)
+
+# bumped on every invalidation so a summary computed concurrently with an
+# item write is not cached after the fact
+_generation = 0
+
+
+@CatalogService.on_items_changed
+def _invalidate(item_ids):
+    # any item write (any worker) makes the cached summary stale
+    global _generation
+    _generation += 1
+    _cache.clear()
+
+
+class InventorySummaryService:
+
+    @staticmethod
+    def by_category():
+        """
+        One row per category enum value (zeros for empty categories):
+        item count, units on hand and stock value.
+        """
+        summary = _cache.get("by_category")
+        if summary is not MISSING:
+            return summary
+
+        generation = _generation
+        rows = (
+            db.session.query(
+                Item.category,
+                func.count(Item.id),
+                func.coalesce(func.sum(Item.quantity), 0),
+                func.coalesce(func.sum(Item.quantity * Item.price), 0),
+            )
+            .group_by(Item.category)
+            .all()
+        )
+        found = {
+            category: (count, units, value)
+            for category, count, units, value in rows
+        }
+
+        summary = []
+        for category in CATEGORIES:
+            count, units, value = found.get(category, (0, 0, 0))
+            summary.append({
+                "category": category,
+                "item_count": int(count),
+                "units_on_hand": int(units),
+                "stock_value": round(float(value), 2),
+            })
+
+        if generation == _generation:
+            _cache.set("by_category", summary)
+        return summary
@@ -0,0 +1,160 @@
+from decimal import Decimal
+
+from sqlalchemy import and_, func, or_, update
+
+from db import db
+from models.item import Item
+from services.catalog_service import CatalogService
+from utils.item_validation import CATEGORY_SET, invalid_category_message, validate_item_fields
+
+STOCK_OPS = ("set", "add")
+PRICE_OPS = ("set", "add", "percent")
+
+MAX_FILTER_VALUES = 10_000
+
+
+class ItemBulkService:
+
+    @staticmethod
+    def mutate(payload):
+        """
+        Apply one operation to every item matching a filter, as a single
+        UPDATE ... RETURNING. All-or-nothing: if any row would end up with
+        a negative quantity or price the whole change is rolled back.
+
+        payload = {
+            "filter":   {"ids": [...], "barcodes": [...], "category": "..."},
+            "stock":    {"op": "set" | "add", "value": int},
+            "price":    {"op": "set" | "add" | "percent", "value": number},
+            "category": "..."
+        }
+        ids / barcodes are OR'ed together, category narrows the match.
+        """
+        flt = payload.get("filter") or {}
+        if not isinstance(flt, dict):
+            raise ValueError("filter must be an object")
+        condition = ItemBulkService._condition(flt)
+        values = ItemBulkService._values(payload)
+
+        try:
+            rows = db.session.execute(
+                update(Item)
+                .where(condition)
+                .values(**values)
+                .returning(
+                    Item.id, Item.name, Item.quantity,
+                    Item.category, Item.price, Item.barcode
+                ),
+                execution_options={"synchronize_session": False}
+            ).all()
+
+            invalid = [r.id for r in rows if r.quantity < 0 or r.price < 0]
+            if invalid:
+                raise ValueError(
+                    f"quantity and price must be 0 or greater (items {invalid[:20]})"
+                )
+
+            CatalogService.items_changed(r.id for r in rows)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        return rows
+
+    @staticmethod
+    def _condition(flt):
+        ids = flt.get("ids") or []
+        barcodes = flt.get("barcodes") or []
+        category = flt.get("category")
+
+        if not isinstance(ids, list) or not isinstance(barcodes, list):
+            raise ValueError("filter.ids and filter.barcodes must be lists")
+        if len(ids) + len(barcodes) > MAX_FILTER_VALUES:
+            raise ValueError(f"filter may list at most {MAX_FILTER_VALUES} ids/barcodes")
+        if category is not None and (not isinstance(category, str) or category not in CATEGORY_SET):
+            raise ValueError(invalid_category_message())
+        if not ids and not barcodes and category is None:
+            raise ValueError("filter needs ids, barcodes or category")
+
+        try:
+            ids = [int(i) for i in ids]
+        except (TypeError, ValueError):
+            raise ValueError("filter.ids must be integers")
+
+        clauses = []
+        identifiers = []
+        if ids:
+            identifiers.append(Item.id.in_(ids))
+        if barcodes:
+            identifiers.append(Item.barcode.in_([str(b) for b in barcodes]))
+        if identifiers:
+            clauses.append(or_(*identifiers))
+        if category is not None:
+            clauses.append(Item.category == category)
+
+        return and_(*clauses)
+
+    @staticmethod
+    def _values(payload):
+        values = {}
+
+        stock = payload.get("stock")
+        if stock is not None:
+            op, value = _operation(stock, "stock", STOCK_OPS)
+            if op == "set":
+                fields, error = validate_item_fields({"quantity": value}, partial=True)
+                if error:
+                    raise ValueError(error)
+                values["quantity"] = fields["quantity"]
+            else:
+                if isinstance(value, bool) or not isinstance(value, int):
+                    raise ValueError("stock.value must be an integer")
+                values["quantity"] = func.coalesce(Item.quantity, 0) + value
+
+        price = payload.get("price")
+        if price is not None:
+            op, value = _operation(price, "price", PRICE_OPS)
+            if op == "set":
+                fields, error = validate_item_fields({"price": value}, partial=True)
+                if error:
+                    raise ValueError(error)
+                values["price"] = fields["price"]
+            else:
+                try:
+                    value = Decimal(str(value))
+                except ArithmeticError:
+                    raise ValueError("price.value must be a number")
+                if not value.is_finite():
+                    raise ValueError("price.value must be a number")
+                if op == "add":
+                    values["price"] = Item.price + value
+                else:
+                    values["price"] = func.round(Item.price * (1 + value / 100), 2)
+
+        category = payload.get("category")
+        if category is not None:
+            fields, error = validate_item_fields({"category": category}, partial=True)
+            if error or "category" not in fields:
+                raise ValueError(error or invalid_category_message())
+            values["category"] = fields["category"]
+
+        if not values:
+            raise ValueError("nothing to change: give stock, price and/or category")
+
+        return values
+
+
+def _operation(spec, name, ops):
+    """
+    (op, value) of a {"op": ..., "value": number} change, or ValueError.
+    """
+    if not isinstance(spec, dict):
+        raise ValueError(f'{name} must be an object like {{"op": "{ops[0]}", "value": 1}}')
+
+    op, value = spec.get("op"), spec.get("value")
+    if op not in ops:
+        raise ValueError(f"{name}.op must be one of {', '.join(ops)}")
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError(f"{name}.value must be a number")
+    return op, value
@@ -0,0 +1,189 @@
+import csv
+import io
+import json
+
+from sqlalchemy import insert
+from sqlalchemy.exc import DBAPIError
+
+from db import db
+from models.item import Item
+from services.catalog_service import CatalogService
+from utils.item_validation import validate_item_fields
+
+MAX_IMPORT_ROWS = 200_000
+
+# barcodes per IN (...) when checking / resolving against the DB
+LOOKUP_CHUNK_SIZE = 5000
+
+# rows per savepoint when loading: a chunk the DB rejects is retried row by
+# row so only the offending rows are reported
+LOAD_CHUNK_SIZE = 5000
+
+COPY_COLUMNS = ("name", "quantity", "reorder_point", "category", "price", "barcode")
+
+
+class ItemImportService:
+
+    @staticmethod
+    def parse(body, fmt):
+        """
+        Parse a CSV (with header) or NDJSON body into a list of dicts.
+        """
+        if fmt == "csv":
+            rows = list(csv.DictReader(io.StringIO(body)))
+        elif fmt == "ndjson":
+            rows = []
+            for line_no, line in enumerate(body.splitlines(), start=1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    raise Exception(f"Invalid JSON on line {line_no}")
+                if not isinstance(row, dict):
+                    raise Exception(f"Line {line_no} is not a JSON object")
+                rows.append(row)
+        else:
+            raise Exception("format must be csv or ndjson")
+
+        if len(rows) > MAX_IMPORT_ROWS:
+            raise Exception(f"Too many rows (max {MAX_IMPORT_ROWS})")
+
+        return rows
+
+    @staticmethod
+    def import_rows(rows, dry_run=False):
+        """
+        Validate every row, then load the valid ones in a single transaction.
+        Rows are numbered from 1 in the returned error report.
+        """
+        errors = []
+        valid = []
+        first_seen = {}
+
+        # 1️⃣ field rules + duplicates inside the file (one pass)
+        for row_no, row in enumerate(rows, start=1):
+            fields, error = validate_item_fields(row)
+            if error:
+                errors.append({"row": row_no, "error": error})
+                continue
+
+            barcode = fields["barcode"]
+            if barcode in first_seen:
+                errors.append({
+                    "row": row_no,
+                    "error": f"duplicate barcode in file (first seen on row {first_seen[barcode]})"
+                })
+                continue
+
+            first_seen[barcode] = row_no
+            valid.append((row_no, fields))
+
+        # 2️⃣ duplicates against the DB (chunked IN lookups)
+        existing = ItemImportService._existing_barcodes(list(first_seen))
+        if existing:
+            kept = []
+            for row_no, fields in valid:
+                if fields["barcode"] in existing:
+                    errors.append({"row": row_no, "error": "barcode already exists"})
+                else:
+                    kept.append((row_no, fields))
+            valid = kept
+
+        errors.sort(key=lambda e: e["row"])
+        report = {
+            "received": len(rows),
+            "valid": len(valid),
+            "imported": 0,
+            "dry_run": dry_run,
+            "errors": errors,
+        }
+
+        if dry_run or not valid:
+            return report
+
+        # 3️⃣ load (one savepoint per chunk, one transaction overall)
+        loaded = []
+        try:
+            for chunk in _chunks(valid, LOAD_CHUNK_SIZE):
+                loaded.extend(ItemImportService._load_chunk(chunk, errors))
+
+            if loaded:
+                ids = [
+                    item_id
+                    for barcodes in _chunks([r["barcode"] for r in loaded])
+                    for (item_id,) in db.session.query(Item.id).filter(Item.barcode.in_(barcodes))
+                ]
+                CatalogService.items_changed(ids)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        errors.sort(key=lambda e: e["row"])
+        report["imported"] = len(loaded)
+        return report
+
+    @staticmethod
+    def _load_chunk(chunk, errors):
+        """
+        Insert [(row_no, fields)]; returns the records loaded. Rows the DB
+        rejects (e.g. a barcode inserted concurrently) go to errors.
+        """
+        records = [fields for _, fields in chunk]
+        try:
+            with db.session.begin_nested():
+                if db.session.get_bind().dialect.name == "postgresql":
+                    ItemImportService._copy(records)
+                else:
+                    db.session.execute(insert(Item), records)
+            return records
+        except DBAPIError:
+            pass
+
+        loaded = []
+        for row_no, fields in chunk:
+            try:
+                with db.session.begin_nested():
+                    db.session.execute(insert(Item), [fields])
+                loaded.append(fields)
+            except DBAPIError:
+                # never the raw driver message: it leaks SQL to the client
+                if ItemImportService._existing_barcodes([fields["barcode"]]):
+                    error = "barcode already exists"
+                else:
+                    error = "row rejected by the database"
+                errors.append({"row": row_no, "error": error})
+        return loaded
+
+    @staticmethod
+    def _existing_barcodes(barcodes):
+        found = set()
+        for chunk in _chunks(barcodes):
+            found.update(
+                b for (b,) in db.session.query(Item.barcode).filter(Item.barcode.in_(chunk))
+            )
+        return found
+
+    @staticmethod
+    def _copy(records):
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        for r in records:
+            writer.writerow([r[c] for c in COPY_COLUMNS])
+        buf.seek(0)
+
+        # raw psycopg2 cursor on the session's connection → same transaction
+        cursor = db.session.connection().connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY items ({', '.join(COPY_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+                buf
+            )
+        finally:
+            cursor.close()
+
+
+def _chunks(values, size=LOOKUP_CHUNK_SIZE):
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
@@ -0,0 +1,209 @@
+# services/item_search_service.py
+# FUZZY / PREFIX ITEM SEARCH OVER name + barcode
+#
+# - Postgres with pg_trgm: ranked query backed by the GIN trigram indexes
+#   declared on Item (ix_items_name_trgm / ix_items_barcode_trgm)
+# - anything else (sqlite tests, DB without the extension): an in-process
+#   trigram index that mimics pg_trgm's similarity()
+
+import os
+import re
+import threading
+from collections import Counter
+
+from sqlalchemy import case, func, or_, text
+
+from db import db
+from models.item import Item
+from services.catalog_service import CatalogService
+
+# auto | pg | python
+BACKEND = os.getenv("ITEM_SEARCH_BACKEND", "auto")
+
+# same default as pg_trgm.similarity_threshold
+SIMILARITY_THRESHOLD = 0.3
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+# letters and digits of any script ("Jalapeño", "Молоко"), like pg_trgm
+_WORD_RE = re.compile(r"[^\W_]+")
+
+
+def trigrams(value):
+    """
+    pg_trgm style trigrams: lowercase words, padded with two leading
+    blanks and one trailing blank.
+    """
+    grams = set()
+    for word in _WORD_RE.findall((value or "").lower()):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class TrigramIndex:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._items = {}        # id → row (id, name, quantity, category, price, barcode)
+        self._grams = {}        # id → set of trigrams
+        self._postings = {}     # trigram → set of ids
+        self._dirty = set()
+        self._loaded = False
+
+    def clear(self):
+        # reloaded in full by the next search
+        with self._lock:
+            self._items, self._grams, self._postings = {}, {}, {}
+            self._dirty.clear()
+            self._loaded = False
+
+    def mark_dirty(self, item_ids):
+        with self._lock:
+            self._dirty.update(item_ids)
+
+    def _ensure_fresh(self):
+        if not self._loaded:
+            rows = db.session.query(
+                Item.id, Item.name, Item.quantity,
+                Item.category, Item.price, Item.barcode
+            ).all()
+            with self._lock:
+                self._items, self._grams, self._postings = {}, {}, {}
+                self._dirty.clear()
+                for row in rows:
+                    self._add(row)
+                self._loaded = True
+            return
+
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+        if not dirty:
+            return
+
+        rows = db.session.query(
+            Item.id, Item.name, Item.quantity,
+            Item.category, Item.price, Item.barcode
+        ).filter(Item.id.in_(dirty)).all()
+
+        with self._lock:
+            for item_id in dirty:
+                self._remove(item_id)
+            for row in rows:
+                self._add(row)
+
+    def _add(self, row):
+        grams = trigrams(row.name) | trigrams(row.barcode)
+        self._items[row.id] = row
+        self._grams[row.id] = grams
+        for g in grams:
+            self._postings.setdefault(g, set()).add(row.id)
+
+    def _remove(self, item_id):
+        self._items.pop(item_id, None)
+        for g in self._grams.pop(item_id, ()):
+            ids = self._postings.get(g)
+            if ids:
+                ids.discard(item_id)
+
+    def search(self, query, category=None, limit=DEFAULT_LIMIT):
+        self._ensure_fresh()
+
+        q_grams = trigrams(query)
+        if not q_grams:
+            return []
+
+        with self._lock:
+            shared = Counter()
+            for g in q_grams:
+                shared.update(self._postings.get(g, ()))
+
+            lowered = query.lower()
+            results = []  # ranked: exact barcode > prefix > similarity
+            for item_id, common in shared.items():
+                row = self._items[item_id]
+                if category and row.category != category:
+                    continue
+
+                score = common / len(q_grams | self._grams[item_id])
+                prefix = row.name.lower().startswith(lowered) or row.barcode.startswith(query)
+                if score < SIMILARITY_THRESHOLD and not prefix:
+                    continue
+
+                rank = (row.barcode == query, prefix, score)
+                results.append((rank, -item_id, row, score))
+
+        results.sort(key=lambda r: (r[0], r[1]), reverse=True)
+        return [(row, round(score, 4)) for _, _, row, score in results[:limit]]
+
+
+_fallback_index = TrigramIndex()
+CatalogService.on_items_changed(_fallback_index.mark_dirty)
+
+_pg_trgm_available = None
+
+
+class ItemSearchService:
+
+    @staticmethod
+    def search(query, category=None, limit=DEFAULT_LIMIT):
+        """
+        Return up to `limit` (row, score) pairs, best match first.
+        Rows expose id, name, quantity, category, price and barcode.
+        """
+        if ItemSearchService._use_pg():
+            return ItemSearchService._search_pg(query, category, limit)
+        return _fallback_index.search(query, category, limit)
+
+    @staticmethod
+    def _use_pg():
+        global _pg_trgm_available
+
+        if BACKEND != "auto":
+            return BACKEND == "pg"
+
+        if _pg_trgm_available is None:
+            if db.session.get_bind().dialect.name != "postgresql":
+                _pg_trgm_available = False
+            else:
+                _pg_trgm_available = bool(db.session.scalar(
+                    text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+                ))
+        return _pg_trgm_available
+
+    @staticmethod
+    def _search_pg(query, category, limit):
+        prefix = query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        score = func.greatest(
+            func.similarity(Item.name, query),
+            func.similarity(Item.barcode, query),
+        )
+
+        q = (
+            db.session.query(
+                Item.id, Item.name, Item.quantity,
+                Item.category, Item.price, Item.barcode,
+                score.label("score"),
+            )
+            .filter(or_(
+                Item.name.op("%")(query),
+                Item.barcode.op("%")(query),
+                Item.name.ilike(prefix),
+                Item.barcode.like(prefix),
+            ))
+        )
+        if category:
+            q = q.filter(Item.category == category)
+
+        rows = (
+            q.order_by(
+                case((Item.barcode == query, 0), else_=1),
+                case((or_(Item.name.ilike(prefix), Item.barcode.like(prefix)), 0), else_=1),
+                score.desc(),
+                Item.id,
+            )
+            .limit(limit)
+            .all()
+        )
+        return [(row, round(float(row.score), 4)) for row in rows]
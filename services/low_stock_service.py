@@ -0,0 +1,83 @@
+import os
+import threading
+import time
+
+from db import db
+from models.item import Item
+from services.catalog_service import CatalogService
+
+# full reload interval — bounds staleness if a change notification is lost
+FULL_REFRESH_INTERVAL = float(os.getenv("LOW_STOCK_REFRESH_INTERVAL", 60))
+
+LOW_STOCK_COLUMNS = (
+    Item.id, Item.name, Item.category, Item.barcode,
+    Item.quantity, Item.reorder_point,
+)
+
+
+def _is_low(row):
+    return row.quantity is not None and row.quantity <= row.reorder_point
+
+
+class LowStockWatchlist:
+    """
+    In-process copy of the low-stock set (quantity <= reorder_point).
+
+    Loaded through the ix_items_low_stock partial index, then kept current
+    incrementally: checkouts and item writes report changed ids through
+    CatalogService, and only those ids are re-read on the next request.
+    """
+
+    def __init__(self, refresh_interval=FULL_REFRESH_INTERVAL):
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._rows = {}
+        self._dirty = set()
+        self._loaded_at = None
+
+    def clear(self):
+        # reloaded in full by the next snapshot
+        with self._lock:
+            self._rows = {}
+            self._dirty.clear()
+            self._loaded_at = None
+
+    def mark_dirty(self, item_ids):
+        with self._lock:
+            self._dirty.update(item_ids)
+
+    def snapshot(self):
+        self._refresh()
+        with self._lock:
+            return list(self._rows.values())
+
+    def _refresh(self):
+        if self._loaded_at is None or time.monotonic() - self._loaded_at > self.refresh_interval:
+            with self._lock:
+                self._dirty.clear()
+            rows = (
+                db.session.query(*LOW_STOCK_COLUMNS)
+                .filter(Item.quantity <= Item.reorder_point)
+                .all()
+            )
+            with self._lock:
+                self._rows = {r.id: r for r in rows}
+                self._loaded_at = time.monotonic()
+            return
+
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+        if not dirty:
+            return
+
+        rows = db.session.query(*LOW_STOCK_COLUMNS).filter(Item.id.in_(dirty)).all()
+        with self._lock:
+            for item_id in dirty:
+                self._rows.pop(item_id, None)
+            for r in rows:
+                if _is_low(r):
+                    self._rows[r.id] = r
+
+
+low_stock_watchlist = LowStockWatchlist()
+CatalogService.on_items_changed(low_stock_watchlist.mark_dirty)
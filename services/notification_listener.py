@@ -0,0 +1,167 @@
+# services/notification_listener.py
+# ONE POSTGRES LISTEN CONNECTION PER WORKER, SHARED BY EVERY IN-PROCESS CACHE
+#
+# - services subscribe their own NOTIFY channel with a handler, e.g.
+#     @notification_listener.subscribe(SALE_CHANGES_CHANNEL)
+#     def _on_sale_changes(payload): ...
+#   and may register an on_connect callback to reload / clear whatever they
+#   cache (notifications sent while the listener was down are lost)
+# - the app factory calls init_app(app); the thread is (re)started in every
+#   process (gunicorn forks workers after import) on its first request
+# - payloads are JSON objects; their "ts" (sender time.time()) feeds the
+#   lag statistics
+# - not Postgres: nothing to listen to, the caches rely on their TTLs
+
+import json
+import os
+import select
+import threading
+import time
+
+from db import db
+
+POLL_TIMEOUT = 5
+RECONNECT_DELAY = 2
+
+
+class NotificationListener:
+
+    def __init__(self):
+        self._handlers = {}
+        self._on_connect = []
+        self._app = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self.listening = False
+
+        self.notifications = 0
+        self.last_notify_lag = None
+        self.max_notify_lag = 0.0
+
+    # -----------------------
+    # REGISTRATION
+    # -----------------------
+    def subscribe(self, channel):
+        """
+        Decorator: call fn(payload_dict) for every NOTIFY on channel
+        (in the listener thread).
+        """
+        def register(fn):
+            self._handlers.setdefault(channel, []).append(fn)
+            return fn
+        return register
+
+    def on_connect(self, fn):
+        """
+        Call fn() (inside an app context) each time the listener has
+        (re)subscribed, e.g. to reload a cache that may have missed changes.
+        """
+        self._on_connect.append(fn)
+        return fn
+
+    # -----------------------
+    # SETUP
+    # -----------------------
+    def init_app(self, app):
+        self._app = app
+        app.before_request(self.ensure_started)
+        try:
+            self.ensure_started()
+        except Exception as e:
+            # DB not reachable yet — retried on the first request
+            print("WARNING: notification listener start failed:", e)
+
+    def ensure_started(self):
+        # (re)start after fork so every gunicorn worker has its own thread
+        if self._app is None or self._pid == os.getpid():
+            return
+
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self.listening = False  # a forked child inherits the flag, not the thread
+
+        with self._app.app_context():
+            if db.engine.dialect.name != "postgresql":
+                return
+
+        threading.Thread(
+            target=self._listen_forever,
+            name="notification-listener",
+            daemon=True
+        ).start()
+
+    # -----------------------
+    # LISTEN / NOTIFY
+    # -----------------------
+    def _listen_forever(self):
+        while True:
+            try:
+                with self._app.app_context():
+                    conn = db.engine.raw_connection()
+                conn.detach()  # autocommit must not leak back into the pool
+                try:
+                    self._listen(conn.driver_connection)
+                finally:
+                    self.listening = False
+                    conn.close()
+            except Exception as e:
+                print("WARNING: notification listener error:", e)
+            time.sleep(RECONNECT_DELAY)
+
+    def _listen(self, dbapi_conn):
+        dbapi_conn.autocommit = True
+        cur = dbapi_conn.cursor()
+        for channel in self._handlers:
+            cur.execute(f"LISTEN {channel}")
+
+        # (re)load AFTER subscribing so no change can slip in between
+        with self._app.app_context():
+            for fn in self._on_connect:
+                try:
+                    fn()
+                except Exception as e:
+                    print("WARNING: notification listener on_connect failed:", e)
+        self.listening = True
+
+        while True:
+            if select.select([dbapi_conn], [], [], POLL_TIMEOUT) == ([], [], []):
+                continue
+
+            dbapi_conn.poll()
+            while dbapi_conn.notifies:
+                notify = dbapi_conn.notifies.pop(0)
+                self._dispatch(notify.channel, notify.payload)
+
+    def _dispatch(self, channel, payload):
+        data = json.loads(payload)
+
+        lag = max(0.0, time.time() - data.get("ts", time.time()))
+        self.notifications += 1
+        self.last_notify_lag = lag
+        self.max_notify_lag = max(self.max_notify_lag, lag)
+
+        for fn in self._handlers.get(channel, ()):
+            try:
+                fn(data)
+            except Exception as e:
+                print(f"WARNING: {channel} handler failed:", e)
+
+    # -----------------------
+    # OBSERVABILITY
+    # -----------------------
+    def stats(self):
+        return {
+            "listening": self.listening,
+            "channels": sorted(self._handlers),
+            "notifications": self.notifications,
+            "last_notify_lag_ms": (
+                None if self.last_notify_lag is None
+                else round(self.last_notify_lag * 1000, 3)
+            ),
+            "max_notify_lag_ms": round(self.max_notify_lag * 1000, 3),
+        }
+
+
+notification_listener = NotificationListener()
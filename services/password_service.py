@@ -0,0 +1,150 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+from werkzeug.security import (
+    DEFAULT_PBKDF2_ITERATIONS,
+    check_password_hash,
+    generate_password_hash,
+)
+
+# current cost parameters: stored hashes made with anything else are
+# re-hashed on the next successful login
+PASSWORD_HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "scrypt:32768:8:1")
+
+# hashing processes per worker (0 = hash inline, e.g. for local dev)
+PASSWORD_POOL_SIZE = int(os.getenv("PASSWORD_POOL_SIZE", max(1, (os.cpu_count() or 2) // 2)))
+
+# hashes running + waiting beyond which requests are shed with a 503
+PASSWORD_QUEUE_LIMIT = int(os.getenv("PASSWORD_QUEUE_LIMIT", max(1, PASSWORD_POOL_SIZE) * 4))
+
+# seconds a request waits for its hash before giving up (503)
+PASSWORD_HASH_TIMEOUT = float(os.getenv("PASSWORD_HASH_TIMEOUT", 5))
+
+
+class PasswordPoolBusy(Exception):
+    """
+    Too many hashes queued (or the pool did not answer in time).
+    The caller should answer 503 + Retry-After instead of waiting.
+    """
+
+
+def _parameters(method):
+    """
+    Cost parameters of a werkzeug method string with its defaults filled
+    in, so "scrypt" and "scrypt:32768:8:1" compare equal.
+    """
+    name, *args = method.split(":")
+    if name == "scrypt":
+        return (name, *(map(int, args) if args else (2**15, 8, 1)))
+    if name == "pbkdf2":
+        hash_name = args[0] if args else "sha256"
+        iterations = int(args[1]) if len(args) > 1 else DEFAULT_PBKDF2_ITERATIONS
+        return (name, hash_name, iterations)
+    return (name, *args)
+
+
+# module-level so the pool can pickle them
+def _hash(password, method):
+    return generate_password_hash(password, method=method)
+
+
+def _verify(stored, password, method):
+    if not check_password_hash(stored, password):
+        return False, None
+    # stored is "scrypt:32768:8:1$salt$hash"
+    if _parameters(stored.split("$", 1)[0]) == _parameters(method):
+        return True, None
+    return True, generate_password_hash(password, method=method)
+
+
+class PasswordService:
+    """
+    Password hashing off the request threads: every hash / check runs in a
+    small per-worker process pool, so a login burst costs a bounded amount
+    of CPU and cannot starve the threads serving barcode scans.
+
+    At most PASSWORD_QUEUE_LIMIT hashes are in flight per worker; beyond
+    that (or after PASSWORD_HASH_TIMEOUT) PasswordPoolBusy is raised right
+    away so the client backs off instead of queueing.
+    """
+
+    # (pid, pool, slots)
+    _state = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def hash(password):
+        return PasswordService._run(_hash, password, PASSWORD_HASH_METHOD)
+
+    @staticmethod
+    def verify(stored, password):
+        """
+        (ok, new_hash): new_hash is the password re-hashed with the current
+        parameters when stored was made with older ones (save it), else None.
+        """
+        if not stored or not password:
+            return False, None
+        return PasswordService._run(_verify, stored, password, PASSWORD_HASH_METHOD)
+
+    @staticmethod
+    def _run(fn, *args):
+        if PASSWORD_POOL_SIZE <= 0:
+            return fn(*args)
+
+        pool, slots = PasswordService._executor()
+        if not slots.acquire(blocking=False):
+            raise PasswordPoolBusy("Too many logins in progress, retry shortly")
+
+        try:
+            future = pool.submit(fn, *args)
+        except (BrokenProcessPool, RuntimeError):  # broken / just shut down
+            slots.release()
+            PasswordService._reset(pool)
+            raise PasswordPoolBusy("Password hashing restarting, retry shortly")
+
+        # the slot is freed when the hash finishes, not when we stop waiting
+        future.add_done_callback(lambda _: slots.release())
+        try:
+            return future.result(timeout=PASSWORD_HASH_TIMEOUT)
+        except TimeoutError:
+            raise PasswordPoolBusy("Password hashing timed out, retry shortly")
+        except BrokenProcessPool:
+            PasswordService._reset(pool)
+            raise PasswordPoolBusy("Password hashing restarting, retry shortly")
+
+    @staticmethod
+    def _executor():
+        # one pool per process: gunicorn forks workers after import
+        pid = os.getpid()
+        state = PasswordService._state
+        if state is None or state[0] != pid:
+            with PasswordService._lock:
+                state = PasswordService._state
+                if state is None or state[0] != pid:
+                    # forkserver: hashing processes do not inherit the
+                    # worker's threads, locks or DB connections
+                    context = multiprocessing.get_context("forkserver")
+                    context.set_forkserver_preload([__name__])
+                    state = (
+                        pid,
+                        ProcessPoolExecutor(
+                            max_workers=PASSWORD_POOL_SIZE,
+                            mp_context=context
+                        ),
+                        threading.BoundedSemaphore(PASSWORD_QUEUE_LIMIT),
+                    )
+                    PasswordService._state = state
+        return state[1], state[2]
+
+    @staticmethod
+    def _reset(pool):
+        # a hashing process died: the next call starts a fresh pool
+        with PasswordService._lock:
+            state = PasswordService._state
+            if state is None or state[1] is not pool:
+                return
+            PasswordService._state = None
+        pool.shutdown(wait=False, cancel_futures=True)
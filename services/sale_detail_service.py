@@ -0,0 +1,181 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from db import db
+from models.item import Item
+from models.sales_transaction import SalesTransaction
+from models.sales_transaction_item import SalesTransactionItem
+from services.notification_listener import notification_listener
+from utils.cache import MISSING, TTLCache
+
+# Postgres NOTIFY channel for edited / deleted sales
+# (see services/notification_listener.py)
+SALE_CHANGES_CHANNEL = "sale_changes"
+
+SALE_DETAIL_CACHE_SIZE = int(os.getenv("SALE_DETAIL_CACHE_SIZE", 4096))
+
+# safety net if an eviction NOTIFY is lost; receipts rarely change
+SALE_DETAIL_CACHE_TTL = float(os.getenv("SALE_DETAIL_CACHE_TTL", 3600))
+
+_PENDING_KEY = "changed_transaction_ids"
+
+_cache = TTLCache(ttl=SALE_DETAIL_CACHE_TTL, maxsize=SALE_DETAIL_CACHE_SIZE)
+
+# bumped on every eviction so a payload read concurrently with an edit is
+# not cached after the fact
+_generation = 0
+_generation_lock = threading.Lock()
+
+
+def lines_by_transaction(transaction_ids):
+    """
+    Sale lines (with item name/category) of the given transactions in ONE
+    query, grouped by transaction id.
+    """
+    query = (
+        db.session.query(
+            SalesTransactionItem.transaction_id,
+            SalesTransactionItem.item_id,
+            Item.name,
+            Item.category,
+            SalesTransactionItem.quantity,
+            SalesTransactionItem.price_at_sale,
+        )
+        .join(Item, Item.id == SalesTransactionItem.item_id)
+        .filter(SalesTransactionItem.transaction_id.in_(transaction_ids))
+        .order_by(SalesTransactionItem.id)
+    )
+
+    lines = {}
+    for row in query:
+        lines.setdefault(row.transaction_id, []).append({
+            "item_id": row.item_id,
+            "item_name": row.name,
+            "category": row.category,
+            "quantity": row.quantity,
+            "price_at_sale": float(row.price_at_sale)
+        })
+    return lines
+
+
+class SaleDetailService:
+    """
+    GET /sales/<id> payloads, serialized once and kept in a bounded LRU.
+
+    A sale only changes through CheckoutService (revise / void), which
+    calls sales_changed() before committing: this worker evicts right after
+    the commit, other workers when the NOTIFY reaches their listener.
+    """
+
+    @staticmethod
+    def get(transaction_id):
+        """
+        (payload, etag) for the sale, or None if it does not exist.
+        """
+        cached = _cache.get(transaction_id)
+        if cached is not MISSING:
+            return cached
+
+        generation = _generation
+        t = (
+            db.session.query(
+                SalesTransaction.id, SalesTransaction.date, SalesTransaction.user_id,
+                SalesTransaction.total_amount, SalesTransaction.line_count,
+            )
+            .filter(SalesTransaction.id == transaction_id)
+            .first()
+        )
+        if t is None:
+            return None
+
+        payload = {
+            "transaction_id": t.id,
+            "date": t.date.isoformat(),
+            "user_id": t.user_id,
+            "total_amount": float(t.total_amount),
+            "line_count": t.line_count,
+            "items": lines_by_transaction([t.id]).get(t.id, []),
+        }
+        digest = hashlib.sha1(
+            json.dumps(payload, sort_keys=True).encode()
+        ).hexdigest()[:16]
+        entry = (payload, f"{t.id}-{digest}")
+
+        with _generation_lock:
+            if generation == _generation:
+                _cache.set(transaction_id, entry)
+        return entry
+
+    @staticmethod
+    def sales_changed(transaction_ids, notify=True):
+        """
+        Evict these sales once the current transaction commits. Call BEFORE
+        commit. notify=False skips the cross-worker NOTIFY (new sales cannot
+        be cached anywhere yet).
+        """
+        ids = sorted({int(i) for i in transaction_ids})
+        if not ids:
+            return
+
+        db.session.info.setdefault(_PENDING_KEY, set()).update(ids)
+
+        if notify and db.session.get_bind().dialect.name == "postgresql":
+            db.session.execute(
+                text("SELECT pg_notify(:channel, :payload)"),
+                {
+                    "channel": SALE_CHANGES_CHANNEL,
+                    "payload": json.dumps({"ids": ids, "ts": time.time()}),
+                }
+            )
+
+    @staticmethod
+    def evict(transaction_ids):
+        global _generation
+        with _generation_lock:
+            _generation += 1
+            for transaction_id in transaction_ids:
+                _cache.pop(transaction_id)
+
+    @staticmethod
+    def clear():
+        # evictions may have been missed (listener reconnecting)
+        global _generation
+        with _generation_lock:
+            _generation += 1
+            _cache.clear()
+
+    @staticmethod
+    def stats():
+        return {
+            "entries": len(_cache),
+            "max_entries": _cache.maxsize,
+            "hits": _cache.hits,
+            "misses": _cache.misses,
+        }
+
+
+@notification_listener.subscribe(SALE_CHANGES_CHANNEL)
+def _on_sale_changes(payload):
+    SaleDetailService.evict(payload.get("ids", []))
+
+
+# evictions may have been missed while the listener was reconnecting
+notification_listener.on_connect(SaleDetailService.clear)
+
+
+@event.listens_for(Session, "after_commit")
+def _evict_committed(session):
+    ids = session.info.pop(_PENDING_KEY, None)
+    if ids:
+        SaleDetailService.evict(ids)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session):
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,217 @@
+import os
+import threading
+from datetime import datetime, time, timedelta
+
+from sqlalchemy import Integer, cast, extract, func
+
+from db import db
+from models.item import Item
+from models.sales_daily_rollup import ALL_USERS, SalesDailyRollup
+from models.sales_transaction import SalesTransaction
+from models.sales_transaction_item import SalesTransactionItem
+from services.notification_listener import notification_listener
+from services.sales_rollup_service import SalesRollupService
+from utils.cache import MISSING, TTLCache
+from utils.item_validation import CATEGORIES
+
+ANALYTICS_TTL = float(os.getenv("SALES_ANALYTICS_TTL", 300))
+
+GROUP_BYS = ("day", "hour", "weekday", "category", "item")
+
+WEEKDAYS = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+
+_cache = TTLCache(ttl=ANALYTICS_TTL, maxsize=256)
+
+# bumped on every invalidation so a result computed concurrently with a
+# sale is not cached after the fact
+_generation = 0
+_generation_lock = threading.Lock()
+
+
+# runs after local commits and for other workers' sales (NOTIFY)
+@SalesRollupService.on_sales_changed
+def _invalidate(days):
+    # only windows that contain one of the changed PH days go stale
+    global _generation
+
+    def overlaps(key):
+        _, start, end = key
+        return any(
+            (start is None or start < datetime.combine(day, time.min) + timedelta(days=1))
+            and (end is None or end > datetime.combine(day, time.min))
+            for day in days
+        )
+
+    with _generation_lock:
+        _generation += 1
+        _cache.discard_where(overlaps)
+
+
+@notification_listener.on_connect
+def _clear():
+    # changes may have been missed while the listener was reconnecting
+    global _generation
+    with _generation_lock:
+        _generation += 1
+        _cache.clear()
+
+
+def _is_midnight(value):
+    return value is None or value.time() == time.min
+
+
+def _hour(column):
+    if db.session.get_bind().dialect.name == "postgresql":
+        return cast(extract("hour", column), Integer)
+    return cast(func.strftime("%H", column), Integer)
+
+
+def _weekday(column):
+    # 0 = Monday ... 6 = Sunday on every backend
+    if db.session.get_bind().dialect.name == "postgresql":
+        return cast(extract("isodow", column), Integer) - 1
+    return (cast(func.strftime("%w", column), Integer) + 6) % 7
+
+
+def _day_key(value):
+    return value.isoformat() if hasattr(value, "isoformat") else str(value)
+
+
+class SalesAnalyticsService:
+    """
+    Units and revenue grouped by day / hour / weekday / category / item,
+    aggregated in SQL. Day-aligned windows read the daily rollup (a few
+    rows per day); hourly grouping and windows with a time of day read the
+    raw sale lines. Sales dates are PH time, so all buckets are PH time.
+    """
+
+    @staticmethod
+    def report(group_by, start=None, end=None):
+        if group_by not in GROUP_BYS:
+            raise ValueError(f"group_by must be one of: {', '.join(GROUP_BYS)}")
+
+        key = (group_by, start, end)
+        report = _cache.get(key)
+        if report is not MISSING:
+            return report
+
+        generation = _generation
+        use_rollup = group_by != "hour" and _is_midnight(start) and _is_midnight(end)
+        rows = (
+            SalesAnalyticsService._from_rollup(group_by, start, end)
+            if use_rollup else
+            SalesAnalyticsService._from_lines(group_by, start, end)
+        )
+
+        buckets = SalesAnalyticsService._buckets(group_by, rows)
+        report = {
+            "group_by": group_by,
+            "from": start.isoformat() if start else None,
+            "to": end.isoformat() if end else None,
+            "source": "rollup" if use_rollup else "lines",
+            "total_units": sum(b["units"] for b in buckets),
+            "total_revenue": round(sum(b["revenue"] for b in buckets), 2),
+            "rows": buckets,
+        }
+
+        with _generation_lock:
+            if generation == _generation:
+                _cache.set(key, report)
+        return report
+
+    @staticmethod
+    def _from_rollup(group_by, start, end):
+        units = func.sum(SalesDailyRollup.quantity)
+        revenue = func.sum(SalesDailyRollup.revenue)
+
+        if group_by == "day":
+            keys = (SalesDailyRollup.day,)
+        elif group_by == "weekday":
+            keys = (_weekday(SalesDailyRollup.day),)
+        elif group_by == "category":
+            keys = (Item.category,)
+        else:
+            keys = (SalesDailyRollup.item_id, Item.name, Item.category)
+
+        query = (
+            db.session.query(*keys, units, revenue)
+            .filter(SalesDailyRollup.user_id == ALL_USERS)
+        )
+        if group_by in ("category", "item"):
+            query = query.outerjoin(Item, Item.id == SalesDailyRollup.item_id)
+        if start:
+            query = query.filter(SalesDailyRollup.day >= start.date())
+        if end:
+            query = query.filter(SalesDailyRollup.day < end.date())
+
+        return query.group_by(*keys).all()
+
+    @staticmethod
+    def _from_lines(group_by, start, end):
+        units = func.sum(SalesTransactionItem.quantity)
+        revenue = func.sum(SalesTransactionItem.quantity * SalesTransactionItem.price_at_sale)
+
+        if group_by == "day":
+            keys = (func.date(SalesTransaction.date),)
+        elif group_by == "hour":
+            keys = (_hour(SalesTransaction.date),)
+        elif group_by == "weekday":
+            keys = (_weekday(SalesTransaction.date),)
+        elif group_by == "category":
+            keys = (Item.category,)
+        else:
+            keys = (SalesTransactionItem.item_id, Item.name, Item.category)
+
+        query = (
+            db.session.query(*keys, units, revenue)
+            .select_from(SalesTransaction)
+            .join(SalesTransactionItem, SalesTransactionItem.transaction_id == SalesTransaction.id)
+        )
+        if group_by in ("category", "item"):
+            query = query.outerjoin(Item, Item.id == SalesTransactionItem.item_id)
+        if start:
+            query = query.filter(SalesTransaction.date >= start)
+        if end:
+            query = query.filter(SalesTransaction.date < end)
+
+        return query.group_by(*keys).all()
+
+    @staticmethod
+    def _buckets(group_by, rows):
+        def totals(units, revenue):
+            return {"units": int(units or 0), "revenue": round(float(revenue or 0), 2)}
+
+        if group_by == "day":
+            return sorted(
+                ({"day": _day_key(day), **totals(u, r)} for day, u, r in rows),
+                key=lambda b: b["day"]
+            )
+
+        if group_by == "hour":
+            found = {int(hour): (u, r) for hour, u, r in rows}
+            return [{"hour": h, **totals(*found.get(h, (0, 0)))} for h in range(24)]
+
+        if group_by == "weekday":
+            found = {int(wd): (u, r) for wd, u, r in rows}
+            return [
+                {"weekday": name, **totals(*found.get(i, (0, 0)))}
+                for i, name in enumerate(WEEKDAYS)
+            ]
+
+        if group_by == "category":
+            found = {category: (u, r) for category, u, r in rows}
+            buckets = [
+                {"category": c, **totals(*found.pop(c, (0, 0)))} for c in CATEGORIES
+            ]
+            # sales of items deleted from the catalog since
+            if None in found:
+                buckets.append({"category": None, **totals(*found[None])})
+            return buckets
+
+        return sorted(
+            (
+                {"item_id": item_id, "item_name": name, "category": category, **totals(u, r)}
+                for item_id, name, category, u, r in rows
+            ),
+            key=lambda b: (-b["revenue"], b["item_id"])
+        )
@@ -0,0 +1,125 @@
+import csv
+import io
+import json
+import os
+import zlib
+
+from db import db
+from models.item import Item
+from models.sales_transaction import SalesTransaction
+from models.sales_transaction_item import SalesTransactionItem
+
+EXPORT_BATCH_SIZE = int(os.getenv("SALES_EXPORT_BATCH_SIZE", 2000))
+
+# bytes buffered before a chunk is written out (and gzip-compressed)
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+EXPORT_COLUMNS = (
+    "transaction_id", "date", "user_id", "item_id", "item_name",
+    "category", "quantity", "price_at_sale", "line_total",
+)
+
+
+class SalesExportService:
+    """
+    Flat sale-line export (transaction × line × item) for finance and ML.
+
+    One SQL statement, read through a server-side cursor (yield_per) and
+    written out in fixed-size chunks, so memory stays flat no matter how
+    many lines are exported.
+    """
+
+    @staticmethod
+    def query(start=None, end=None):
+        query = (
+            db.session.query(
+                SalesTransaction.id.label("transaction_id"),
+                SalesTransaction.date,
+                SalesTransaction.user_id,
+                SalesTransactionItem.item_id,
+                Item.name.label("item_name"),
+                Item.category,
+                SalesTransactionItem.quantity,
+                SalesTransactionItem.price_at_sale,
+            )
+            .join(SalesTransactionItem, SalesTransactionItem.transaction_id == SalesTransaction.id)
+            .outerjoin(Item, Item.id == SalesTransactionItem.item_id)
+        )
+        if start:
+            query = query.filter(SalesTransaction.date >= start)
+        if end:
+            query = query.filter(SalesTransaction.date < end)
+
+        return (
+            query
+            .order_by(SalesTransaction.date, SalesTransaction.id, SalesTransactionItem.id)
+            .execution_options(yield_per=EXPORT_BATCH_SIZE)
+        )
+
+    @staticmethod
+    def stream(start=None, end=None, fmt="csv", compress=False):
+        """
+        Yield the export as bytes chunks (gzip-compressed if asked).
+        """
+        rows = SalesExportService._lines(SalesExportService.query(start, end), fmt)
+        chunks = SalesExportService._chunked(rows)
+        if compress:
+            chunks = SalesExportService._gzip(chunks)
+        return chunks
+
+    @staticmethod
+    def _lines(rows, fmt):
+        if fmt == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(EXPORT_COLUMNS)
+            for row in rows:
+                writer.writerow(_flatten(row))
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+            yield buffer.getvalue()
+        else:
+            for row in rows:
+                yield json.dumps(dict(zip(EXPORT_COLUMNS, _flatten(row)))) + "\n"
+
+    @staticmethod
+    def _chunked(lines):
+        parts, size = [], 0
+        for line in lines:
+            parts.append(line)
+            size += len(line)
+            if size >= EXPORT_CHUNK_BYTES:
+                yield "".join(parts).encode()
+                parts, size = [], 0
+        if parts:
+            yield "".join(parts).encode()
+
+    @staticmethod
+    def _gzip(chunks):
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        for chunk in chunks:
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.flush()
+
+
+def _flatten(row):
+    price = float(row.price_at_sale)
+    return (
+        row.transaction_id,
+        row.date.isoformat(),
+        row.user_id,
+        row.item_id,
+        row.item_name,
+        row.category,
+        row.quantity,
+        price,
+        round(price * row.quantity, 2),
+    )
@@ -0,0 +1,309 @@
+import json
+import os
+import time as clock
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from sqlalchemy import delete, event, func, insert, literal, or_, select, text, update
+from sqlalchemy.orm import Session
+
+from db import db
+from models.sales_daily_rollup import ALL_USERS, SalesDailyRollup
+from models.sales_transaction import SalesTransaction
+from models.sales_transaction_item import SalesTransactionItem
+from services.notification_listener import notification_listener
+
+REBUILD_CHUNK_DAYS = int(os.getenv("SALES_ROLLUP_CHUNK_DAYS", 31))
+
+# Postgres NOTIFY channel carrying the PH days whose sales changed, so every
+# worker runs its on_sales_changed callbacks (see notification_listener)
+SALES_DAYS_CHANNEL = "sales_days_changed"
+
+# keep NOTIFY payloads well under the 8000 byte limit
+NOTIFY_CHUNK_DAYS = 300
+
+_PENDING_KEY = "changed_sales_days"
+
+# sales update the rollup under this lock in shared mode and rebuild() takes
+# it exclusively per chunk, so no sale can commit between a chunk's DELETE
+# and its re-aggregation (and be counted twice or dropped)
+ROLLUP_LOCK_KEY = 7421004
+
+# callables taking a set of PH days whose sales changed, run after commit
+_local_listeners = []
+
+
+class SalesRollupService:
+    """
+    sales_daily_rollup: quantity + revenue per (PH day, item, customer),
+    plus an ALL_USERS row per (day, item).
+
+    Writers call record() inside their own transaction, so the rollup can
+    never disagree with the committed sales lines. rebuild() recomputes it
+    from the raw lines in bounded day ranges (backfill / repair).
+    """
+
+    @staticmethod
+    def on_sales_changed(fn):
+        """
+        Register a callback taking the set of days whose sales changed.
+        It runs in every worker: in the writing one after its commit, in
+        the others when the NOTIFY arrives.
+        """
+        _local_listeners.append(fn)
+        return fn
+
+    # --------------------------------------------------
+    # INCREMENTAL (same transaction as the sale)
+    # --------------------------------------------------
+    @staticmethod
+    def record(sale_date, user_id, lines, sign=1):
+        """
+        lines: iterable of (item_id, quantity, price_at_sale)
+        sign=-1 removes lines (transaction edited or deleted); a negative
+        quantity does the same for a single line.
+        """
+        SalesRollupService.record_many([(sale_date, user_id, lines)], sign)
+
+    @staticmethod
+    def record_many(sales, sign=1):
+        """
+        Like record() for many sales at once: [(sale_date, user_id, lines)]
+        becomes ONE upsert however many sales, days and customers it spans.
+        """
+        deltas = {}
+        for sale_date, user_id, lines in sales:
+            day = sale_date.date()
+            for item_id, qty, price in lines:
+                revenue = sign * qty * Decimal(str(price))
+                for uid in {ALL_USERS, user_id or ALL_USERS}:
+                    key = (day, item_id, uid)
+                    total_qty, total_rev = deltas.get(key, (0, Decimal(0)))
+                    deltas[key] = (total_qty + sign * qty, total_rev + revenue)
+
+        rows = [
+            {
+                "day": day, "item_id": item_id, "user_id": uid,
+                "quantity": qty, "revenue": revenue,
+            }
+            for (day, item_id, uid), (qty, revenue) in sorted(deltas.items())
+            if qty or revenue
+        ]
+        if not rows:
+            return
+
+        _lock(shared=True)
+        SalesRollupService._upsert(rows)
+        days = {row["day"] for row in rows}
+        db.session.info.setdefault(_PENDING_KEY, set()).update(days)
+
+        if any(row["quantity"] < 0 for row in rows):
+            # drop rows that no longer hold any sales
+            db.session.execute(
+                delete(SalesDailyRollup).where(
+                    SalesDailyRollup.day.in_(days),
+                    SalesDailyRollup.item_id.in_({r["item_id"] for r in rows}),
+                    SalesDailyRollup.quantity <= 0,
+                )
+            )
+
+    @staticmethod
+    def _upsert(rows):
+        # rows are sorted by key, so concurrent sales lock them in one order
+        dialect = db.session.get_bind().dialect.name
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as upsert
+        elif dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as upsert
+        else:
+            upsert = None
+
+        if upsert is not None:
+            stmt = upsert(SalesDailyRollup)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["day", "item_id", "user_id"],
+                set_={
+                    "quantity": SalesDailyRollup.quantity + stmt.excluded.quantity,
+                    "revenue": SalesDailyRollup.revenue + stmt.excluded.revenue,
+                }
+            )
+            db.session.execute(stmt, rows)
+            return
+
+        for row in rows:
+            updated = db.session.execute(
+                update(SalesDailyRollup)
+                .where(
+                    SalesDailyRollup.day == row["day"],
+                    SalesDailyRollup.item_id == row["item_id"],
+                    SalesDailyRollup.user_id == row["user_id"],
+                )
+                .values(
+                    quantity=SalesDailyRollup.quantity + row["quantity"],
+                    revenue=SalesDailyRollup.revenue + row["revenue"],
+                )
+            )
+            if not updated.rowcount:
+                db.session.execute(insert(SalesDailyRollup), [row])
+
+    # --------------------------------------------------
+    # BACKFILL / REBUILD (bounded chunks)
+    # --------------------------------------------------
+    @staticmethod
+    def rebuild(start=None, end=None, chunk_days=REBUILD_CHUNK_DAYS, log=print):
+        """
+        Recompute the rollup for days in [start, end) from the raw sales
+        lines, chunk_days at a time, one transaction per chunk.
+        No bounds = the whole history (and stale rows outside it are dropped).
+        """
+        full = start is None and end is None
+        first, last = db.session.query(
+            func.min(SalesTransaction.date), func.max(SalesTransaction.date)
+        ).one()
+
+        if first is None:
+            if full:
+                _lock(shared=False)
+                db.session.execute(delete(SalesDailyRollup))
+                db.session.commit()
+            log("No sales to roll up")
+            return 0
+
+        start = start or first.date()
+        end = end or last.date() + timedelta(days=1)
+
+        if full:
+            _lock(shared=False)
+            db.session.execute(
+                delete(SalesDailyRollup).where(
+                    or_(SalesDailyRollup.day < start, SalesDailyRollup.day >= end)
+                )
+            )
+            db.session.commit()
+
+        total = 0
+        chunk_start = start
+        while chunk_start < end:
+            chunk_end = min(chunk_start + timedelta(days=chunk_days), end)
+            total += SalesRollupService._rebuild_chunk(chunk_start, chunk_end)
+            db.session.info.setdefault(_PENDING_KEY, set()).update(
+                chunk_start + timedelta(days=n)
+                for n in range((chunk_end - chunk_start).days)
+            )
+            db.session.commit()
+            log(f"Rolled up {chunk_start} → {chunk_end - timedelta(days=1)}")
+            chunk_start = chunk_end
+
+        return total
+
+    @staticmethod
+    def _rebuild_chunk(start, end):
+        # held until the chunk commits: sales wait, and the chunk waits for
+        # sales already writing the rollup
+        _lock(shared=False)
+        db.session.execute(
+            delete(SalesDailyRollup).where(
+                SalesDailyRollup.day >= start, SalesDailyRollup.day < end
+            )
+        )
+
+        day = func.date(SalesTransaction.date)
+        lines = (
+            select(
+                day.label("day"),
+                SalesTransactionItem.item_id,
+                SalesTransaction.user_id,
+                SalesTransactionItem.quantity,
+                (SalesTransactionItem.quantity * SalesTransactionItem.price_at_sale).label("revenue"),
+            )
+            .join(SalesTransactionItem, SalesTransactionItem.transaction_id == SalesTransaction.id)
+            .where(
+                SalesTransaction.date >= _midnight(start),
+                SalesTransaction.date < _midnight(end),
+            )
+            .subquery()
+        )
+
+        per_user = (lines.c.day, lines.c.item_id, lines.c.user_id)
+        all_users = (lines.c.day, lines.c.item_id)
+
+        inserted = 0
+        for group in (per_user, all_users):
+            user_column = lines.c.user_id if group is per_user else literal(ALL_USERS)
+            grouped = (
+                select(
+                    lines.c.day,
+                    lines.c.item_id,
+                    user_column,
+                    func.sum(lines.c.quantity),
+                    func.sum(lines.c.revenue),
+                )
+                .group_by(*group)
+            )
+            inserted += db.session.execute(
+                insert(SalesDailyRollup).from_select(
+                    ["day", "item_id", "user_id", "quantity", "revenue"], grouped
+                )
+            ).rowcount or 0
+        return inserted
+
+
+def _lock(shared):
+    if db.session.get_bind().dialect.name != "postgresql":
+        return
+    fn = "pg_advisory_xact_lock_shared" if shared else "pg_advisory_xact_lock"
+    db.session.execute(text(f"SELECT {fn}(:key)"), {"key": ROLLUP_LOCK_KEY})
+
+
+def _dispatch_local(days):
+    for fn in _local_listeners:
+        try:
+            fn(days)
+        except Exception as e:
+            print("WARNING: sales change listener failed:", e)
+
+
+@event.listens_for(Session, "before_commit")
+def _notify_days(session):
+    # one NOTIFY per transaction, delivered only if it commits
+    if session.in_nested_transaction():
+        return
+    days = session.info.get(_PENDING_KEY)
+    if not days or session.get_bind().dialect.name != "postgresql":
+        return
+
+    days = sorted(d.isoformat() for d in days)
+    for start in range(0, len(days), NOTIFY_CHUNK_DAYS):
+        session.execute(
+            text("SELECT pg_notify(:channel, :payload)"),
+            {
+                "channel": SALES_DAYS_CHANNEL,
+                "payload": json.dumps({
+                    "days": days[start:start + NOTIFY_CHUNK_DAYS],
+                    "ts": clock.time(),
+                }),
+            }
+        )
+
+
+@event.listens_for(Session, "after_commit")
+def _run_local_listeners(session):
+    days = session.info.pop(_PENDING_KEY, None)
+    if days:
+        _dispatch_local(days)
+
+
+@notification_listener.subscribe(SALES_DAYS_CHANNEL)
+def _on_sales_days(payload):
+    days = {date.fromisoformat(d) for d in payload.get("days", [])}
+    if days:
+        _dispatch_local(days)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session):
+    session.info.pop(_PENDING_KEY, None)
+
+
+def _midnight(day):
+    return datetime.combine(day, time.min)
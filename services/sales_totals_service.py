@@ -0,0 +1,112 @@
+import os
+
+from sqlalchemy import func, select, update
+
+from db import db
+from models.sales_transaction import SalesTransaction
+from models.sales_transaction_item import SalesTransactionItem
+
+TOTALS_CHUNK_SIZE = int(os.getenv("SALES_TOTALS_CHUNK_SIZE", 5000))
+
+# mismatching ids listed by the checker (the count is always exact)
+CHECK_SAMPLE_SIZE = 20
+
+
+def _line_amount():
+    return SalesTransactionItem.quantity * SalesTransactionItem.price_at_sale
+
+
+class SalesTotalsService:
+    """
+    sales_transactions.total_amount / line_count are written together with
+    the lines. This recomputes them from the lines (backfill, repair) and
+    verifies them, id range by id range, one transaction per chunk.
+    """
+
+    @staticmethod
+    def backfill(chunk_size=TOTALS_CHUNK_SIZE, log=print):
+        """
+        Recompute every transaction's totals. Returns rows updated.
+        """
+        updated = 0
+        for lo, hi in SalesTotalsService._id_ranges(chunk_size):
+            updated += SalesTotalsService._recompute(
+                (SalesTransaction.id >= lo, SalesTransaction.id < hi)
+            )
+            db.session.commit()
+            log(f"Totals recomputed for ids {lo} → {hi - 1}")
+        return updated
+
+    @staticmethod
+    def check(chunk_size=TOTALS_CHUNK_SIZE, fix=False, log=print):
+        """
+        Compare stored totals with the lines. Returns (mismatch count,
+        sample ids); fix=True recomputes the mismatching rows as it goes.
+        """
+        count, sample = 0, []
+        for lo, hi in SalesTotalsService._id_ranges(chunk_size):
+            lines = (
+                select(
+                    SalesTransactionItem.transaction_id,
+                    func.sum(_line_amount()).label("total"),
+                    func.count(SalesTransactionItem.id).label("lines"),
+                )
+                .where(
+                    SalesTransactionItem.transaction_id >= lo,
+                    SalesTransactionItem.transaction_id < hi,
+                )
+                .group_by(SalesTransactionItem.transaction_id)
+                .subquery()
+            )
+            bad = db.session.scalars(
+                select(SalesTransaction.id)
+                .outerjoin(lines, lines.c.transaction_id == SalesTransaction.id)
+                .where(
+                    SalesTransaction.id >= lo,
+                    SalesTransaction.id < hi,
+                    (SalesTransaction.total_amount != func.coalesce(lines.c.total, 0))
+                    | (SalesTransaction.line_count != func.coalesce(lines.c.lines, 0)),
+                )
+                .order_by(SalesTransaction.id)
+            ).all()
+
+            if bad:
+                count += len(bad)
+                sample.extend(bad[:CHECK_SAMPLE_SIZE - len(sample)])
+                log(f"⚠️ {len(bad)} mismatching totals in ids {lo} → {hi - 1}")
+                if fix:
+                    SalesTotalsService._recompute((SalesTransaction.id.in_(bad),))
+                    db.session.commit()
+            else:
+                db.session.rollback()  # end the read transaction per chunk
+
+        return count, sample
+
+    @staticmethod
+    def _recompute(where):
+        total = (
+            select(func.coalesce(func.sum(_line_amount()), 0))
+            .where(SalesTransactionItem.transaction_id == SalesTransaction.id)
+            .scalar_subquery()
+        )
+        lines = (
+            select(func.count(SalesTransactionItem.id))
+            .where(SalesTransactionItem.transaction_id == SalesTransaction.id)
+            .scalar_subquery()
+        )
+        return db.session.execute(
+            update(SalesTransaction)
+            .where(*where)
+            .values(total_amount=total, line_count=lines),
+            execution_options={"synchronize_session": False}
+        ).rowcount
+
+    @staticmethod
+    def _id_ranges(chunk_size):
+        first, last = db.session.query(
+            func.min(SalesTransaction.id), func.max(SalesTransaction.id)
+        ).one()
+        if first is None:
+            return
+        for lo in range(first, last + 1, chunk_size):
+            yield lo, min(lo + chunk_size, last + 1)
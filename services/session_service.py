@@ -0,0 +1,203 @@
+import hashlib
+import os
+import random
+import secrets
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, insert, select, text, update
+
+from db import db
+from models.user import User
+from models.user_session import UserSession
+from services.user_cache_service import UserCacheService
+
+SESSION_TTL = timedelta(days=int(os.getenv("SESSION_TTL_DAYS", 7)))
+
+# oldest (least recently used) sessions beyond this are dropped on login
+MAX_SESSIONS_PER_USER = int(os.getenv("MAX_SESSIONS_PER_USER", 10))
+
+# background sweep of expired sessions: every SESSION_SWEEP_INTERVAL
+# seconds, SESSION_SWEEP_BATCH rows per transaction
+SESSION_SWEEP_INTERVAL = float(os.getenv("SESSION_SWEEP_INTERVAL", 3600))
+SESSION_SWEEP_BATCH = int(os.getenv("SESSION_SWEEP_BATCH", 5000))
+
+# only one worker sweeps at a time
+SESSION_SWEEP_LOCK_KEY = 7421003
+
+# longest device metadata kept (see models/user_session.py)
+_METADATA_LENGTHS = {"device_name": 100, "user_agent": 255, "ip_address": 45}
+
+
+def hash_token(token):
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class SessionService:
+    """
+    Refresh tokens, one user_sessions row per logged-in device.
+
+    The token is random and only its sha256 is stored, so refresh and
+    logout are each ONE statement on the unique token_hash index, and
+    logging in never writes the users row. Expired rows are deleted in
+    bulk by sweep(), which init_app() runs in a background thread.
+    """
+
+    _app = None
+    _sweeper_started = False
+
+    @staticmethod
+    def create(user_id, device_name=None, user_agent=None, ip_address=None):
+        """
+        Stage a new session (caller commits). Returns the refresh token.
+        """
+        token = secrets.token_urlsafe(32)
+        now = datetime.utcnow()
+        metadata = {
+            "device_name": device_name,
+            "user_agent": user_agent,
+            "ip_address": ip_address,
+        }
+
+        db.session.execute(
+            insert(UserSession),
+            [{
+                "user_id": user_id,
+                "token_hash": hash_token(token),
+                "created_at": now,
+                "last_used_at": now,
+                "expires_at": now + SESSION_TTL,
+                **{
+                    key: str(value)[:_METADATA_LENGTHS[key]] if value else None
+                    for key, value in metadata.items()
+                },
+            }]
+        )
+
+        keep = (
+            select(UserSession.id)
+            .where(UserSession.user_id == user_id)
+            .order_by(UserSession.last_used_at.desc(), UserSession.id.desc())
+            .limit(MAX_SESSIONS_PER_USER)
+        )
+        db.session.execute(
+            delete(UserSession).where(
+                UserSession.user_id == user_id,
+                UserSession.id.not_in(keep.scalar_subquery()),
+            ),
+            execution_options={"synchronize_session": False}
+        )
+        return token
+
+    @staticmethod
+    def refresh(token):
+        """
+        user_id of the live session for this refresh token, or None.
+        Stages the last_used_at touch (caller commits).
+        """
+        now = datetime.utcnow()
+        return db.session.execute(
+            update(UserSession)
+            .where(UserSession.token_hash == hash_token(token), UserSession.expires_at > now)
+            .values(last_used_at=now)
+            .returning(UserSession.user_id),
+            execution_options={"synchronize_session": False}
+        ).scalar()
+
+    @staticmethod
+    def revoke(token):
+        """
+        End the session for this refresh token (caller commits) and revoke
+        the user's outstanding access tokens in every worker; the user's
+        other devices mint new ones through /refresh.
+        Returns the user_id, or None if there was no such session.
+        """
+        user_id = db.session.execute(
+            delete(UserSession)
+            .where(UserSession.token_hash == hash_token(token))
+            .returning(UserSession.user_id),
+            execution_options={"synchronize_session": False}
+        ).scalar()
+
+        if user_id is not None:
+            db.session.execute(
+                update(User)
+                .where(User.id == user_id)
+                .values(token_version=User.token_version + 1),
+                execution_options={"synchronize_session": False}
+            )
+            # bulk UPDATE: the ORM revocation hook does not see it
+            UserCacheService.users_changed([user_id])
+        return user_id
+
+    # --------------------------------------------------
+    # EXPIRED SESSION SWEEP
+    # --------------------------------------------------
+    @staticmethod
+    def sweep(batch=SESSION_SWEEP_BATCH, log=None):
+        """
+        Delete expired sessions, batch rows per transaction.
+        Returns the number deleted (0 if another worker is sweeping).
+        """
+        if db.engine.dialect.name != "postgresql":
+            return SessionService._sweep(batch, log)
+
+        # held on its own connection: the batches below commit separately
+        with db.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as lock_conn:
+            locked = lock_conn.execute(
+                text("SELECT pg_try_advisory_lock(:key)"), {"key": SESSION_SWEEP_LOCK_KEY}
+            ).scalar()
+            if not locked:
+                return 0
+            try:
+                return SessionService._sweep(batch, log)
+            finally:
+                lock_conn.execute(
+                    text("SELECT pg_advisory_unlock(:key)"), {"key": SESSION_SWEEP_LOCK_KEY}
+                )
+
+    @staticmethod
+    def _sweep(batch, log):
+        total = 0
+        while True:
+            expired = (
+                select(UserSession.id)
+                .where(UserSession.expires_at <= datetime.utcnow())
+                .limit(batch)
+            )
+            deleted = db.session.execute(
+                delete(UserSession).where(UserSession.id.in_(expired.scalar_subquery())),
+                execution_options={"synchronize_session": False}
+            ).rowcount or 0
+            db.session.commit()
+
+            total += deleted
+            if log and deleted:
+                log(f"Deleted {total} expired sessions so far")
+            if deleted < batch:
+                return total
+
+    @staticmethod
+    def init_app(app):
+        SessionService._app = app
+        if SessionService._sweeper_started or SESSION_SWEEP_INTERVAL <= 0:
+            return
+        SessionService._sweeper_started = True
+
+        threading.Thread(
+            target=SessionService._sweep_forever,
+            name="session-sweeper",
+            daemon=True
+        ).start()
+
+    @staticmethod
+    def _sweep_forever():
+        while True:
+            # jittered so workers started together do not all wake at once
+            time.sleep(SESSION_SWEEP_INTERVAL * random.uniform(0.5, 1.5))
+            try:
+                with SessionService._app.app_context():
+                    SessionService.sweep()
+            except Exception as e:
+                print("WARNING: session sweep failed:", e)
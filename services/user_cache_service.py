@@ -0,0 +1,180 @@
+import json
+import os
+import threading
+import time
+from collections import namedtuple
+
+from sqlalchemy import event, inspect, text
+from sqlalchemy.orm import Session
+
+from db import db
+from models.user import User
+from services.notification_listener import notification_listener
+from utils.cache import MISSING, TTLCache
+
+# Postgres NOTIFY channel for revoked / deleted users
+# (see services/notification_listener.py)
+USER_CHANGES_CHANNEL = "user_changes"
+
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", 10000))
+
+# safety net if an eviction NOTIFY is lost: the longest a revoked token
+# can keep working in another worker
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", 60))
+
+_PENDING_KEY = "changed_user_ids"
+
+_cache = TTLCache(ttl=USER_CACHE_TTL, maxsize=USER_CACHE_SIZE)
+
+# bumped on every eviction so a record read concurrently with a logout /
+# role change is not cached after the fact
+_generation = 0
+_generation_lock = threading.Lock()
+
+# what require_auth puts in g.current_user
+AuthUser = namedtuple("AuthUser", "id username role token_version")
+
+
+class UserCacheService:
+    """
+    The user records require_auth checks access tokens against, kept in a
+    bounded LRU so an authenticated request needs no query in the common
+    case.
+
+    Access tokens carry the role and users.token_version they were minted
+    with. Logout, a role change or deleting the user changes / removes the
+    row through the ORM, and the hooks below evict it: in this worker right
+    after the commit, in other workers when the NOTIFY reaches their
+    listener (or at the latest after USER_CACHE_TTL).
+    """
+
+    @staticmethod
+    def get(user_id, min_version=None):
+        """
+        AuthUser for the id, or None if the user does not exist.
+
+        min_version: a token version the caller has seen; a cached record
+        older than that is stale (its eviction has not arrived yet) and is
+        reloaded.
+        """
+        cached = _cache.get(user_id)
+        if cached is not MISSING and (
+            min_version is None or cached.token_version >= min_version
+        ):
+            return cached
+        return UserCacheService.load(user_id)
+
+    @staticmethod
+    def load(user_id):
+        """
+        Like get(), but always read from the database (and re-cached).
+        Use it when minting tokens: a stale cached role / token_version
+        would produce a token require_auth then rejects.
+        """
+        generation = _generation
+        row = (
+            db.session.query(User.id, User.username, User.role, User.token_version)
+            .filter(User.id == user_id)
+            .first()
+        )
+        if row is None:
+            # not cached: the id cannot come back, and a miss stays cheap
+            return None
+
+        user = AuthUser(*row)
+        with _generation_lock:
+            if generation == _generation:
+                _cache.set(user_id, user)
+        return user
+
+    @staticmethod
+    def users_changed(user_ids, connection=None):
+        """
+        Evict these users once the current transaction commits. Call BEFORE
+        commit (the ORM hooks below do it for every User update / delete).
+        """
+        ids = sorted({int(i) for i in user_ids})
+        if not ids:
+            return
+
+        db.session.info.setdefault(_PENDING_KEY, set()).update(ids)
+
+        connection = connection or db.session.connection()
+        if connection.dialect.name == "postgresql":
+            # delivered only if this transaction commits
+            connection.execute(
+                text("SELECT pg_notify(:channel, :payload)"),
+                {
+                    "channel": USER_CHANGES_CHANNEL,
+                    "payload": json.dumps({"ids": ids, "ts": time.time()}),
+                }
+            )
+
+    @staticmethod
+    def evict(user_ids):
+        global _generation
+        with _generation_lock:
+            _generation += 1
+            for user_id in user_ids:
+                _cache.pop(int(user_id))
+
+    @staticmethod
+    def clear():
+        # evictions may have been missed (listener reconnecting)
+        global _generation
+        with _generation_lock:
+            _generation += 1
+            _cache.clear()
+
+    @staticmethod
+    def stats():
+        return {
+            "entries": len(_cache),
+            "max_entries": _cache.maxsize,
+            "hits": _cache.hits,
+            "misses": _cache.misses,
+        }
+
+
+# --------------------------------------------------
+# REVOCATION HOOKS (every ORM update / delete of a user)
+# --------------------------------------------------
+@event.listens_for(User, "before_update")
+def _revoke_on_change(mapper, connection, target):
+    state = inspect(target)
+    role_changed = state.attrs.role.history.has_changes()
+    version_changed = state.attrs.token_version.history.has_changes()
+
+    if role_changed and not version_changed:
+        # tokens minted with the old role stop working
+        target.token_version = (target.token_version or 0) + 1
+        version_changed = True
+
+    if version_changed:
+        UserCacheService.users_changed([target.id], connection)
+
+
+@event.listens_for(User, "after_delete")
+def _revoke_on_delete(mapper, connection, target):
+    UserCacheService.users_changed([target.id], connection)
+
+
+@notification_listener.subscribe(USER_CHANGES_CHANNEL)
+def _on_user_changes(payload):
+    UserCacheService.evict(payload.get("ids", []))
+
+
+# evictions may have been missed while the listener was reconnecting
+notification_listener.on_connect(UserCacheService.clear)
+
+
+@event.listens_for(Session, "after_commit")
+def _evict_committed(session):
+    ids = session.info.pop(_PENDING_KEY, None)
+    if ids:
+        UserCacheService.evict(ids)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session):
+    session.info.pop(_PENDING_KEY, None)
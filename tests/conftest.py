@@ -0,0 +1,130 @@
+# tests/conftest.py
+# the app against a fresh in-memory SQLite database per test
+#
+#   python -m pytest -q
+#
+# Postgres-only paths (COPY, LISTEN/NOTIFY, advisory locks, pg_trgm) are not
+# exercised here; SQLite takes the portable fallbacks.
+
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SESSION_SWEEP_INTERVAL", "0")  # no background sweeper
+os.environ.setdefault("PASSWORD_POOL_SIZE", "0")      # hash inline
+
+import pytest
+
+from app import app as flask_app
+from db import db
+from models.item import Item
+from models.sales_daily_rollup import ALL_USERS, SalesDailyRollup
+from models.user import User
+from routes.users import create_token
+from services.barcode_index import barcode_index
+from services.low_stock_service import low_stock_watchlist
+from services.password_service import PasswordService
+from services.sale_detail_service import SaleDetailService
+from services.user_cache_service import UserCacheService
+import services.inventory_summary_service as inventory_summary
+import services.item_search_service as item_search
+import services.sales_analytics_service as sales_analytics
+
+
+def _clear_caches():
+    # ids are reused by every fresh database
+    barcode_index.clear()
+    low_stock_watchlist.clear()
+    SaleDetailService.clear()
+    UserCacheService.clear()
+    inventory_summary._cache.clear()
+    item_search._fallback_index.clear()
+    sales_analytics._cache.clear()
+
+
+@pytest.fixture
+def app():
+    flask_app.config["TESTING"] = True
+    with flask_app.app_context():
+        db.create_all()
+        _clear_caches()
+        yield flask_app
+        db.session.remove()
+        db.drop_all()
+        _clear_caches()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def make_user(app):
+    def make(username="customer", role="customer", password="secret"):
+        user = User(username=username, password=PasswordService.hash(password), role=role)
+        db.session.add(user)
+        db.session.commit()
+        return user
+    return make
+
+
+@pytest.fixture
+def login(make_user):
+    """
+    Log a test client in as a new user (access token cookie only).
+    """
+    def log_in(client, role="customer", username=None):
+        user = make_user(username or role, role)
+        client.set_cookie("access_token", create_token(user))
+        return user
+    return log_in
+
+
+@pytest.fixture
+def make_items(app):
+    def make(*specs, category="Snacks"):
+        """
+        specs: (name, price, quantity) tuples; the barcode is the name.
+        """
+        items = [
+            Item(name=name, barcode=name, category=category, price=price, quantity=quantity)
+            for name, price, quantity in specs
+        ]
+        db.session.add_all(items)
+        db.session.commit()
+        return items
+    return make
+
+
+@pytest.fixture
+def sell(app):
+    def post(client, *lines, key=None):
+        """
+        POST /sales for (item, quantity) lines, optionally with an
+        Idempotency-Key; returns the response.
+        """
+        return client.post(
+            "/sales/",
+            json={"items": [{"item_id": item.id, "quantity": qty} for item, qty in lines]},
+            headers={"Idempotency-Key": key} if key else {},
+        )
+    return post
+
+
+@pytest.fixture
+def stock(app):
+    def current(item):
+        db.session.expire_all()
+        return db.session.get(Item, item.id).quantity
+    return current
+
+
+@pytest.fixture
+def rollup(app):
+    def totals(item):
+        """
+        (units, revenue) of an item over every day of the rollup.
+        """
+        rows = SalesDailyRollup.query.filter_by(item_id=item.id, user_id=ALL_USERS).all()
+        return sum(r.quantity for r in rows), float(sum(r.revenue for r in rows))
+    return totals
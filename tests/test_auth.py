@@ -0,0 +1,70 @@
+from sqlalchemy import update
+
+from db import db
+from models.user import User
+from services.user_cache_service import UserCacheService
+
+
+def _login(client, make_user, role="customer"):
+    make_user("ana", role, "pw")
+    resp = client.post("/users/login", json={"username": "ana", "password": "pw"})
+    assert resp.status_code == 200
+
+
+def test_authenticated_requests_use_the_cache(client, make_user):
+    _login(client, make_user)
+    assert client.get("/users/me/customer").status_code == 200
+
+    # the row changes behind the cache's back: the cached record still serves
+    db.session.execute(update(User).values(username="renamed"))
+    db.session.commit()
+    assert client.get("/users/me/customer").get_json()["username"] == "ana"
+
+
+def test_role_change_revokes_access_tokens(client, make_user):
+    _login(client, make_user)
+    assert client.get("/users/me/customer").status_code == 200
+
+    user = User.query.filter_by(username="ana").one()
+    user.role = "admin"
+    db.session.commit()
+
+    assert client.get("/users/me/customer").status_code == 401
+    assert client.get("/users/me").status_code == 401
+
+    # a fresh access token carries the new role
+    assert client.post("/users/refresh").status_code == 200
+    assert client.get("/users/me").status_code == 200
+
+
+def test_refresh_ignores_a_stale_cached_user(client, make_user):
+    _login(client, make_user)
+    assert client.get("/users/me/customer").status_code == 200  # cached now
+
+    # revoked by another worker whose eviction has not reached this one
+    db.session.execute(update(User).values(token_version=User.token_version + 1))
+    db.session.commit()
+
+    assert client.post("/users/refresh").status_code == 200
+    assert client.get("/users/me/customer").status_code == 200
+
+
+def test_logout_revokes_the_access_token(client, make_user):
+    _login(client, make_user)
+    token = client.get_cookie("access_token").value
+
+    assert client.post("/users/logout").status_code == 200
+
+    client.set_cookie("access_token", token)
+    assert client.get("/users/me/customer").status_code == 401
+
+
+def test_deleted_user_is_rejected(client, make_user):
+    _login(client, make_user)
+    assert client.get("/users/me/customer").status_code == 200
+
+    db.session.delete(User.query.filter_by(username="ana").one())
+    db.session.commit()
+
+    assert client.get("/users/me/customer").status_code == 401
+    assert UserCacheService.stats()["entries"] == 0
@@ -0,0 +1,47 @@
+from db import db
+from services.barcode_index import barcode_index
+
+
+def _price(client, barcode):
+    resp = client.get(f"/items/barcode/{barcode}")
+    assert resp.status_code == 200
+    return resp.get_json()["price"]
+
+
+def test_lookups_are_served_from_the_index(client, make_items):
+    make_items(("apple", 10, 5))
+
+    assert _price(client, "apple") == 10.0
+    hits = barcode_index.hits
+    assert _price(client, "apple") == 10.0
+    assert barcode_index.hits == hits + 1
+    assert client.get("/items/barcode/nope").status_code == 404
+
+
+def test_committed_changes_invalidate_the_entry(client, make_items):
+    (apple,) = make_items(("apple", 10, 5))
+    assert _price(client, "apple") == 10.0
+
+    assert client.put(f"/items/{apple.id}", json={"price": 12}).status_code == 200
+    assert _price(client, "apple") == 12.0
+
+    assert client.delete(f"/items/{apple.id}").status_code == 200
+    assert client.get("/items/barcode/apple").status_code == 404
+
+
+def test_row_read_during_an_invalidation_is_not_stored(app, make_items, monkeypatch):
+    (apple,) = make_items(("apple", 10, 5))
+    barcode_index.clear()
+    query = db.session.query
+
+    def racing_query(*args):
+        # the item changes while its row is being fetched
+        barcode_index.invalidate([apple.id])
+        return query(*args)
+
+    monkeypatch.setattr(db.session, "query", racing_query)
+    assert barcode_index.lookup("apple")["price"] == 10.0
+    barcode_index.warm()
+    monkeypatch.undo()
+
+    assert barcode_index.stats()["entries"] == 0
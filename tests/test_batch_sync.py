@@ -0,0 +1,63 @@
+from models.idempotency_key import IdempotencyKey
+from models.item import Item
+from models.sales_transaction import SalesTransaction
+from models.sales_transaction_item import SalesTransactionItem
+from db import db
+
+
+def _batch(*sales):
+    return {"transactions": [
+        {"client_id": client_id, "items": [{"item_id": i, "quantity": q} for i, q in lines]}
+        for client_id, lines in sales
+    ]}
+
+
+def test_batch_requires_login(client):
+    resp = client.post("/sales/batch", json=_batch(("t1", [(1, 1)])))
+    assert resp.status_code == 401
+
+
+def test_replayed_batch_records_each_sale_once(client, login, make_items):
+    login(client)
+    apple, bread = make_items(("apple", 10, 20), ("bread", 25, 20))
+
+    batch = _batch(
+        ("t1", [(apple.id, 2), (bread.id, 1)]),
+        ("t2", [(apple.id, 3)]),
+        ("t1", [(apple.id, 2), (bread.id, 1)]),  # same client id twice in one upload
+    )
+
+    first = client.post("/sales/batch", json=batch).get_json()
+    assert [r["status"] for r in first["results"]] == ["created", "created", "duplicate"]
+    assert first["results"][2]["transaction_id"] == first["results"][0]["transaction_id"]
+
+    # the terminal did not see the response and uploads everything again
+    second = client.post("/sales/batch", json=batch).get_json()
+    assert [r["status"] for r in second["results"]] == ["duplicate"] * 3
+    assert (
+        [r["transaction_id"] for r in second["results"]]
+        == [r["transaction_id"] for r in first["results"]]
+    )
+
+    assert SalesTransaction.query.count() == 2
+    assert SalesTransactionItem.query.count() == 3
+    assert IdempotencyKey.query.count() == 2
+
+    db.session.expire_all()
+    assert db.session.get(Item, apple.id).quantity == 20 - 2 - 3
+    assert db.session.get(Item, bread.id).quantity == 20 - 1
+
+
+def test_batch_rejects_sales_beyond_stock_individually(client, login, make_items):
+    login(client)
+    (apple,) = make_items(("apple", 10, 4))
+
+    body = client.post("/sales/batch", json=_batch(
+        ("t1", [(apple.id, 3)]),
+        ("t2", [(apple.id, 3)]),
+        ("t3", [(apple.id, 1)]),
+    )).get_json()
+
+    assert [r["status"] for r in body["results"]] == ["created", "rejected", "created"]
+    db.session.expire_all()
+    assert db.session.get(Item, apple.id).quantity == 0
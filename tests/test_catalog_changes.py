@@ -0,0 +1,63 @@
+def _bulk_restock(client, items):
+    # one bulk update: every item gets the same catalog version
+    resp = client.post("/items/bulk", json={
+        "filter": {"ids": [i.id for i in items]},
+        "stock": {"op": "add", "value": 1},
+    })
+    assert resp.status_code == 200
+
+
+def _follow(client, url):
+    pages = [client.get(url).get_json()]
+    while pages[-1]["has_more"]:
+        pages.append(client.get(f"/items/changes?limit=2&cursor={pages[-1]['next_cursor']}").get_json())
+    return pages
+
+
+def test_one_big_version_is_split_at_the_page_limit(client, make_items):
+    items = make_items(*[(f"item{n}", 10, 5) for n in range(5)])
+    _bulk_restock(client, items)
+
+    pages = _follow(client, "/items/changes?since=0&limit=2")
+
+    assert [len(p["items"]) for p in pages] == [2, 2, 1]
+    assert sorted(i["id"] for p in pages for i in p["items"]) == sorted(i.id for i in items)
+    # mid-version pages do not claim the version they are part of
+    assert pages[0]["version"] < pages[-1]["version"]
+    assert pages[-1]["next_cursor"] is None
+
+
+def test_since_returns_only_later_changes_and_tombstones(client, make_items):
+    apple, bread, milk = make_items(("apple", 10, 5), ("bread", 25, 5), ("milk", 60, 5))
+    _bulk_restock(client, [apple, bread, milk])
+    version = client.get("/items/changes?since=0").get_json()["version"]
+
+    assert client.put(f"/items/{apple.id}", json={"price": 12}).status_code == 200
+    assert client.delete(f"/items/{bread.id}").status_code == 200
+
+    changes = client.get(f"/items/changes?since={version}").get_json()
+    assert [i["id"] for i in changes["items"]] == [apple.id]
+    assert changes["deleted"] == [bread.id]
+    assert changes["has_more"] is False
+    assert changes["version"] > version
+
+
+def test_invalid_cursor_is_rejected(client):
+    assert client.get("/items/changes?cursor=nope").status_code == 400
+
+
+def test_catalog_etag_revalidates_until_the_catalog_changes(client, make_items):
+    apple, = make_items(("apple", 10, 5))
+    _bulk_restock(client, [apple])
+
+    first = client.get("/items/?limit=10")
+    etag = first.headers["ETag"]
+    assert first.headers["X-Catalog-Version"]
+
+    same = client.get("/items/?limit=10", headers={"If-None-Match": etag})
+    assert same.status_code == 304
+
+    assert client.put(f"/items/{apple.id}", json={"price": 12}).status_code == 200
+    changed = client.get("/items/?limit=10", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
@@ -0,0 +1,52 @@
+from services.item_search_service import trigrams
+
+
+def _names(resp):
+    assert resp.status_code == 200
+    return [r["name"] for r in resp.get_json()["results"]]
+
+
+def test_fuzzy_and_prefix_matches(client, make_items):
+    make_items(("Chocolate Bar", 45, 10), ("Chips", 30, 10), ("Bread", 25, 10))
+
+    assert _names(client.get("/items/search?q=choc")) == ["Chocolate Bar"]
+    assert _names(client.get("/items/search?q=chocolat bar")) == ["Chocolate Bar"]
+    assert "Bread" not in _names(client.get("/items/search?q=chi"))
+
+
+def test_exact_barcode_ranks_first(client, make_items):
+    make_items(("480100", 10, 1), ("4801001", 10, 1))
+
+    results = client.get("/items/search?q=4801001").get_json()["results"]
+    assert results[0]["barcode"] == "4801001"
+
+
+def test_category_filter_and_limit(client, make_items):
+    make_items(("Cola", 20, 5), ("Cola Zero", 22, 5), category="Beverages")
+    make_items(("Cola Candy", 5, 5), category="Snacks")
+
+    assert _names(client.get("/items/search?q=cola&category=Snacks")) == ["Cola Candy"]
+    assert len(_names(client.get("/items/search?q=cola&limit=2"))) == 2
+
+
+def test_index_follows_catalog_changes(client, make_items):
+    (item,) = make_items(("Apple", 10, 5))
+    assert _names(client.get("/items/search?q=apple")) == ["Apple"]
+
+    assert client.put(f"/items/{item.id}", json={"name": "Mango", "barcode": "4800001"}).status_code == 200
+    assert _names(client.get("/items/search?q=apple")) == []
+    assert _names(client.get("/items/search?q=mango")) == ["Mango"]
+
+
+def test_bad_requests(client):
+    assert client.get("/items/search").status_code == 400
+    assert client.get("/items/search?q=x&category=Nope").status_code == 400
+    assert client.get("/items/search?q=x&limit=abc").status_code == 400
+
+
+def test_words_in_any_script(client, make_items):
+    make_items(("Jalapeño Chips", 35, 5), ("Молоко", 90, 5), ("Bread", 25, 5))
+
+    assert "eño" in trigrams("Jalapeño")
+    assert _names(client.get("/items/search?q=jalapeño")) == ["Jalapeño Chips"]
+    assert _names(client.get("/items/search?q=молоко")) == ["Молоко"]
@@ -0,0 +1,28 @@
+from models.item import Item
+
+
+def test_partial_update_rejects_null_numbers(client, make_items):
+    apple, = make_items(("apple", 10, 5))
+
+    for payload in ({"quantity": None}, {"quantity": ""}, {"reorder_point": None}, {"price": None}):
+        resp = client.put(f"/items/{apple.id}", json=payload)
+        assert resp.status_code == 400, payload
+
+    item = Item.query.one()
+    assert (item.quantity, item.reorder_point, float(item.price)) == (5, 0, 10.0)
+
+
+def test_partial_update_only_touches_sent_fields(client, make_items):
+    apple, = make_items(("apple", 10, 5))
+
+    resp = client.put(f"/items/{apple.id}", json={"quantity": 7})
+    assert resp.status_code == 200
+    assert (resp.get_json()["quantity"], resp.get_json()["price"]) == (7, 10.0)
+
+
+def test_create_still_defaults_a_missing_quantity_to_zero(client):
+    resp = client.post("/items/", json={
+        "name": "apple", "barcode": "apple", "category": "Fruits", "price": 10,
+    })
+    assert resp.status_code == 201
+    assert Item.query.one().quantity == 0
@@ -0,0 +1,206 @@
+import json
+
+from models.item import Item
+
+
+def _names(items):
+    return [i["name"] for i in items]
+
+
+def _ndjson(*rows):
+    return "\n".join(json.dumps(r) for r in rows)
+
+
+def _row(barcode, **overrides):
+    return {"name": barcode, "barcode": barcode, "category": "Snacks",
+            "price": 10, "quantity": 5, **overrides}
+
+
+def test_listing_pages_with_a_keyset_cursor(client, make_items):
+    make_items(*[(f"item{n}", 10, 5) for n in range(5)])
+
+    first = client.get("/items/?limit=2").get_json()
+    assert _names(first["items"]) == ["item0", "item1"]
+
+    second = client.get(f"/items/?limit=2&cursor={first['next_cursor']}").get_json()
+    last = client.get(f"/items/?limit=2&cursor={second['next_cursor']}").get_json()
+    assert _names(second["items"] + last["items"]) == ["item2", "item3", "item4"]
+    assert last["next_cursor"] is None
+
+
+def test_listing_without_params_streams_the_whole_catalog(client, make_items):
+    make_items(("apple", 10, 5), ("bread", 25, 5))
+
+    resp = client.get("/items/")
+    assert resp.status_code == 200
+    assert resp.is_streamed
+    assert _names(resp.get_json()) == ["apple", "bread"]
+    first = resp.get_json()[0]
+    assert (first["id"], first["price"], first["barcode"]) == (Item.query.first().id, 10.0, "apple")
+
+
+def test_listing_rejects_bad_paging(client):
+    assert client.get("/items/?cursor=nope").status_code == 400
+    assert client.get("/items/?limit=abc").status_code == 400
+
+
+def test_import_reports_bad_rows_and_loads_the_rest(client, make_items):
+    make_items(("taken", 10, 1))
+
+    body = _ndjson(
+        _row("a"),
+        _row("b", category=""),
+        _row("c", category=7),
+        _row("d", quantity="1.5"),
+        _row("a"),
+        _row("taken"),
+        _row("e", price=True),
+    )
+    resp = client.post("/items/import?format=ndjson", data=body)
+    assert resp.status_code == 201
+
+    report = resp.get_json()
+    assert report["imported"] == 1
+    assert [e["row"] for e in report["errors"]] == [2, 3, 4, 5, 6, 7]
+    assert report["errors"][4]["error"] == "barcode already exists"
+    assert sorted(b for (b,) in Item.query.with_entities(Item.barcode)) == ["a", "taken"]
+
+
+def test_import_csv_defaults_a_blank_quantity_to_zero(client):
+    body = "name,barcode,category,price,quantity\napple,apple,Fruits,10,\n"
+    resp = client.post("/items/import", data=body, content_type="text/csv")
+    assert resp.status_code == 201
+    assert Item.query.one().quantity == 0
+
+
+def test_import_dry_run_loads_nothing(client):
+    resp = client.post("/items/import?format=ndjson&dry_run=1", data=_ndjson(_row("a")))
+    assert resp.status_code == 200
+    assert resp.get_json()["valid"] == 1
+    assert Item.query.count() == 0
+
+
+def test_bulk_update_by_category(client, make_items):
+    make_items(("a", 10, 5), ("b", 20, 5))
+    make_items(("c", 30, 5), category="Beverages")
+
+    resp = client.post("/items/bulk", json={
+        "filter": {"category": "Snacks"},
+        "price": {"op": "percent", "value": 10},
+        "stock": {"op": "add", "value": 3},
+    })
+    assert resp.status_code == 200
+    assert resp.get_json()["updated"] == 2
+
+    items = {i.barcode: (float(i.price), i.quantity) for i in Item.query}
+    assert items == {"a": (11.0, 8), "b": (22.0, 8), "c": (30.0, 5)}
+
+
+def test_bulk_update_is_all_or_nothing(client, make_items):
+    make_items(("a", 10, 5), ("b", 20, 1))
+
+    resp = client.post("/items/bulk", json={
+        "filter": {"barcodes": ["a", "b"]},
+        "stock": {"op": "add", "value": -3},
+    })
+    assert resp.status_code == 400
+    assert sorted(i.quantity for i in Item.query) == [1, 5]
+
+
+def test_bulk_update_rejects_malformed_changes(client, make_items):
+    make_items(("a", 10, 5))
+
+    for payload in (
+        {"filter": {"ids": [1]}, "stock": 5},
+        {"filter": {"ids": [1]}, "stock": {"op": "add", "value": "5"}},
+        {"filter": {"ids": [1]}, "stock": {"op": "set", "value": None}},
+        {"filter": {"ids": [1]}, "price": {"op": "set", "value": True}},
+        {"filter": {"ids": [1]}, "price": {"op": "double", "value": 2}},
+        {"filter": [1], "stock": {"op": "set", "value": 1}},
+        {"filter": {"category": 3}, "stock": {"op": "set", "value": 1}},
+        {"filter": {}, "stock": {"op": "set", "value": 1}},
+    ):
+        assert client.post("/items/bulk", json=payload).status_code == 400, payload
+
+    assert Item.query.one().quantity == 5
+
+
+def test_resolve_prices_a_cart_in_one_call(client, make_items):
+    apple, bread = make_items(("apple", 10, 3), ("bread", 25, 5))
+
+    resp = client.post("/items/resolve", json={"items": [
+        {"item_id": apple.id, "quantity": 2},
+        {"barcode": "bread"},
+        {"barcode": "nope", "quantity": 4},
+        {"barcode": "apple", "quantity": 2},
+    ]})
+    assert resp.status_code == 200
+    body = resp.get_json()
+
+    assert [line["found"] for line in body["lines"]] == [True, True, False, True]
+    assert body["lines"][1]["item"]["name"] == "bread"
+    assert body["total"] == 2 * 10 + 25 + 2 * 10
+    # apple is checked against the 4 units of the whole cart, not per line
+    assert [line.get("in_stock") for line in body["lines"]] == [False, True, None, False]
+    assert (body["all_found"], body["all_in_stock"]) == (False, False)
+
+
+def test_resolve_rejects_malformed_carts(client):
+    for payload in (
+        {},
+        {"items": []},
+        {"items": [1]},
+        {"items": [{"quantity": 1}]},
+        {"items": [{"item_id": "x"}]},
+        {"items": [{"item_id": 1, "quantity": 0}]},
+    ):
+        assert client.post("/items/resolve", json=payload).status_code == 400, payload
+
+
+def test_fields_selects_only_the_requested_columns(client, make_items):
+    make_items(("apple", 10, 5), ("bread", 25, 5))
+
+    page = client.get("/items/?limit=1&fields=name,price").get_json()
+    assert page["items"] == [{"name": "apple", "price": 10.0}]
+    assert page["next_cursor"]  # id is still the keyset
+
+    streamed = client.get("/items/?fields=name").get_json()
+    assert streamed == [{"name": "apple"}, {"name": "bread"}]
+
+    assert client.get("/items/?fields=name,secret").status_code == 400
+
+
+def test_low_stock_follows_item_changes(client, make_items):
+    apple, bread = make_items(("apple", 10, 3), ("bread", 25, 10))
+    make_items(("cola", 20, 0), category="Beverages")
+
+    # cola: 0 <= default reorder point 0
+    assert _names(client.get("/items/low-stock").get_json()) == ["cola"]
+
+    assert client.put(f"/items/{apple.id}", json={"reorder_point": 5}).status_code == 200
+    assert client.put(f"/items/{bread.id}", json={"reorder_point": 9}).status_code == 200
+
+    rows = client.get("/items/low-stock").get_json()
+    assert _names(rows) == ["apple", "cola"]  # biggest shortfall first
+    assert rows[0]["shortfall"] == 2
+
+    assert client.put(f"/items/{apple.id}", json={"quantity": 20}).status_code == 200
+    assert _names(client.get("/items/low-stock?category=Snacks").get_json()) == []
+    assert client.get("/items/low-stock?category=Nope").status_code == 400
+
+
+def test_inventory_summary_per_category(client, make_items):
+    apple, bread = make_items(("apple", 10, 3), ("bread", 25, 2))
+
+    def by_category():
+        return {row["category"]: row for row in client.get("/items/summary").get_json()}
+
+    summary = by_category()
+    assert summary["Snacks"] == {
+        "category": "Snacks", "item_count": 2, "units_on_hand": 5, "stock_value": 80.0
+    }
+    assert summary["Dairy"]["item_count"] == 0
+
+    # the cached summary is dropped when an item changes
+    assert client.put(f"/items/{bread.id}", json={"quantity": 4}).status_code == 200
+    assert by_category()["Snacks"]["stock_value"] == 130.0
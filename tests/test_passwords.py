@@ -0,0 +1,29 @@
+from werkzeug.security import generate_password_hash
+
+from services.password_service import PasswordService, _parameters, _verify
+
+
+def test_default_parameters_match_their_spelled_out_form():
+    assert _parameters("scrypt") == _parameters("scrypt:32768:8:1")
+    assert _parameters("pbkdf2") == _parameters("pbkdf2:sha256")
+    assert _parameters("scrypt") != _parameters("scrypt:16384:8:1")
+
+
+def test_current_parameters_are_not_rehashed():
+    stored = generate_password_hash("pw", method="scrypt")
+    assert _verify(stored, "pw", "scrypt:32768:8:1") == (True, None)
+    assert _verify(stored, "pw", "scrypt") == (True, None)
+
+
+def test_old_parameters_are_rehashed_on_login():
+    stored = generate_password_hash("pw", method="pbkdf2:sha256:1000")
+    ok, new_hash = _verify(stored, "pw", "scrypt")
+    assert ok
+    assert new_hash.startswith("scrypt:32768:8:1$")
+    assert PasswordService.verify(new_hash, "pw") == (True, None)
+
+
+def test_wrong_password_is_rejected():
+    stored = PasswordService.hash("pw")
+    assert PasswordService.verify(stored, "nope") == (False, None)
+    assert PasswordService.verify(None, "pw") == (False, None)
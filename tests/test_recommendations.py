@@ -0,0 +1,28 @@
+from db import db
+from models.ai_recommendation import AIRecommendation
+
+
+def _recommend(user, *scored):
+    db.session.add_all(
+        AIRecommendation(user_id=user.id, item_id=item.id, score=score)
+        for item, score in scored
+    )
+    db.session.commit()
+
+
+def test_recommendations_are_ranked_and_projected(client, make_user, make_items):
+    user = make_user()
+    apple, bread, milk = make_items(("apple", 10, 5), ("bread", 25, 5), ("milk", 60, 5))
+    _recommend(user, (apple, 0.2), (bread, 0.9), (milk, 0.5))
+
+    full = client.get(f"/recommendations/{user.id}").get_json()["recommendations"]
+    assert [r["name"] for r in full] == ["bread", "milk", "apple"]
+    assert full[0] == {"id": bread.id, "name": "bread", "category": "Snacks", "price": 25.0}
+
+    names = client.get(f"/recommendations/{user.id}?fields=name").get_json()["recommendations"]
+    assert names == [{"name": "bread"}, {"name": "milk"}, {"name": "apple"}]
+
+
+def test_recommendations_reject_unknown_fields(client, make_user):
+    user = make_user()
+    assert client.get(f"/recommendations/{user.id}?fields=barcode").status_code == 400
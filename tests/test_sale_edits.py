@@ -0,0 +1,124 @@
+from db import db
+from models.item import Item
+from models.sales_daily_rollup import SalesDailyRollup
+from models.sales_transaction import SalesTransaction
+from models.sales_transaction_item import SalesTransactionItem
+from services.sales_rollup_service import SalesRollupService
+
+
+def _lines(sale_id):
+    return sorted(
+        (line.item_id, line.quantity, float(line.price_at_sale))
+        for line in SalesTransactionItem.query.filter_by(transaction_id=sale_id)
+    )
+
+
+def _total(sale_id):
+    db.session.expire_all()
+    sale = db.session.get(SalesTransaction, sale_id)
+    return float(sale.total_amount), sale.line_count
+
+
+def test_revise_applies_the_stock_difference(client, login, make_items, sell, stock, rollup):
+    login(client)
+    apple, bread, milk = make_items(("apple", 10, 20), ("bread", 25, 20), ("milk", 50, 1))
+    sale_id = sell(client, (apple, 5), (bread, 2)).get_json()["transaction_id"]
+
+    resp = client.put(f"/sales/{sale_id}", json={"items": [
+        {"item_id": apple.id, "quantity": 3},
+        {"item_id": milk.id, "quantity": 1},
+    ]})
+    assert resp.status_code == 200
+
+    assert (stock(apple), stock(bread), stock(milk)) == (17, 20, 0)
+    assert rollup(apple) == (3, 30.0)
+    assert rollup(bread) == (0, 0.0)
+    assert rollup(milk) == (1, 50.0)
+    assert _total(sale_id) == (80.0, 2)
+
+
+def test_revise_keeps_the_price_of_existing_lines(client, login, make_items, sell, rollup):
+    login(client)
+    (apple,) = make_items(("apple", 10, 20))
+    sale_id = sell(client, (apple, 2)).get_json()["transaction_id"]
+
+    db.session.get(Item, apple.id).price = 99
+    db.session.commit()
+
+    client.put(f"/sales/{sale_id}", json={"items": [{"item_id": apple.id, "quantity": 4}]})
+    assert _lines(sale_id) == [(apple.id, 4, 10.0)]
+    assert rollup(apple) == (4, 40.0)
+
+
+def test_revise_keeps_duplicate_lines_at_their_own_prices(client, login, make_items, sell, stock, rollup):
+    login(client)
+    apple, bread = make_items(("apple", 10, 20), ("bread", 25, 20))
+    sale_id = sell(client, (apple, 2), (bread, 1)).get_json()["transaction_id"]
+
+    # an older sale: apple on a second line, sold after a price change
+    sale = db.session.get(SalesTransaction, sale_id)
+    db.session.add(SalesTransactionItem(
+        transaction_id=sale_id, item_id=apple.id, quantity=3, price_at_sale=12
+    ))
+    db.session.get(Item, apple.id).quantity -= 3
+    sale.total_amount, sale.line_count = 2 * 10 + 25 + 3 * 12, 3
+    SalesRollupService.record(sale.date, sale.user_id, [(apple.id, 3, 12)])
+    db.session.commit()
+    assert rollup(apple) == (5, 56.0)
+
+    def revise(apples, breads=1):
+        resp = client.put(f"/sales/{sale_id}", json={"items": [
+            {"item_id": apple.id, "quantity": apples},
+            {"item_id": bread.id, "quantity": breads},
+        ]})
+        assert resp.status_code == 200
+
+    # fewer: units come back off the newest line, at its price
+    revise(4)
+    assert _lines(sale_id) == [(apple.id, 2, 10.0), (apple.id, 2, 12.0), (bread.id, 1, 25.0)]
+    assert _total(sale_id) == (2 * 10 + 2 * 12 + 25, 3)
+    assert rollup(apple) == (4, 44.0)
+
+    # more: added to the first line, at its price
+    revise(6)
+    assert _lines(sale_id) == [(apple.id, 2, 12.0), (apple.id, 4, 10.0), (bread.id, 1, 25.0)]
+    assert _total(sale_id) == (4 * 10 + 2 * 12 + 25, 3)
+    assert rollup(apple) == (6, 64.0)
+
+    # an unrelated edit leaves both apple lines alone
+    revise(6, breads=2)
+    assert _total(sale_id) == (4 * 10 + 2 * 12 + 2 * 25, 3)
+
+    revise(1)
+    assert _lines(sale_id) == [(apple.id, 1, 10.0), (bread.id, 1, 25.0)]
+    assert _total(sale_id) == (35.0, 2)
+    assert rollup(apple) == (1, 10.0)
+    assert stock(apple) == 19
+
+
+def test_revise_oversell_keeps_the_old_sale(client, login, make_items, sell, stock, rollup):
+    login(client)
+    apple, milk = make_items(("apple", 10, 20), ("milk", 50, 1))
+    sale_id = sell(client, (apple, 5)).get_json()["transaction_id"]
+
+    resp = client.put(f"/sales/{sale_id}", json={"items": [
+        {"item_id": milk.id, "quantity": 2},
+    ]})
+    assert resp.status_code == 400
+
+    assert (stock(apple), stock(milk)) == (15, 1)
+    assert rollup(apple) == (5, 50.0)
+    assert _lines(sale_id) == [(apple.id, 5, 10.0)]
+
+
+def test_void_restocks_and_clears_the_rollup(client, login, make_items, sell, stock):
+    login(client)
+    apple, bread = make_items(("apple", 10, 20), ("bread", 25, 20))
+    sale_id = sell(client, (apple, 5), (bread, 2)).get_json()["transaction_id"]
+
+    assert client.delete(f"/sales/{sale_id}").status_code == 200
+    assert client.get(f"/sales/{sale_id}").status_code == 404
+    assert client.delete(f"/sales/{sale_id}").status_code == 404
+
+    assert (stock(apple), stock(bread)) == (20, 20)
+    assert SalesDailyRollup.query.count() == 0
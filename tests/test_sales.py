@@ -0,0 +1,280 @@
+import csv
+import gzip
+import io
+import json
+from datetime import datetime
+
+from sqlalchemy import event
+
+from db import db
+from models.sales_transaction import SalesTransaction
+
+
+def _ids(resp):
+    assert resp.status_code == 200
+    return [t["transaction_id"] for t in resp.get_json()["transactions"]]
+
+
+def _dated_sales(client, login, sell, make_items):
+    login(client)
+    apple, milk = make_items(("apple", 10, 50), ("milk", 60, 50))
+    milk_sale = sell(client, (milk, 1)).get_json()["transaction_id"]
+    ids = [sell(client, (apple, 1)).get_json()["transaction_id"] for _ in range(3)]
+    ids.insert(0, milk_sale)
+
+    for day, sale_id in zip((1, 2, 3, 4), ids):
+        db.session.get(SalesTransaction, sale_id).date = datetime(2026, 3, day, 12)
+    db.session.commit()
+    milk.category = "Dairy"
+    db.session.commit()
+    return ids
+
+
+def test_sales_page_newest_first_with_a_cursor(client, login, sell, make_items):
+    ids = _dated_sales(client, login, sell, make_items)
+
+    first = client.get("/sales/?limit=3")
+    assert _ids(first) == ids[::-1][:3]
+    rest = client.get(f"/sales/?limit=3&cursor={first.get_json()['next_cursor']}")
+    assert _ids(rest) == ids[:1]
+    assert rest.get_json()["next_cursor"] is None
+
+
+def test_sales_filters(client, login, sell, make_items):
+    ids = _dated_sales(client, login, sell, make_items)
+
+    assert _ids(client.get("/sales/?from=2026-03-02&to=2026-03-03")) == [ids[2], ids[1]]
+    assert _ids(client.get("/sales/?category=Dairy")) == [ids[0]]
+    assert client.get("/sales/?from=2026-03-05&to=2026-03-01").status_code == 400
+    assert client.get("/sales/?category=Nope").status_code == 400
+
+
+def test_sales_page_lines_load_in_one_query(client, login, sell, make_items):
+    _dated_sales(client, login, sell, make_items)
+
+    statements = []
+
+    def listener(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", listener)
+    try:
+        resp = client.get("/sales/?limit=10")
+    finally:
+        event.remove(db.engine, "before_cursor_execute", listener)
+
+    assert all(t["items"] for t in resp.get_json()["transactions"])
+    assert len(statements) == 2  # the page, then every line of it
+
+
+def test_checkout_deducts_stock_and_records_the_sale(client, login, sell, make_items, stock, rollup):
+    login(client)
+    apple, bread = make_items(("apple", 10, 20), ("bread", 25, 20))
+
+    resp = sell(client, (apple, 2), (bread, 1), (apple, 1))
+    assert resp.status_code == 201
+
+    sale = db.session.get(SalesTransaction, resp.get_json()["transaction_id"])
+    assert (float(sale.total_amount), sale.line_count) == (3 * 10 + 25, 2)
+    assert (stock(apple), stock(bread)) == (17, 19)
+    assert rollup(apple) == (3, 30.0)
+
+
+def test_oversell_is_rejected_without_side_effects(client, login, sell, make_items, stock, rollup):
+    login(client)
+    apple, bread = make_items(("apple", 10, 5), ("bread", 25, 1))
+
+    resp = sell(client, (apple, 2), (bread, 2))
+    assert resp.status_code == 400
+    assert resp.get_json()["error"] == "Not enough stock for bread"
+
+    assert SalesTransaction.query.count() == 0
+    assert (stock(apple), stock(bread)) == (5, 1)
+    assert rollup(apple) == (0, 0.0)
+
+
+def test_checkout_requires_login(client, sell, make_items, stock):
+    (apple,) = make_items(("apple", 10, 5))
+    assert sell(client, (apple, 1)).status_code == 401
+    assert stock(apple) == 5
+
+
+def test_cash_confirmation_sells_through_the_same_checkout(app, login, make_items, stock):
+    apple, = make_items(("apple", 10, 5))
+    customer, admin = app.test_client(), app.test_client()
+    login(customer)
+    login(admin, role="admin")
+
+    pending_id = customer.post("/payment/cash/start", json={
+        "cart": [{"barcode": "apple", "quantity": 2}]
+    }).get_json()["pending_id"]
+    code = admin.post(f"/payment/admin/cash/generate-code/{pending_id}").get_json()["code"]
+
+    resp = customer.post("/payment/cash/confirm", json={"code": code})
+    assert resp.status_code == 200
+    assert stock(apple) == 3
+
+    # a used code cannot sell twice
+    assert customer.post("/payment/cash/confirm", json={"code": code}).status_code == 400
+    assert stock(apple) == 3
+
+
+def test_idempotency_key_replays_the_first_response(client, login, sell, make_items, stock):
+    login(client)
+    (apple,) = make_items(("apple", 10, 20))
+
+    first = sell(client, (apple, 2), key="k1")
+    assert first.status_code == 201
+    assert "Idempotent-Replayed" not in first.headers
+
+    retry = sell(client, (apple, 2), key="k1")
+    assert retry.status_code == 201
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert retry.get_json() == first.get_json()
+
+    assert SalesTransaction.query.count() == 1
+    assert stock(apple) == 18
+
+
+def test_idempotency_key_reused_with_another_body(client, login, sell, make_items, stock):
+    login(client)
+    (apple,) = make_items(("apple", 10, 20))
+
+    assert sell(client, (apple, 2), key="k1").status_code == 201
+    assert sell(client, (apple, 3), key="k1").status_code == 422
+    assert sell(client, (apple, 1), key=" ").status_code == 400
+
+    assert SalesTransaction.query.count() == 1
+    assert stock(apple) == 18
+
+
+def test_idempotency_keys_are_per_user(client, login, sell, make_items):
+    (apple,) = make_items(("apple", 10, 20))
+
+    login(client, username="a")
+    assert sell(client, (apple, 1), key="k1").status_code == 201
+    login(client, username="b")
+    resp = sell(client, (apple, 1), key="k1")
+    assert resp.status_code == 201
+    assert "Idempotent-Replayed" not in resp.headers
+
+    assert SalesTransaction.query.count() == 2
+
+
+def test_redelivered_webhook_records_one_sale(client, make_user, make_items, stock):
+    customer = make_user()
+    (apple,) = make_items(("apple", 10, 20))
+    event = {"data": {"id": "evt_1", "attributes": {
+        "type": "checkout_session.payment.paid",
+        "data": {"id": "cs_1", "attributes": {"metadata": {
+            "user_id": str(customer.id),
+            "cart": '[{"barcode": "apple", "quantity": 3}]',
+        }}},
+    }}}
+
+    first = client.post("/payment/webhook", json=event)
+    assert first.status_code == 200
+    again = client.post("/payment/webhook", json=event)
+    assert again.get_json() == {
+        "status": "success",
+        "transaction_id": first.get_json()["transaction_id"],
+        "duplicate": True,
+    }
+
+    assert SalesTransaction.query.count() == 1
+    assert stock(apple) == 17
+
+
+def test_export_streams_one_row_per_line(client, login, sell, make_items):
+    ids = _dated_sales(client, login, sell, make_items)
+
+    resp = client.get("/sales/export?from=2026-03-01&to=2026-03-02")
+    assert resp.status_code == 200
+    assert resp.is_streamed
+    rows = list(csv.DictReader(io.StringIO(resp.get_data(as_text=True))))
+    assert [(int(r["transaction_id"]), r["item_name"], r["line_total"]) for r in rows] == [
+        (ids[0], "milk", "60.0"), (ids[1], "apple", "10.0"),
+    ]
+
+    lines = client.get("/sales/export?format=ndjson&gzip=1").get_data()
+    exported = [json.loads(line) for line in gzip.decompress(lines).splitlines()]
+    assert [r["transaction_id"] for r in exported] == ids
+
+    assert client.get("/sales/export?format=xml").status_code == 400
+
+
+def test_analytics_follow_sales(client, login, sell, make_items):
+    login(client)
+    apple, = make_items(("apple", 10, 20))
+    milk, = make_items(("milk", 60, 20), category="Dairy")
+
+    def report(group_by):
+        resp = client.get(f"/sales/analytics?group_by={group_by}")
+        assert resp.status_code == 200
+        return resp.get_json()
+
+    assert report("day")["total_units"] == 0
+    sale_id = sell(client, (apple, 4), (milk, 1)).get_json()["transaction_id"]
+
+    # the cached empty report was invalidated by the sale
+    day = report("day")
+    assert (day["source"], day["total_units"], day["total_revenue"]) == ("rollup", 5, 100.0)
+    hour = report("hour")
+    assert (hour["source"], len(hour["rows"]), hour["total_revenue"]) == ("lines", 24, 100.0)
+    by_category = {r["category"]: r for r in report("category")["rows"]}
+    assert (by_category["Dairy"]["units"], by_category["Snacks"]["revenue"]) == (1, 40.0)
+
+    client.delete(f"/sales/{sale_id}")
+    assert report("day")["total_units"] == 0
+    assert client.get("/sales/analytics?group_by=month").status_code == 400
+
+
+def test_sale_detail_etag_and_invalidation(client, login, sell, make_items):
+    login(client)
+    apple, bread = make_items(("apple", 10, 20), ("bread", 25, 20))
+    sale_id = sell(client, (apple, 2)).get_json()["transaction_id"]
+
+    first = client.get(f"/sales/{sale_id}")
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+
+    cached = client.get(f"/sales/{sale_id}", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+
+    # an edit evicts the cached receipt and changes its tag
+    assert client.put(f"/sales/{sale_id}", json={"items": [
+        {"item_id": bread.id, "quantity": 1},
+    ]}).status_code == 200
+    edited = client.get(f"/sales/{sale_id}", headers={"If-None-Match": etag})
+    assert edited.status_code == 200
+    assert edited.headers["ETag"] != etag
+    assert [line["item_id"] for line in edited.get_json()["items"]] == [bread.id]
+
+    assert client.get("/sales/999").status_code == 404
+
+
+def test_purchase_history_is_paged_per_customer(app, login, sell, make_items):
+    apple, = make_items(("apple", 10, 50))
+    ana, ben = app.test_client(), app.test_client()
+    login(ana, username="ana")
+    login(ben, username="ben")
+
+    mine = [sell(ana, (apple, n)).get_json()["transaction_id"] for n in (1, 2, 3)]
+    sell(ben, (apple, 1))
+
+    first = ana.get("/sales/mine?limit=2").get_json()
+    assert [t["transaction_id"] for t in first["transactions"]] == mine[:0:-1]
+    assert first["transactions"][0]["items"][0]["item_name"] == "apple"
+    rest = ana.get(f"/sales/mine?limit=2&cursor={first['next_cursor']}").get_json()
+    assert [t["transaction_id"] for t in rest["transactions"]] == mine[:1]
+    assert rest["next_cursor"] is None
+
+    assert len(ben.get("/sales/mine").get_json()["transactions"]) == 1
+    assert ben.get("/sales/mine?cursor=nope").status_code == 400
+
+
+def test_purchase_history_is_for_customers(app, login):
+    admin = app.test_client()
+    login(admin, role="admin")
+    assert admin.get("/sales/mine").status_code == 403
+    assert app.test_client().get("/sales/mine").status_code == 401
@@ -0,0 +1,66 @@
+from datetime import timedelta
+
+from db import db
+from models.sales_daily_rollup import SalesDailyRollup
+from models.sales_transaction import SalesTransaction
+import services.sales_rollup_service as sales_rollup
+from services.sales_rollup_service import SalesRollupService
+
+
+def _rows():
+    db.session.expire_all()
+    return sorted(
+        (r.day, r.item_id, r.user_id, r.quantity, float(r.revenue))
+        for r in SalesDailyRollup.query
+    )
+
+
+def _sales(app, make_user, make_items, sell):
+    apple, bread = make_items(("apple", 10, 100), ("bread", 25, 100))
+    for username, lines in (("a", [(apple, 2), (bread, 1)]), ("b", [(apple, 3)])):
+        client = app.test_client()
+        client.post("/users/login", json={"username": make_user(username).username,
+                                          "password": "secret"})
+        assert sell(client, *lines).status_code == 201
+    return apple, bread
+
+
+def test_checkout_keeps_per_user_and_all_user_rows(app, make_user, make_items, sell, rollup):
+    apple, bread = _sales(app, make_user, make_items, sell)
+
+    assert rollup(apple) == (5, 50.0)
+    assert rollup(bread) == (1, 25.0)
+    # ALL_USERS row + one row per customer
+    assert len([r for r in _rows() if r[1] == apple.id]) == 3
+
+
+def test_rebuild_matches_the_incremental_rollup(app, make_user, make_items, sell):
+    _sales(app, make_user, make_items, sell)
+    # move one sale to another day, behind the rollup's back
+    sale = SalesTransaction.query.first()
+    sale.date -= timedelta(days=3)
+    db.session.commit()
+
+    incremental = _rows()
+    SalesRollupService.rebuild(log=lambda *a: None)
+    rebuilt = _rows()
+
+    assert rebuilt != incremental
+    assert sorted(r[0] for r in rebuilt)[0] == sale.date.date()
+    assert sum(r[3] for r in rebuilt) == sum(r[3] for r in incremental)
+
+    # a second rebuild changes nothing
+    SalesRollupService.rebuild(chunk_days=1, log=lambda *a: None)
+    assert _rows() == rebuilt
+
+
+def test_rebuild_locks_out_concurrent_sales(app, make_user, make_items, sell, monkeypatch):
+    calls = []
+    monkeypatch.setattr(sales_rollup, "_lock", lambda shared: calls.append(shared))
+
+    _sales(app, make_user, make_items, sell)
+    assert calls and all(calls)  # sales: shared
+
+    calls.clear()
+    SalesRollupService.rebuild(chunk_days=1, log=lambda *a: None)
+    assert calls and not any(calls)  # rebuild: exclusive, every chunk
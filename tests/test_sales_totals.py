@@ -0,0 +1,65 @@
+from db import db
+from models.sales_transaction import SalesTransaction
+
+
+def _sale(client, *lines):
+    resp = client.post("/sales/", json={
+        "items": [{"item_id": i.id, "quantity": q} for i, q in lines]
+    })
+    assert resp.status_code == 201
+    return resp.get_json()["transaction_id"]
+
+
+def _sales(client, make_items):
+    apple, bread = make_items(("apple", 10, 100), ("bread", 25, 100))
+    return {
+        "small": _sale(client, (apple, 1)),                # 10
+        "large": _sale(client, (apple, 2), (bread, 4)),    # 120
+        "medium": _sale(client, (bread, 2)),               # 50
+    }
+
+
+def test_totals_are_written_with_the_lines(client, login, make_items):
+    login(client)
+    ids = _sales(client, make_items)
+
+    sale = db.session.get(SalesTransaction, ids["large"])
+    assert (float(sale.total_amount), sale.line_count) == (120.0, 2)
+
+
+def test_sort_by_total_pages_with_a_keyset_cursor(client, login, make_items):
+    login(client)
+    ids = _sales(client, make_items)
+
+    first = client.get("/sales/?sort=total&limit=2&fields=transaction_id,total_amount").get_json()
+    assert [t["total_amount"] for t in first["transactions"]] == [120.0, 50.0]
+    assert first["next_cursor"]
+
+    rest = client.get(f"/sales/?sort=total&limit=2&cursor={first['next_cursor']}").get_json()
+    assert [t["transaction_id"] for t in rest["transactions"]] == [ids["small"]]
+    assert rest["next_cursor"] is None
+
+
+def test_min_and_max_total_filters(client, login, make_items):
+    login(client)
+    ids = _sales(client, make_items)
+
+    resp = client.get("/sales/?min_total=20&max_total=120&fields=transaction_id")
+    assert sorted(t["transaction_id"] for t in resp.get_json()["transactions"]) == sorted(
+        [ids["large"], ids["medium"]]
+    )
+    assert client.get("/sales/?min_total=abc").status_code == 400
+    assert client.get("/sales/?sort=amount").status_code == 400
+
+
+def test_purchase_history_reads_the_stored_totals(client, login, make_items):
+    login(client)
+    ids = _sales(client, make_items)
+
+    # the stored totals are what the history shows, not a re-summed copy
+    db.session.get(SalesTransaction, ids["large"]).total_amount = 119
+    db.session.commit()
+
+    mine = {t["transaction_id"]: t for t in client.get("/sales/mine").get_json()["transactions"]}
+    assert (mine[ids["large"]]["total"], mine[ids["large"]]["line_count"]) == (119.0, 2)
+    assert mine[ids["large"]]["units"] == 6
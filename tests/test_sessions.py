@@ -0,0 +1,71 @@
+from datetime import datetime, timedelta
+
+from db import db
+from models.user_session import UserSession
+from services.session_service import SessionService, hash_token
+
+
+def _login(client, device):
+    resp = client.post("/users/login", json={
+        "username": "ana", "password": "pw", "device_name": device
+    })
+    assert resp.status_code == 200
+    return client.get_cookie("refresh_token").value
+
+
+def test_each_device_gets_its_own_session(app, make_user):
+    make_user("ana", "customer", "pw")
+    phone, laptop = app.test_client(), app.test_client()
+
+    _login(phone, "phone")
+    _login(laptop, "laptop")
+    assert UserSession.query.count() == 2
+
+    # logging out on one device leaves the other signed in
+    assert phone.post("/users/logout").status_code == 200
+    assert UserSession.query.count() == 1
+    assert phone.post("/users/refresh").status_code == 401
+    assert laptop.post("/users/refresh").status_code == 200
+    assert laptop.get("/users/me/customer").status_code == 200
+
+
+def test_refresh_rejects_unknown_and_expired_tokens(client, make_user):
+    make_user("ana", "customer", "pw")
+    _login(client, "phone")
+
+    UserSession.query.update({"expires_at": datetime.utcnow() - timedelta(seconds=1)})
+    db.session.commit()
+    assert client.post("/users/refresh").status_code == 401
+
+    client.set_cookie("refresh_token", "not-a-token")
+    assert client.post("/users/refresh").status_code == 401
+
+
+def test_wrong_password_creates_no_session(client, make_user):
+    make_user("ana", "customer", "pw")
+    resp = client.post("/users/login", json={"username": "ana", "password": "nope"})
+    assert resp.status_code == 401
+    assert UserSession.query.count() == 0
+
+
+def test_sweep_deletes_only_expired_sessions(app, make_user):
+    make_user("ana", "customer", "pw")
+    for device in ("a", "b", "c"):
+        _login(app.test_client(), device)
+
+    UserSession.query.filter(UserSession.device_name != "c").update(
+        {"expires_at": datetime.utcnow() - timedelta(days=1)}, synchronize_session=False
+    )
+    db.session.commit()
+
+    assert SessionService.sweep(batch=1) == 2
+    assert [s.device_name for s in UserSession.query.all()] == ["c"]
+
+
+def test_only_the_token_hash_is_stored(client, make_user):
+    make_user("ana", "customer", "pw")
+    token = _login(client, "phone")
+
+    session = UserSession.query.one()
+    assert session.token_hash == hash_token(token) != token
+    assert session.device_name == "phone"
@@ -0,0 +1,44 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("pandas")
+pytest.importorskip("torch")
+pytest.importorskip("sklearn")
+
+from ml import time_series_forecast
+from ml.time_series_forecast import daily_category_series, run_time_series_forecast
+
+
+def _rollup_sums(days):
+    # what SUM(sales_daily_rollup.quantity) returns on Postgres
+    start = date(2025, 1, 1)
+    return [
+        (start + timedelta(days=d), category, Decimal(3 + d % 5))
+        for d in range(days)
+        for category in ("Snacks", "Beverages")
+    ]
+
+
+def test_decimal_sums_become_a_float_series():
+    daily = daily_category_series(_rollup_sums(3))
+
+    assert list(daily.columns) == ["Beverages", "Snacks"]
+    assert daily.values.dtype == np.float64
+    assert np.log1p(daily.values).shape == (3, 2)
+
+
+def test_forecast_runs_on_decimal_sums(app, monkeypatch):
+    class Query:
+        def __getattr__(self, name):
+            return lambda *args, **kwargs: self
+
+        def all(self):
+            return _rollup_sums(20)
+
+    monkeypatch.setattr(time_series_forecast.db.session, "query", lambda *a: Query())
+
+    result = run_time_series_forecast()
+    assert set(result["next_7_days"]) == {"Snacks", "Beverages"}
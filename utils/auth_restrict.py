@@ -2,7 +2,7 @@
 from functools import wraps
 from flask import request, jsonify, g
 import jwt
-from models.user import User
+from services.user_cache_service import UserCacheService
 
 JWT_SECRET = "super-secret"
 
@@ -25,11 +25,19 @@ def require_auth(roles=()):
                 if payload.get("type") != "access":
                     return jsonify({"error": "Invalid token type"}), 401
 
-                user = User.query.get(payload["user_id"])
+                # ✅ cached record (no query in the common case)
+                version = payload.get("tv", 0)
+                user = UserCacheService.get(payload["user_id"], min_version=version)
                 if not user:
                     return jsonify({"error": "User not found"}), 401
 
-                if roles and user.role not in roles:
+                # ✅ logged out / role changed since the token was minted
+                if user.token_version != version:
+                    return jsonify({"error": "Token revoked"}), 401
+
+                # same version = the role claim is still current
+                role = payload.get("role", user.role)
+                if roles and role not in roles:
                     return jsonify({"error": "Forbidden"}), 403
 
                 g.current_user = user
@@ -0,0 +1,46 @@
+# utils/date_range.py
+# ?from= / ?to= PARSING — shared by the sales endpoints
+#
+# Sales dates are stored as naive Philippines time (see ph_now), so the
+# bounds are interpreted as PH time too. A bare date in `to` is inclusive
+# (the whole day); a full datetime is used as-is, and one with an explicit
+# offset is converted to PH time first.
+
+from datetime import datetime, time, timedelta
+
+from models.sales_transaction import PH_TZ
+
+
+def _parse(value, name):
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an ISO date or datetime")
+
+    # explicit offsets are converted to PH time before dropping the tz
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(PH_TZ).replace(tzinfo=None)
+    return parsed
+
+
+def parse_date_range(args, start_arg="from", end_arg="to"):
+    """
+    Return (start, end) as naive datetimes, either may be None.
+    Filter with  start <= date < end.
+    """
+    start = end = None
+
+    raw = args.get(start_arg)
+    if raw:
+        start = _parse(raw, start_arg)
+
+    raw = args.get(end_arg)
+    if raw:
+        end = _parse(raw, end_arg)
+        if "T" not in raw and " " not in raw and end.time() == time.min:
+            end += timedelta(days=1)
+
+    if start and end and start >= end:
+        raise ValueError(f"{start_arg} must be before {end_arg}")
+
+    return start, end
@@ -0,0 +1,113 @@
+# utils/item_validation.py
+# SHARED ITEM FIELD RULES (single create/update, bulk import, bulk mutation)
+
+from decimal import Decimal, InvalidOperation
+
+from models.item import Item
+
+# reflected once at import instead of on every request
+CATEGORIES = tuple(Item.__table__.columns.category.type.enums)
+CATEGORY_SET = frozenset(CATEGORIES)
+
+REQUIRED_FIELDS = ("name", "barcode", "category", "price")
+MAX_TEXT_LENGTH = 255
+
+
+def invalid_category_message():
+    return f"Invalid category. Allowed: {', '.join(CATEGORIES)}"
+
+
+def _to_int(value, field):
+    """
+    int for JSON numbers / CSV strings holding a whole number; anything
+    else (2.5, "2.5", true, "abc") raises ValueError instead of truncating.
+    """
+    if isinstance(value, bool):
+        raise ValueError(f"{field} must be an integer")
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, str):
+        try:
+            return int(value.strip())
+        except ValueError:
+            pass
+    raise ValueError(f"{field} must be an integer")
+
+
+def validate_item_fields(data, partial=False):
+    """
+    Validate and coerce item fields.
+
+    Returns (clean, error): `clean` holds only the recognised fields with
+    quantity / reorder_point as int and price as Decimal; `error` is a
+    message or None.
+    With partial=True (updates) missing fields are simply skipped, but a
+    field sent as null / "" is an error rather than a reset to 0.
+    """
+    clean = {}
+
+    if not partial:
+        if (
+            not data.get("name")
+            or not data.get("barcode")
+            or data.get("category") is None
+            or data.get("price") in (None, "")
+        ):
+            return None, "name, barcode, category, and price are required"
+
+    for field in ("name", "barcode"):
+        if field in data:
+            value = data[field]
+            if not value or not isinstance(value, str):
+                return None, f"{field} must be a non-empty string"
+            if len(value) > MAX_TEXT_LENGTH:
+                return None, f"{field} must be at most {MAX_TEXT_LENGTH} characters"
+            clean[field] = value
+
+    if "quantity" in data or not partial:
+        value = data.get("quantity")
+        if partial and value in (None, ""):
+            return None, "quantity must be an integer"
+        try:
+            quantity = 0 if value in (None, "") else _to_int(value, "quantity")
+        except ValueError as e:
+            return None, str(e)
+        if quantity < 0:
+            return None, "quantity must be 0 or greater"
+        clean["quantity"] = quantity
+
+    if "reorder_point" in data or not partial:
+        value = data.get("reorder_point")
+        if partial and value in (None, ""):
+            return None, "reorder_point must be an integer"
+        try:
+            reorder_point = 0 if value in (None, "") else _to_int(value, "reorder_point")
+        except ValueError as e:
+            return None, str(e)
+        if reorder_point < 0:
+            return None, "reorder_point must be 0 or greater"
+        clean["reorder_point"] = reorder_point
+
+    if "price" in data:
+        if isinstance(data["price"], bool):
+            return None, "price must be a number"
+        try:
+            price = Decimal(str(data["price"]).strip())
+        except (InvalidOperation, ValueError):
+            return None, "price must be a number"
+        if not price.is_finite():
+            return None, "price must be a number"
+        if price < 0:
+            return None, "price must be 0 or greater"
+        clean["price"] = price
+
+    # updates keep the old behaviour of ignoring an empty category
+    category = data.get("category")
+    if category not in (None, "") or not partial:
+        if not isinstance(category, str) or category not in CATEGORY_SET:
+            return None, invalid_category_message()
+        clean["category"] = category
+
+    return clean, None
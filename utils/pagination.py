@@ -0,0 +1,54 @@
+# utils/pagination.py
+# KEYSET (CURSOR) PAGINATION HELPERS — shared by list endpoints
+
+import base64
+import json
+import os
+
+DEFAULT_PAGE_SIZE = int(os.getenv("DEFAULT_PAGE_SIZE", 100))
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", 1000))
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(*values):
+    """
+    Pack the sort key of the last row of a page into an opaque token.
+    Values must be JSON serializable (convert datetimes to isoformat first).
+    """
+    raw = json.dumps(list(values), separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token, size):
+    """
+    Unpack a token produced by encode_cursor().
+    Raises InvalidCursor if the token is malformed or has the wrong arity.
+    """
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise InvalidCursor("invalid cursor")
+
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidCursor("invalid cursor")
+
+    return values
+
+
+def parse_page_size(raw, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    """
+    Parse a ?limit= value, clamped to [1, maximum].
+    """
+    if raw is None or raw == "":
+        return default
+
+    try:
+        size = int(raw)
+    except (TypeError, ValueError):
+        raise ValueError("limit must be an integer")
+
+    return max(1, min(size, maximum))
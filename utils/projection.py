@@ -0,0 +1,64 @@
+# utils/projection.py
+# ?fields=a,b,c FIELD PROJECTION — shared by list endpoints
+#
+# A "spec" maps each public field name to (column, converter):
+#
+#   ITEM_FIELDS = {
+#       "id": (Item.id, None),
+#       "price": (Item.price, float),
+#   }
+#
+# Only the columns of the requested fields are selected, so the DB never
+# reads (and the JSON never carries) what the caller did not ask for.
+# A column may be None for computed fields (e.g. nested lists) that the
+# endpoint fills in itself.
+
+from flask import request
+
+
+def parse_fields(spec, arg="fields"):
+    """
+    Return the requested field names (in spec order), or every field if
+    the query arg is absent. Raises ValueError on unknown names.
+    """
+    raw = request.args.get(arg)
+    if not raw:
+        return tuple(spec)
+
+    names = {f.strip() for f in raw.split(",") if f.strip()}
+    unknown = sorted(names - set(spec))
+    if unknown:
+        raise ValueError(
+            f"Unknown field(s): {', '.join(unknown)}. Allowed: {', '.join(spec)}"
+        )
+
+    return tuple(f for f in spec if f in names)
+
+
+def columns(spec, fields, *extra):
+    """
+    Labelled columns for the requested fields, plus any `extra` columns the
+    endpoint needs for itself (sort keys, grouping, joins).
+    """
+    cols = [
+        spec[f][0].label(f)
+        for f in fields
+        if spec[f][0] is not None
+    ]
+    have = {c.name for c in cols}
+    cols.extend(c for c in extra if c.key not in have)
+    return cols
+
+
+def dump(row, spec, fields):
+    """
+    Serialize a row selected with columns(spec, fields).
+    """
+    out = {}
+    for f in fields:
+        column, convert = spec[f]
+        if column is None:
+            continue
+        value = getattr(row, f)
+        out[f] = convert(value) if convert and value is not None else value
+    return out